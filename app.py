@@ -1,10 +1,9 @@
 import streamlit as st
-import json
-import os
-import base64
-from datetime import datetime, timedelta, timezone
+from datetime import date, datetime, timedelta, timezone
 
-from styles import get_custom_css, render_sidebar
+from styles import get_logo_src, inject_custom_css, render_sidebar
+from knowledge_base import get_knowledge_base, get_search_index
+from rendering import PAGE_SIZE_OPTIONS, filter_by_date, paginate
 
 # ページ設定（サイドバーを常に展開）
 st.set_page_config(
@@ -14,58 +13,33 @@ st.set_page_config(
 )
 
 # カスタムCSS適用
-st.markdown(get_custom_css(), unsafe_allow_html=True)
+inject_custom_css()
 
 # サイドバーナビゲーション
 render_sidebar()
 
 
-@st.cache_data(ttl=300)
-def load_knowledge_base():
-    """AI戦術データをJSONファイルから読み込む"""
-    base_dir = os.path.dirname(__file__)
-    ai_tactics_path = os.path.join(base_dir, "data", "ai_tactics.json")
-    
-    try:
-        if os.path.exists(ai_tactics_path):
-            with open(ai_tactics_path, "r", encoding="utf-8") as f:
-                ai_tactics = json.load(f)
-                ai_tactics.sort(key=lambda x: x.get("date", ""), reverse=True)
-                return ai_tactics
-        return []
-    except Exception as e:
-        st.error(f"❌ データ読み込みエラー: {e}")
-        return []
-
-
-def get_svg_as_base64(svg_path):
-    """SVGファイルをBase64エンコード"""
-    try:
-        with open(svg_path, "rb") as f:
-            data = f.read()
-        return base64.b64encode(data).decode()
-    except:
-        return None
+def today_jst():
+    """JSTの今日の日付"""
+    JST = timezone(timedelta(hours=9))
+    return datetime.now(JST).date()
 
 
 def is_today(date_str):
     """日付が今日かどうかを判定"""
     if not date_str:
         return False
-    JST = timezone(timedelta(hours=9))
-    today = datetime.now(JST).strftime("%Y-%m-%d")
-    return date_str == today
+    return date_str == today_jst().isoformat()
 
 
 # ロゴ表示
-logo_path = os.path.join(os.path.dirname(__file__), "assets", "logo_b.svg")
-logo_b64 = get_svg_as_base64(logo_path)
+logo_src = get_logo_src()
 
-if logo_b64:
+if logo_src:
     st.markdown(
         f"""
         <div style="text-align: center; padding: 2rem 0 1rem 0;">
-            <img src="data:image/svg+xml;base64,{logo_b64}" width="300" alt="Logo">
+            <img src="{logo_src}" width="300" alt="Logo">
         </div>
         """,
         unsafe_allow_html=True
@@ -83,51 +57,129 @@ st.markdown(
     unsafe_allow_html=True
 )
 
-# データ読み込み
-knowledge_base = load_knowledge_base()
-
-# 全記事を日付降順で表示
-all_news = sorted(knowledge_base, key=lambda x: x.get("date", ""), reverse=True)
+# データ読み込み（共有データは日付降順で読み取り専用。最初は直近の月の分だけ）
+knowledge_base = get_knowledge_base()
+all_news = knowledge_base.tactics
 
 if not all_news:
     st.info("📭 記事がまだありません。毎朝6時に更新されます。")
     st.stop()
 
-# カードグリッド表示
 st.markdown("---")
 
+# 検索（インデックスのみを参照し、レコード本文は走査しない）
+search_index = get_search_index()
+
+query = ""
+selected_tags = []
+searching = False
+if search_index:
+    col_query, col_tags = st.columns([2, 1])
+    with col_query:
+        query = st.text_input("🔍 キーワード検索", placeholder="例: Claude コードレビュー")
+    with col_tags:
+        selected_tags = st.multiselect("🏷️ タグで絞り込み", search_index.all_tags())
+    
+    searching = bool(query or selected_tags)
+    if searching:
+        # 検索はアーカイブを含む全期間が対象（ヒットした月のパーティションだけを読み込む）
+        all_news = knowledge_base.get_many(search_index.search(query, selected_tags))
+        st.caption(f"🔎 {len(all_news)}件ヒット")
+        if not all_news:
+            st.info("該当する記事がありません。キーワードやタグを変えてお試しください。")
+            st.stop()
+
+# 期間での絞り込み（検索結果は関連度順なので、日付の範囲は最大・最小で求める）
+news_dates = [item["date"] for item in all_news if item.get("date")]
+newest_date = date.fromisoformat(max(news_dates, default=today_jst().isoformat()))
+oldest_date = date.fromisoformat(min(news_dates, default=newest_date.isoformat()))
+default_start = oldest_date
+if not searching:
+    # アーカイブの月も選べるようにし、既定では直近の月（と「さらに古い記事」で読み込んだ月）を表示する
+    oldest_date = min(oldest_date, date.fromisoformat(knowledge_base.oldest_date or oldest_date.isoformat()))
+    default_start = max(oldest_date, min(default_start, st.session_state.get("archive_start", default_start)))
+
+col_range, col_size = st.columns([2, 1])
+with col_range:
+    date_range = st.date_input(
+        "📅 期間",
+        value=(default_start, newest_date),
+        min_value=oldest_date,
+        max_value=newest_date,
+    )
+with col_size:
+    page_size = st.selectbox("表示件数", PAGE_SIZE_OPTIONS, key="page_size")
+
+# 期間の入力途中（開始日のみ選択）の場合は開始日以降を表示
+if isinstance(date_range, (tuple, list)):
+    start_date = date_range[0] if len(date_range) > 0 else None
+    end_date = date_range[1] if len(date_range) > 1 else None
+else:
+    start_date, end_date = date_range, None
+if not searching:
+    # 開始日がアーカイブの月にかかる場合は、その月のパーティションを読み込む
+    all_news = knowledge_base.tactics_since(start_date)
+all_news = filter_by_date(all_news, start_date, end_date)
+
+# 絞り込み条件が変わったら1ページ目に戻す
+filter_key = (query, tuple(selected_tags), start_date, end_date, page_size)
+if st.session_state.get("list_filter_key") != filter_key:
+    st.session_state.list_filter_key = filter_key
+    st.session_state.page = st.session_state.pop("page_after_load", 1)
+
+# 表示中のページのカードだけを描画（ウィジェット数はページサイズで上限）
+page_items, total_pages, current_page = paginate(all_news, st.session_state.get("page", 1), page_size)
+st.session_state.page = current_page
+
+if not page_items:
+    st.info("この期間の記事はありません。")
+
 cols = st.columns(3)
 
-for idx, item in enumerate(all_news):
+for idx, item in enumerate(page_items):
     with cols[idx % 3]:
-        # ビジュアルテーマを取得（グラデーション + アイコン）
-        visual_theme = item.get("visual_theme", {})
-        gradient = visual_theme.get("gradient", "linear-gradient(135deg, #667eea 0%, #764ba2 100%)")
-        icon = visual_theme.get("icon", "🤖")
-        
-        image_html = f'<div style="height: 200px; background: {gradient}; display: flex; align-items: center; justify-content: center; color: white; font-size: 4rem; border-radius: 12px 12px 0 0;">{icon}</div>'
-        
-        title = item.get("title", "")[:60]
-        title_ellipsis = "..." if len(item.get("title", "")) > 60 else ""
-        highlight = item.get("news_highlight", "")[:80]
-        highlight_ellipsis = "..." if len(item.get("news_highlight", "")) > 80 else ""
-        
-        card_html = f'''<div style="border: 1px solid #e0e0e0; border-radius: 12px; margin-bottom: 0.5rem; box-shadow: 0 2px 8px rgba(0,0,0,0.1); overflow: hidden; height: 380px; display: flex; flex-direction: column;">
-{image_html}
-<div style="padding: 1rem 1.5rem; flex: 1; display: flex; flex-direction: column;">
-<div style="font-size: 0.8rem; color: #999;">{item.get("date", "")}</div>
-<h3 style="font-size: 1.5rem; color: #333; margin: 0.3rem 0; line-height: 1.3; overflow: hidden; display: -webkit-box; -webkit-line-clamp: 2; -webkit-box-orient: vertical;">{title}{title_ellipsis}</h3>
-<p style="font-size: 0.85rem; color: #666; margin: 0.2rem 0; flex: 1; overflow: hidden; display: -webkit-box; -webkit-line-clamp: 3; -webkit-box-orient: vertical;">{highlight}{highlight_ellipsis}</p>
-</div>
-</div>'''
-        
-        st.markdown(card_html, unsafe_allow_html=True)
+        st.markdown(knowledge_base.card_html(item), unsafe_allow_html=True)
         
         # 記事へのリンクボタン
         if st.button("📖 記事を読む", key=f"read_{item.get('id', idx)}", use_container_width=True):
             st.session_state.selected_article_id = item.get("id")
             st.switch_page("pages/article.py")
 
+
+def go_to_page(page):
+    st.session_state.page = page
+
+
+def load_older(partition_start, page):
+    """1つ前の月のパーティションまで表示範囲を広げ、今のページから続けて読めるようにする"""
+    st.session_state.archive_start = partition_start
+    st.session_state.page_after_load = page
+
+
+# ページ送り
+if total_pages > 1:
+    col_prev, col_status, col_next = st.columns([1, 2, 1])
+    with col_prev:
+        st.button("◀ 前へ", key="page_prev", use_container_width=True,
+                  disabled=current_page <= 1, on_click=go_to_page, args=(current_page - 1,))
+    with col_status:
+        st.markdown(
+            f'<div style="text-align: center; color: #666; padding-top: 0.4rem;">'
+            f'{current_page} / {total_pages} ページ（全{len(all_news)}件）</div>',
+            unsafe_allow_html=True
+        )
+    with col_next:
+        st.button("次へ ▶", key="page_next", use_container_width=True,
+                  disabled=current_page >= total_pages, on_click=go_to_page, args=(current_page + 1,))
+
+# 最後のページまで来たら、アーカイブからさらに古い月を読み込めるようにする
+older = knowledge_base.older_partition(start_date) if not searching and start_date else None
+if older and current_page >= total_pages:
+    older_start = date.fromisoformat(older["oldest"])
+    st.button(f"📚 さらに古い記事を読み込む（{older_start.year}年{older_start.month}月・{older['count']}件）",
+              key="load_older", use_container_width=True, on_click=load_older,
+              args=(older_start, current_page))
+
 # フッター
 st.markdown("---")
 st.markdown(
@@ -0,0 +1,86 @@
+"""
+トップページのカードグリッドの描画ベンチマーク
+全件描画（従来）とページ分割（現行）で、1回の再実行あたりの
+描画時間・ウィジェット数・送信ペイロード（要素protobufのバイト数）を比較する
+
+使い方:
+    python benchmarks/bench_card_grid.py [--runs 5]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from streamlit.testing.v1 import AppTest
+
+# 従来のトップページ（全件を3列グリッドに描画）を再現したスクリプト
+LEGACY_GRID_SCRIPT = f"""
+import sys
+sys.path.insert(0, {ROOT_DIR!r})
+import streamlit as st
+from styles import get_custom_css, render_sidebar
+from scripts.tactics_store import load_tactics
+from rendering import render_card_html
+
+st.markdown(get_custom_css(), unsafe_allow_html=True)
+render_sidebar()
+
+all_news = sorted(load_tactics(), key=lambda x: x.get("date", ""), reverse=True)
+cols = st.columns(3)
+for idx, item in enumerate(all_news):
+    with cols[idx % 3]:
+        st.markdown(render_card_html(item), unsafe_allow_html=True)
+        st.button("📖 記事を読む", key=f"read_{{item.get('id', idx)}}", use_container_width=True)
+"""
+
+
+def _walk(node):
+    yield node
+    for child in getattr(node, "children", {}).values():
+        yield from _walk(child)
+
+
+def measure(app, runs):
+    """再実行ごとの描画時間・ウィジェット数・ペイロードを計測"""
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        app.run()
+        timings.append(time.perf_counter() - start)
+        if app.exception:
+            raise RuntimeError(app.exception[0].message)
+
+    nodes = list(_walk(app._tree))
+    payload = sum(node.proto.ByteSize() for node in nodes if hasattr(getattr(node, "proto", None), "ByteSize"))
+    return {
+        "median_ms": statistics.median(timings) * 1000,
+        "elements": len(nodes),
+        "buttons": len(app.button),
+        "payload_bytes": payload,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="カードグリッドの描画ベンチマーク")
+    parser.add_argument("--runs", type=int, default=5, help="計測する再実行回数")
+    args = parser.parse_args()
+
+    os.chdir(ROOT_DIR)
+    before = measure(AppTest.from_string(LEGACY_GRID_SCRIPT, default_timeout=120), args.runs)
+    after = measure(AppTest.from_file(os.path.join(ROOT_DIR, "app.py"), default_timeout=120), args.runs)
+
+    print("=" * 60)
+    print(f"{'':16}{'全件描画(従来)':>16}{'ページ分割':>14}{'比率':>10}")
+    for key, label in [("median_ms", "描画時間(ms)"), ("elements", "要素数"),
+                       ("buttons", "ボタン数"), ("payload_bytes", "ペイロード(B)")]:
+        ratio = after[key] / before[key] if before[key] else 0
+        print(f"{label:16}{before[key]:>16,.0f}{after[key]:>14,.0f}{ratio:>10.2f}")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,416 @@
+"""
+データ件数に比例して重くなる処理のベンチマーク
+合成データ（benchmarks/synthetic_corpus.py）を 500 / 5千 / 5万 / 50万件で作り、次を計測する
+
+- parse          : スナップショットの読み込み（json.load・msgpack）と load_tactics（直近の月 / アーカイブを含む全期間）
+- knowledge_base : アプリの読み込み（KnowledgeBase 構築。カードHTML・記事本文は生成済みを使う）と
+                   アーカイブの月別パーティションを初めて読み込む時間
+- merge          : マージ（セグメント追記・コンパクション・検索インデックス・カードHTML・記事本文の再構築と保存）
+
+データは tactics_store と同じ形（直近 HOT_MONTHS か月をスナップショット、それより古い月をパーティション）で置く。
+- visual_theme   : get_visual_theme の1回あたりの時間と、全期間のテーマを一括モードで付け直す時間
+
+各処理は別プロセスで実行し、ピークRSS（そのプロセスの最大常駐メモリ）も記録する。
+結果はJSONで保存する（--compare で以前の結果と比べ、保存形式などの変更を数値で判断できる）。
+
+使い方:
+    python benchmarks/bench_data_path.py                          # 全件数（50万件は数GBのメモリが必要）
+    python benchmarks/bench_data_path.py --sizes 500,5000 --runs 5
+    python benchmarks/bench_data_path.py --sizes 5000 --compare .cache/benchmarks/data_path_before.json
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from benchmarks import synthetic_corpus
+
+DEFAULT_OUTPUT = os.path.join(ROOT_DIR, ".cache", "benchmarks", "data_path.json")
+
+# 実行順（merge はデータを書き換えるので最後）
+CASES = ["parse", "knowledge_base", "visual_theme", "merge"]
+
+# 1回のマージで追加するレコード数と、コンパクション前にたまっているセグメント数（日次実行の想定）
+NEW_PER_MERGE = 3
+PENDING_SEGMENTS = 6
+
+# 1回あたりの時間を計測する呼び出し数の上限
+LATENCY_SAMPLES = 20_000
+
+
+# --- 計測（子プロセス側） ---
+
+def peak_rss_mb():
+    """このプロセスの最大常駐メモリ（MB）"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux は KB、macOS はバイト
+    return peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024
+
+
+def timed(fn, runs):
+    """fn を runs 回実行し、(中央値の秒数, 最後の戻り値)"""
+    timings = []
+    result = None
+    for _ in range(runs):
+        result = None
+        start = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings), result
+
+
+def latency_stats(fn, args_list):
+    """1回ずつの時間（マイクロ秒）の分布"""
+    timings = []
+    for args in args_list:
+        start = time.perf_counter()
+        fn(*args)
+        timings.append((time.perf_counter() - start) * 1_000_000)
+    timings.sort()
+    return {
+        "calls": len(timings),
+        "mean_us": round(statistics.fmean(timings), 2),
+        "p50_us": round(timings[len(timings) // 2], 2),
+        "p95_us": round(timings[int(len(timings) * 0.95)], 2),
+        "max_us": round(timings[-1], 2),
+    }
+
+
+def _paths(corpus_dir):
+    return {
+        "snapshot": os.path.join(corpus_dir, "ai_tactics.json"),
+        "segments": os.path.join(corpus_dir, "segments"),
+        "cards": os.path.join(corpus_dir, "card_fragments.json"),
+        "articles": os.path.join(corpus_dir, "article_renders.json"),
+    }
+
+
+def case_setup(corpus_dir, size, runs, article_ratio):
+    """合成データを書き出す（スナップショット・月別パーティション・未統合セグメント・生成済みHTML）"""
+    import rendering
+    from scripts import snapshot_codec, tactics_store
+
+    paths = _paths(corpus_dir)
+    start = time.perf_counter()
+    tactics = synthetic_corpus.generate_tactics(size, article_ratio=article_ratio)
+    generate_s = time.perf_counter() - start
+
+    hot, archived = tactics_store.split_hot(tactics)
+    tactics_store.write_json_atomic(paths["snapshot"], hot, indent=2)
+    snapshot_codec.write_binary_snapshot(hot, paths["snapshot"])
+    partitions = tactics_store.archive_records(archived, paths["snapshot"])
+    tactics_store.write_manifest(partitions, hot, paths["snapshot"])
+    os.makedirs(paths["segments"])
+    pending = synthetic_corpus.generate_new_tactics(NEW_PER_MERGE * PENDING_SEGMENTS, seed=2)
+    for number in range(PENDING_SEGMENTS):
+        with open(os.path.join(paths["segments"], f"20261001_0{number}0000.jsonl"), "w", encoding="utf-8") as f:
+            for tactic in pending[number * NEW_PER_MERGE:(number + 1) * NEW_PER_MERGE]:
+                f.write(json.dumps(tactic, ensure_ascii=False) + "\n")
+    all_tactics = pending[::-1] + hot
+    tactics_store.write_json_atomic(paths["cards"], rendering.build_card_fragments(all_tactics)[0],
+                                    separators=(",", ":"))
+    tactics_store.write_json_atomic(paths["articles"], rendering.build_article_renders(all_tactics)[0],
+                                    separators=(",", ":"))
+
+    binary_path = snapshot_codec.binary_path_for(paths["snapshot"])
+    return {
+        "generate_s": round(generate_s, 3),
+        "snapshot_mb": round(os.path.getsize(paths["snapshot"]) / 1024 / 1024, 2),
+        "binary_mb": round(os.path.getsize(binary_path) / 1024 / 1024, 2) if os.path.exists(binary_path) else None,
+        "cards_mb": round(os.path.getsize(paths["cards"]) / 1024 / 1024, 2),
+        "articles_mb": round(os.path.getsize(paths["articles"]) / 1024 / 1024, 2),
+        "articles": sum(1 for tactic in tactics if tactic["article"]),
+        "hot_records": len(hot),
+        "partitions": len(partitions),
+        "archive_mb": round(sum(os.path.getsize(tactics_store.partition_path(month, paths["snapshot"]))
+                                for month in partitions) / 1024 / 1024, 2),
+    }
+
+
+def case_parse(corpus_dir, size, runs, article_ratio):
+    from scripts import snapshot_codec, tactics_store
+
+    paths = _paths(corpus_dir)
+
+    def load_json():
+        with open(paths["snapshot"], "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    json_s, records = timed(load_json, runs)
+    count = len(records)
+    del records
+    binary_s, _ = timed(lambda: snapshot_codec.read_binary_snapshot(paths["snapshot"]), runs)
+    load_s, tactics = timed(lambda: tactics_store.load_tactics(paths["snapshot"], paths["segments"],
+                                                               include_archive=False), runs)
+    hot_count = len(tactics)
+    del tactics
+    load_all_s, tactics = timed(lambda: tactics_store.load_tactics(paths["snapshot"], paths["segments"]), runs)
+    return {"records": count, "json_load_s": round(json_s, 4), "binary_load_s": round(binary_s, 4),
+            "load_tactics_s": round(load_s, 4), "loaded": hot_count,
+            "load_all_s": round(load_all_s, 4), "loaded_all": len(tactics)}
+
+
+def case_knowledge_base(corpus_dir, size, runs, article_ratio):
+    """アプリの初回読み込み（knowledge_base._load_knowledge_base と同じ処理）"""
+    import rendering
+    from knowledge_base import KnowledgeBase
+    from scripts import tactics_store
+
+    paths = _paths(corpus_dir)
+
+    def load():
+        return KnowledgeBase(tactics_store.load_tactics(paths["snapshot"], paths["segments"], include_archive=False),
+                             rendering.load_card_fragments(paths["cards"]),
+                             rendering.load_article_renders(paths["articles"]),
+                             manifest=tactics_store.load_manifest(paths["snapshot"]),
+                             partition_loader=lambda month: tactics_store.read_partition(month, paths["snapshot"]))
+
+    load_s, knowledge_base = timed(load, runs)
+    # 読み込み後の1件取得（記事ページ）
+    ids = [tactic["id"] for tactic in knowledge_base.tactics[:LATENCY_SAMPLES]]
+    lookup = latency_stats(knowledge_base.get, [(tactic_id,) for tactic_id in ids])
+    # さらに古い月を初めて表示するときの読み込み（1か月分ずつ、新しい月から）
+    months = [partition["month"] for partition in knowledge_base.partitions[:LATENCY_SAMPLES // 1000]]
+    partition_load = latency_stats(knowledge_base.archive_partition, [(month,) for month in months]) if months else None
+    return {"load_s": round(load_s, 4), "records": len(knowledge_base), "total": knowledge_base.total,
+            "get": lookup, "partition_load": partition_load}
+
+
+def case_merge(corpus_dir, size, runs, article_ratio):
+    """マージ1回分（merge_tactics.publish_tactics と同じ処理を、コンパクションありで実行）"""
+    import rendering
+    from scripts import search_index, tactics_store
+
+    source = _paths(corpus_dir)
+    steps = {name: [] for name in ("append", "compact", "search_index", "cards", "articles")}
+    totals = []
+    for run in range(runs):
+        # 実行ごとに元のデータから始める（コピーの時間は含めない）
+        work_dir = tempfile.mkdtemp(dir=corpus_dir)
+        paths = _paths(work_dir)
+        for key in ("snapshot", "cards", "articles"):
+            shutil.copy(source[key], paths[key])
+        shutil.copytree(source["segments"], paths["segments"])
+        shutil.copytree(os.path.join(corpus_dir, "archive"), os.path.join(work_dir, "archive"))
+        new_tactics = synthetic_corpus.generate_new_tactics(NEW_PER_MERGE, seed=100 + run,
+                                                            start=datetime(2026, 10, 10).date())
+
+        started = time.perf_counter()
+        step_started = started
+
+        def lap(name):
+            nonlocal step_started
+            now = time.perf_counter()
+            steps[name].append(now - step_started)
+            step_started = now
+
+        tactics_store.append_tactics(new_tactics, paths["snapshot"], paths["segments"])
+        lap("append")
+        all_tactics = tactics_store.compact(snapshot_path=paths["snapshot"], segments_dir=paths["segments"])
+        lap("compact")
+        tactics_store.write_json_atomic(os.path.join(work_dir, "search_index.json"),
+                                        search_index.build_index(tactics_store.load_tactics(paths["snapshot"])),
+                                        separators=(",", ":"))
+        lap("search_index")
+        fragments, _ = rendering.build_card_fragments(all_tactics, rendering.load_card_fragments(paths["cards"]))
+        tactics_store.write_json_atomic(paths["cards"], fragments, separators=(",", ":"))
+        lap("cards")
+        renders, _ = rendering.build_article_renders(all_tactics, rendering.load_article_renders(paths["articles"]))
+        tactics_store.write_json_atomic(paths["articles"], renders, separators=(",", ":"))
+        lap("articles")
+        totals.append(time.perf_counter() - started)
+        del all_tactics, fragments, renders
+        shutil.rmtree(work_dir)
+
+    result = {"merge_s": round(statistics.median(totals), 4)}
+    result.update({f"{name}_s": round(statistics.median(values), 4) for name, values in steps.items()})
+    return result
+
+
+def _sample_records(corpus_dir, limit):
+    with open(_paths(corpus_dir)["snapshot"], "r", encoding="utf-8") as f:
+        records = json.load(f)
+    return records[:limit]
+
+
+def case_visual_theme(corpus_dir, size, runs, article_ratio):
+    from scripts import tactics_store, visual_theme
+
+    paths = _paths(corpus_dir)
+    records = _sample_records(corpus_dir, LATENCY_SAMPLES)
+    calls = [(record, index) for index, record in enumerate(records)]
+    result = {"single": latency_stats(visual_theme.get_visual_theme, calls)}
+    del records, calls
+    tactics = tactics_store.load_tactics(paths["snapshot"], paths["segments"])
+    bulk_s, _ = timed(lambda: visual_theme.get_engine().apply(tactics), runs)
+    result.update({"bulk_s": round(bulk_s, 4), "bulk_records": len(tactics),
+                   "bulk_per_record_us": round(bulk_s / max(1, len(tactics)) * 1_000_000, 3)})
+    return result
+
+
+CASE_FUNCTIONS = {"setup": case_setup, "parse": case_parse, "knowledge_base": case_knowledge_base,
+                  "merge": case_merge, "visual_theme": case_visual_theme}
+
+
+def run_worker(case, corpus_dir, size, runs, article_ratio, result_path):
+    baseline = peak_rss_mb()
+    result = CASE_FUNCTIONS[case](corpus_dir, size, runs, article_ratio)
+    result["peak_rss_mb"] = round(peak_rss_mb(), 1)
+    result["baseline_rss_mb"] = round(baseline, 1)
+    with open(result_path, "w", encoding="utf-8") as f:
+        json.dump(result, f)
+
+
+# --- 実行（親プロセス側） ---
+
+def run_case(case, corpus_dir, size, runs, article_ratio, timeout):
+    """1つの処理を別プロセスで実行して結果を返す（失敗・時間切れは error に記録）"""
+    result_path = os.path.join(corpus_dir, f"result_{case}.json")
+    command = [sys.executable, os.path.abspath(__file__), "--worker", case, "--corpus", corpus_dir,
+               "--sizes", str(size), "--runs", str(runs), "--article-ratio", str(article_ratio),
+               "--result", result_path]
+    started = time.perf_counter()
+    try:
+        completed = subprocess.run(command, cwd=ROOT_DIR, capture_output=True, text=True, timeout=timeout)
+    except subprocess.TimeoutExpired:
+        return {"error": f"{timeout}秒で打ち切り"}
+    if completed.returncode != 0 or not os.path.exists(result_path):
+        # 50万件でメモリが足りない場合など（-9 は OOM killer）
+        tail = (completed.stderr or "").strip().splitlines()[-1:] or [""]
+        return {"error": f"終了コード {completed.returncode}: {tail[0][:200]}"}
+    with open(result_path, "r", encoding="utf-8") as f:
+        result = json.load(f)
+    result["wall_s"] = round(time.perf_counter() - started, 2)
+    return result
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT_DIR, capture_output=True,
+                              text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def _get(result, path):
+    for key in path.split("."):
+        if not isinstance(result, dict):
+            return None
+        result = result.get(key)
+    return result
+
+
+# 表示・比較する指標（ラベル, 処理, 結果内のキー）
+SUMMARY_METRICS = [
+    ("スナップショット(MB)", "setup", "snapshot_mb"),
+    ("json.load(ms)", "parse", "json_load_s"),
+    ("msgpack(ms)", "parse", "binary_load_s"),
+    ("load_tactics(ms)", "parse", "load_tactics_s"),
+    ("全期間の読み込み(ms)", "parse", "load_all_s"),
+    ("アプリ読み込み(ms)", "knowledge_base", "load_s"),
+    ("アプリ読み込みRSS(MB)", "knowledge_base", "peak_rss_mb"),
+    ("1か月の追加読込 p50(µs)", "knowledge_base", "partition_load.p50_us"),
+    ("マージ(ms)", "merge", "merge_s"),
+    ("マージRSS(MB)", "merge", "peak_rss_mb"),
+    ("テーマ p50(µs)", "visual_theme", "single.p50_us"),
+    ("テーマ一括(ms)", "visual_theme", "bulk_s"),
+]
+
+
+def _display(key, value):
+    if value is None:
+        return "-"
+    return f"{value * 1000:,.1f}" if key.endswith("_s") else f"{value:,.1f}"
+
+
+def print_summary(report, previous=None):
+    sizes = list(report["results"])
+    print("=" * (24 + 14 * len(sizes)))
+    print(f"{'':24}" + "".join(f"{int(size):>14,}" for size in sizes))
+    for label, case, key in SUMMARY_METRICS:
+        cells = []
+        for size in sizes:
+            value = _get(report["results"][size].get(case), key)
+            cell = _display(key.split(".")[-1], value)
+            old = _get(((previous or {}).get("results") or {}).get(size, {}).get(case), key)
+            if value is not None and old:
+                cell += f" ({value / old:.2f}x)"
+            cells.append(cell)
+        print(f"{label:24}" + "".join(f"{cell:>14}" for cell in cells))
+    for size in sizes:
+        for case, result in report["results"][size].items():
+            if "error" in result:
+                print(f"⚠️ {int(size):,}件 {case}: {result['error']}")
+    print("=" * (24 + 14 * len(sizes)))
+    if previous:
+        print(f"（括弧内は以前の結果 {previous.get('created_at', '')} {previous.get('git_commit') or ''} との比）")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="データ件数に比例する処理のベンチマーク")
+    parser.add_argument("--sizes", default=",".join(str(size) for size in synthetic_corpus.CORPUS_SIZES),
+                        help="レコード数（カンマ区切り）")
+    parser.add_argument("--runs", type=int, default=3, help="各処理の計測回数（中央値を使う）")
+    parser.add_argument("--cases", default=",".join(CASES), help="実行する処理（カンマ区切り）")
+    parser.add_argument("--article-ratio", type=float, default=synthetic_corpus.DEFAULT_ARTICLE_RATIO,
+                        help="記事本文を付けるレコードの割合")
+    parser.add_argument("--timeout", type=int, default=3600, help="1つの処理の制限時間（秒）")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="結果のJSONの保存先")
+    parser.add_argument("--compare", help="比較する以前の結果のJSON")
+    parser.add_argument("--worker", choices=sorted(CASE_FUNCTIONS), help=argparse.SUPPRESS)
+    parser.add_argument("--corpus", help=argparse.SUPPRESS)
+    parser.add_argument("--result", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    sizes = [int(size) for size in args.sizes.split(",") if size]
+
+    if args.worker:
+        run_worker(args.worker, args.corpus, sizes[0], args.runs, args.article_ratio, args.result)
+        return
+
+    cases = [case for case in CASES if case in args.cases.split(",")]
+    report = {
+        "benchmark": "data_path",
+        "created_at": datetime.now(timezone(timedelta(hours=9))).isoformat(timespec="seconds"),
+        "git_commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "runs": args.runs,
+        "article_ratio": args.article_ratio,
+        "results": {},
+    }
+    for size in sizes:
+        print(f"📦 {size:,}件のデータで計測中...")
+        with tempfile.TemporaryDirectory() as corpus_dir:
+            results = {"setup": run_case("setup", corpus_dir, size, 1, args.article_ratio, args.timeout)}
+            if "error" not in results["setup"]:
+                for case in cases:
+                    results[case] = run_case(case, corpus_dir, size, args.runs, args.article_ratio, args.timeout)
+                    print(f"   {case}: {results[case].get('wall_s', '-')}秒")
+        report["results"][str(size)] = results
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+    previous = None
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            previous = json.load(f)
+    print_summary(report, previous)
+    print(f"📁 保存先: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+スナップショット形式のベンチマーク
+ai_tactics.json（indent=2）と ai_tactics.msgpack（列指向・文字列共有）の
+ファイルサイズ・読み込み時間・メモリ（ピーク/読み込み後の保持量）を比較する
+
+使い方:
+    python benchmarks/bench_snapshot.py [--runs 20]
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from scripts import snapshot_codec
+from scripts.tactics_store import SNAPSHOT_PATH
+
+
+def load_json():
+    with open(SNAPSHOT_PATH, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def load_binary():
+    records = snapshot_codec.read_binary_snapshot(SNAPSHOT_PATH)
+    if records is None:
+        raise RuntimeError("有効なバイナリスナップショットがありません（python scripts/snapshot_codec.py で作成）")
+    return records
+
+
+def measure(loader, runs):
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        loader()
+        timings.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    records = loader()
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del records
+    return {"median_ms": statistics.median(timings) * 1000, "peak_kb": peak / 1024, "retained_kb": retained / 1024}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="スナップショット形式のベンチマーク")
+    parser.add_argument("--runs", type=int, default=20, help="読み込みの計測回数")
+    args = parser.parse_args()
+
+    if load_json() != load_binary():
+        raise RuntimeError("JSONとバイナリの内容が一致しません")
+
+    json_result = measure(load_json, args.runs)
+    binary_result = measure(load_binary, args.runs)
+    json_result["size_kb"] = os.path.getsize(SNAPSHOT_PATH) / 1024
+    binary_result["size_kb"] = os.path.getsize(snapshot_codec.binary_path_for(SNAPSHOT_PATH)) / 1024
+
+    print("=" * 60)
+    print(f"{'':20}{'JSON':>12}{'msgpack':>12}{'比率':>10}")
+    for key, label in [("size_kb", "ファイル(KB)"), ("median_ms", "読み込み(ms)"),
+                       ("peak_kb", "ピークメモリ(KB)"), ("retained_kb", "保持メモリ(KB)")]:
+        ratio = binary_result[key] / json_result[key] if json_result[key] else 0
+        print(f"{label:20}{json_result[key]:>12,.1f}{binary_result[key]:>12,.1f}{ratio:>10.2f}")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""
+ベンチマーク用の合成データ（日本語の戦術レコード）の生成
+data/ai_tactics.json と同じ形・同程度の長さのレコードを、シードから決定的に作る
+
+- タイトルにはテーマ判定のキーワード（GPT・Claude・Gemini など）を実データと同程度の割合で含める
+- 日付は新しい順に1日あたり数件ずつ遡り、IDは「日付_時刻_連番」で重複しない
+- article_ratio の割合で記事本文（見出し・コードブロック・まとめ付きのMarkdown）を付ける
+
+使い方:
+    python benchmarks/synthetic_corpus.py --count 5000 --out /tmp/corpus   # スナップショットとして書き出す
+"""
+import argparse
+import json
+import os
+import random
+import sys
+from datetime import date, timedelta
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+# ベンチマークで使う件数
+CORPUS_SIZES = [500, 5_000, 50_000, 500_000]
+
+# 実データでは記事本文のないレコードが多い
+DEFAULT_ARTICLE_RATIO = 0.1
+
+PRODUCTS = [
+    ("OpenAI GPT-5", "gpt"), ("ChatGPT Enterprise", "chatgpt"), ("Claude Sonnet 4.5", "claude"),
+    ("Anthropic Claude Code", "claude"), ("Gemini 2.5 Pro", "gemini"), ("Google Vertex AI", "google"),
+    ("Llama 4", "llama"), ("Meta AI Studio", "meta"), ("GitHub Copilot coding agent", "code"),
+    ("Codex CLI", "codex"), ("Stable Diffusion image API", "image"), ("NVIDIA Nemotron", "nvidia"),
+    ("Hugging Face Apriel", "hugging"), ("LangGraph agent", "agent"), ("Promptions UI", "prompt"),
+    ("Mistral Large", None), ("Qwen3", None), ("DeepSeek-V3", None), ("Cohere Command R+", None),
+    ("AWS Bedrock", None), ("Azure AI Foundry", None), ("Perplexity Sonar", None),
+]
+ACTIONS = [
+    "でコードレビューを自動化", "で設計ドキュメントを下書き", "でテストケースを網羅", "でログ分析を高速化",
+    "でSQLチューニング", "で障害対応の初動を短縮", "でAPI仕様書を整備", "でリファクタリング計画",
+    "でオンボーディング資料を作成", "で要件定義の抜け漏れ確認", "でグローバルAI推論設計", "でデータ移行を検証",
+]
+HIGHLIGHTS = [
+    "{product}の推論速度が{n}倍に向上", "{product}がコンテキスト長{k}万トークンに対応",
+    "{product}の料金が{p}%値下げ", "{product}がベンチマークで{p}%のスコアを記録",
+    "{product}が{n}つの新しいリージョンで利用可能に", "{product}にエージェント機能が追加",
+]
+PROBLEMS = [
+    "レビュー待ちでリリースが遅れる", "障害時の原因調査に時間がかかる", "仕様書と実装のずれが放置される",
+    "テストの観点が担当者ごとにばらつく", "グローバル展開アプリのAI推論レイテンシ最適化",
+    "レガシーコードの影響範囲が読めない", "問い合わせ対応の一次切り分けが属人化している",
+]
+REASONS = ["高速で安価", "長いコンテキストを扱える", "コード理解に強い", "日本語の要約が自然", "クロスリージョン推論対応"]
+BADGE_COLORS = ["orange", "blue", "green", "purple", "red"]
+USE_CASES = [
+    "プルリクエストを出す前にセルフレビューしたい時", "障害発生直後にログから原因の当たりをつけたい時",
+    "新しく参加したメンバーにコードベースを説明する時", "複数のAWSリージョンにまたがる構成を検討する時",
+    "既存の関数をテストしやすい形に分割したい時", "仕様変更の影響範囲を洗い出したい時",
+    "週次レポートを短時間でまとめたい時", "SQLの実行計画を読み解きたい時",
+]
+STEPS = [
+    "対象のコードや資料をまとめてコピーする", "前提条件と制約を箇条書きで整理する",
+    "AIにプロンプトを渡して一次案を出させる", "出力をチームの規約と照らし合わせて確認する",
+    "指摘された点を修正し、差分をもう一度レビューさせる", "結果をドキュメントに残して次回に使い回す",
+]
+PROMPTS = [
+    "あなたは経験豊富なシニアエンジニアです。次の{target}を読み、問題点と改善案を優先度順に挙げてください。"
+    "各指摘には理由と具体的な修正例を付けてください。",
+    "次の{target}について、想定される障害パターンと検知方法、初動対応の手順を表形式でまとめてください。",
+    "以下の{target}を、新しく参加したメンバー向けに500文字以内で説明してください。専門用語には短い補足を付けてください。",
+]
+TARGETS = ["差分", "設計書", "エラーログ", "SQL", "API仕様", "テストコード", "インフラ構成"]
+TAGS = [
+    "コードレビュー", "テスト", "設計", "ドキュメント", "障害対応", "パフォーマンス", "セキュリティ", "SQL",
+    "アーキテクチャ設計", "グローバル展開", "レイテンシ最適化", "データレジデンシー", "リファクタリング", "オンボーディング",
+]
+ARTICLE_PARAGRAPHS = [
+    "今回のアップデートで最も大きいのは、応答速度と長いコンテキストの両立です。これまでは大きなファイルを"
+    "分割して渡す必要がありましたが、リポジトリの主要なモジュールをまとめて読ませられるようになりました。",
+    "実務で使う際は、最初にチームの規約や前提条件を伝えておくことが重要です。前提が曖昧なままだと、"
+    "一般論としては正しくても、プロジェクトには合わない提案が返ってきます。",
+    "出力はそのまま採用せず、必ず差分として確認しましょう。特にエラーハンドリングや境界値の扱いは、"
+    "既存のコードの慣習と食い違うことがあります。",
+    "料金面では、バッチ処理やキャッシュを組み合わせることで、日常的な利用でも十分に採算が合います。"
+    "まずは小さなタスクから試し、効果を数字で確認してから範囲を広げるのがおすすめです。",
+]
+
+
+def _title(rng):
+    product, _ = rng.choice(PRODUCTS)
+    return f"{product}{rng.choice(ACTIONS)}", product
+
+
+def _article(rng, title):
+    sections = []
+    for number, heading in enumerate(["概要", "何が変わったのか", "実務での使い方", "注意点"], 1):
+        body = "\n\n".join(rng.sample(ARTICLE_PARAGRAPHS, 2))
+        sections.append(f"## {number}. {heading}\n\n{body}")
+    code = "```python\nresponse = client.generate(prompt, max_tokens=2048)\nprint(response.text)\n```"
+    return (f"# {title}\n\n" + "\n\n".join(sections[:3]) + f"\n\n{code}\n\n" + sections[3]
+            + "\n\n## まとめ\n\n" + rng.choice(ARTICLE_PARAGRAPHS))
+
+
+def generate_tactic(rng, index, day, article_ratio=DEFAULT_ARTICLE_RATIO):
+    """1件の戦術レコードを作る"""
+    title, product = _title(rng)
+    highlight = rng.choice(HIGHLIGHTS).format(product=product, n=rng.randint(2, 5), k=rng.choice([20, 100, 200]),
+                                              p=rng.randint(10, 90))
+    tactic = {
+        "title": title,
+        "news_highlight": highlight,
+        "problem_context": rng.choice(PROBLEMS),
+        "recommended_ai": {"model": product, "reason": rng.choice(REASONS), "badge_color": rng.choice(BADGE_COLORS)},
+        "use_cases": rng.sample(USE_CASES, 3),
+        "steps": rng.sample(STEPS, rng.randint(3, 5)),
+        "prompt": rng.choice(PROMPTS).format(target=rng.choice(TARGETS)),
+        "tags": rng.sample(TAGS, rng.randint(2, 4)),
+        "id": f"{day.strftime('%Y%m%d')}_060000_{index:02d}",
+        "date": day.isoformat(),
+        "source_news": {"title": f"{highlight}。", "url": f"https://example.com/news/{day.isoformat()}/{index}"},
+        "article": _article(rng, title) if rng.random() < article_ratio else None,
+    }
+    return tactic
+
+
+def generate_tactics(count, seed=0, article_ratio=DEFAULT_ARTICLE_RATIO, per_day=3, start=date(2026, 9, 30)):
+    """count 件の戦術レコードを日付降順で作る（同じ引数なら同じ内容）"""
+    from scripts.analyst import get_visual_theme
+
+    rng = random.Random(seed)
+    tactics = []
+    for position in range(count):
+        day = start - timedelta(days=position // per_day)
+        tactic = generate_tactic(rng, position % per_day + 1, day, article_ratio)
+        tactic["visual_theme"] = get_visual_theme(tactic, position)
+        tactics.append(tactic)
+    return tactics
+
+
+def generate_new_tactics(count, seed=1, start=date(2026, 10, 1)):
+    """マージの入力にする新規レコード（既存の corpus より新しい日付）"""
+    return generate_tactics(count, seed=seed, per_day=count, start=start)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="ベンチマーク用の合成戦術データを書き出す")
+    parser.add_argument("--count", type=int, default=CORPUS_SIZES[0], help="レコード数")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--article-ratio", type=float, default=DEFAULT_ARTICLE_RATIO, help="記事本文を付ける割合")
+    parser.add_argument("--out", required=True, help="出力先ディレクトリ（ai_tactics.json を作る）")
+    args = parser.parse_args()
+
+    os.makedirs(args.out, exist_ok=True)
+    path = os.path.join(args.out, "ai_tactics.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(generate_tactics(args.count, args.seed, args.article_ratio), f, ensure_ascii=False, indent=2)
+    print(f"✅ {args.count:,}件を書き出しました: {path}（{os.path.getsize(path) / 1024 / 1024:.1f}MB）")
@@ -0,0 +1,229 @@
+"""
+Streamlitページ共通のデータアクセス層
+AI戦術データをプロセス内で1回だけ読み込み、全ページで同じオブジェクトを共有する
+
+- st.cache_resource でキャッシュするため、再実行ごとのコピーは発生しない
+- データファイルの更新時刻・サイズをキーにしているので、
+  merge_tactics が書き込んだ直後の再実行で新しいデータに切り替わる
+- ページからの書き換えで共有データが壊れないよう、読み取り専用のビューを返す
+- カードのHTMLと記事本文の目次・アンカーはマージ時に生成済みのものを使う
+  （古い・欠けている分だけ読み込み時に生成）
+- 最初に読むのは直近の月（スナップショット + セグメント）だけで、アーカイブの月別パーティションは
+  期間の絞り込み・さらに古い記事の表示・IDでの取得で必要になった月だけを読み込む
+- SQLiteバックエンド（data/ai_tactics.db）がある場合は、プロセスごとに1本の読み取り専用接続から
+  直近の月・月ごとのレコードを引き、検索も FTS5 で行う
+"""
+import os
+import threading
+from collections import OrderedDict
+from types import MappingProxyType
+
+import streamlit as st
+
+import rendering
+from scripts import snapshot_codec, tactics_db, tactics_store
+from scripts.search_index import INDEX_PATH as SEARCH_INDEX_PATH, SearchIndex
+
+
+def _freeze(value):
+    """dict/list を読み取り専用（MappingProxyType/tuple）に変換"""
+    if isinstance(value, dict):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+def _file_version(paths):
+    """ファイルの更新時刻とサイズの組（内容が変わればキーも変わる）"""
+    version = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        version.append((path, stat.st_mtime_ns, stat.st_size))
+    return tuple(version)
+
+
+# 同時にメモリに置くアーカイブのパーティション数（使われていない月から捨てる）
+ARCHIVE_CACHE_PARTITIONS = 12
+
+
+class KnowledgeBase:
+    """読み取り専用の戦術データ（日付降順）とIDインデックス、カードのHTML
+
+    tactics は直近の月の分。manifest（tactics_store.load_manifest）を渡すと、
+    それより古い月はパーティションごとに必要になった時点で読み込む。
+    """
+
+    def __init__(self, tactics, card_fragments=None, article_renders=None, manifest=None,
+                 partition_loader=tactics_store.read_partition):
+        self.tactics = tuple(_freeze(tactic) for tactic in tactics)
+        self._by_id = {tactic.get("id"): tactic for tactic in self.tactics if tactic.get("id")}
+        fragments, _ = rendering.build_card_fragments(self.tactics, card_fragments)
+        self._card_html = {tactic_id: entry["html"] for tactic_id, entry in fragments.items()}
+        self._article_renders, _ = rendering.build_article_renders(self.tactics, article_renders)
+
+        # アーカイブ（新しい月から順）。パーティションも KnowledgeBase として読み込む
+        self.partitions = tuple((manifest or {}).get("partitions", ()))
+        self._months = {partition["month"] for partition in self.partitions}
+        self._partition_loader = partition_loader
+        self._archive = OrderedDict()
+        self._archive_lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.tactics)
+
+    @property
+    def total(self):
+        """アーカイブを含む全件数"""
+        return len(self.tactics) + sum(partition["count"] for partition in self.partitions)
+
+    @property
+    def oldest_date(self):
+        """アーカイブを含む最古の日付（YYYY-MM-DD。データがなければ None）"""
+        dates = [partition["oldest"] for partition in self.partitions if partition.get("oldest")]
+        dates += [tactic["date"] for tactic in self.tactics[-1:] if tactic.get("date")]
+        return min(dates, default=None)
+
+    def archive_partition(self, month):
+        """月別パーティションを読み込んで返す（アーカイブにない月は None）"""
+        if month not in self._months:
+            return None
+        with self._archive_lock:
+            partition = self._archive.get(month)
+            if partition is None:
+                partition = KnowledgeBase(self._partition_loader(month))
+                self._archive[month] = partition
+                while len(self._archive) > ARCHIVE_CACHE_PARTITIONS:
+                    self._archive.popitem(last=False)
+            else:
+                self._archive.move_to_end(month)
+            return partition
+
+    def tactics_since(self, start_date=None):
+        """start_date（date）以降を含むよう、直近の月に必要なパーティションを足して返す（日付降順）
+
+        start_date が None なら直近の月の分だけ。
+        """
+        tactics = list(self.tactics)
+        if start_date is None:
+            return tactics
+        for partition in self.partitions:
+            if (partition.get("newest") or "") >= start_date.isoformat():
+                tactics.extend(self.archive_partition(partition["month"]).tactics)
+        return tactics
+
+    def older_partition(self, start_date):
+        """start_date（date）より前で、次に読み込むパーティションの概要（なければ None）"""
+        for partition in self.partitions:
+            if partition.get("newest") and partition["newest"] < start_date.isoformat():
+                return partition
+        return None
+
+    def _owner(self, tactic_id):
+        """IDのレコードを持つ KnowledgeBase（IDの先頭の日付の月のパーティションを読む）"""
+        if tactic_id in self._by_id:
+            return self
+        month = f"{tactic_id[:4]}-{tactic_id[4:6]}" if tactic_id and tactic_id[:6].isdigit() else None
+        partition = self.archive_partition(month)
+        if partition is not None and tactic_id in partition._by_id:
+            return partition
+        return None
+
+    def get(self, tactic_id):
+        """IDで1件取得（アーカイブの月も読む。見つからなければ None）"""
+        owner = self._owner(tactic_id)
+        return owner._by_id[tactic_id] if owner else None
+
+    def get_many(self, tactic_ids):
+        """IDの並び順のまま取得（存在しないIDは無視）"""
+        return [tactic for tactic in map(self.get, tactic_ids) if tactic is not None]
+
+    def card_html(self, tactic):
+        """カードのHTML（生成済みのものを返すだけ）"""
+        owner = self._owner(tactic.get("id")) or self
+        html = owner._card_html.get(tactic.get("id"))
+        return html if html is not None else rendering.render_card_html(tactic)
+
+    def article_render(self, tactic):
+        """記事本文の目次・アンカー付き本文・読了時間（本文がなければ None）"""
+        owner = self._owner(tactic.get("id")) or self
+        return owner._article_renders.get(tactic.get("id"))
+
+
+@st.cache_resource(max_entries=1, show_spinner=False)
+def _load_knowledge_base(version):
+    return KnowledgeBase(tactics_store.load_tactics(include_archive=False), rendering.load_card_fragments(),
+                         rendering.load_article_renders(), manifest=tactics_store.load_manifest())
+
+
+@st.cache_resource(show_spinner=False)
+def _open_tactics_db(db_path):
+    # 接続は全セッション・全ページで共有する（書き込みは merge_tactics が別プロセスで行う）
+    return tactics_db.TacticsDB.open(db_path)
+
+
+@st.cache_resource(max_entries=1, show_spinner=False)
+def _load_db_knowledge_base(version):
+    db = _open_tactics_db(tactics_db.DB_PATH)
+    return KnowledgeBase(db.hot_tactics(), rendering.load_card_fragments(), rendering.load_article_renders(),
+                         manifest=db.manifest(), partition_loader=db.month_tactics)
+
+
+@st.cache_resource(max_entries=1, show_spinner=False)
+def _load_search_index(version):
+    return SearchIndex.load(SEARCH_INDEX_PATH)
+
+
+def get_knowledge_base():
+    """AI戦術データを取得（スナップショット + 未統合セグメント。古い月はアーカイブから必要な分だけ読む）"""
+    if tactics_db.is_enabled():
+        return _get_db_knowledge_base()
+    version = _file_version(
+        [tactics_store.SNAPSHOT_PATH, snapshot_codec.binary_path_for(tactics_store.SNAPSHOT_PATH),
+         tactics_store.manifest_path_for(tactics_store.SNAPSHOT_PATH)]
+        + tactics_store.list_segments()
+        + [rendering.CARD_FRAGMENTS_PATH, rendering.ARTICLE_RENDERS_PATH, rendering.IMAGE_MANIFEST_PATH]
+    )
+    try:
+        return _load_knowledge_base(version)
+    except Exception as e:
+        st.error(f"❌ データ読み込みエラー: {e}")
+        return KnowledgeBase([])
+
+
+def _get_db_knowledge_base():
+    """SQLiteバックエンドから直近の月を読み、古い月は月ごとのクエリで必要な分だけ読む"""
+    version = _file_version([tactics_db.DB_PATH, rendering.CARD_FRAGMENTS_PATH, rendering.ARTICLE_RENDERS_PATH,
+                             rendering.IMAGE_MANIFEST_PATH])
+    try:
+        return _load_db_knowledge_base(version)
+    except Exception as e:
+        st.error(f"❌ データベース読み込みエラー: {e}")
+        return KnowledgeBase([])
+
+
+def get_search_index():
+    """マージ時に構築された検索インデックスを取得（なければ None）
+
+    SQLiteバックエンドがある場合は、同じ search / all_tags を持つDB（FTS5）を返す
+    （DBが古い形式なら、更新されるまでJSONのインデックスを使う）。
+    """
+    if tactics_db.is_enabled():
+        try:
+            db = _open_tactics_db(tactics_db.DB_PATH)
+            if db.is_current():
+                return db
+        except Exception as e:
+            st.warning(f"⚠️ データベースを開けませんでした: {e}")
+            return None
+    version = _file_version([SEARCH_INDEX_PATH])
+    if not version:
+        return None
+    try:
+        return _load_search_index(version)
+    except Exception as e:
+        st.warning(f"⚠️ 検索インデックスを読み込めませんでした: {e}")
+        return None
@@ -5,13 +5,13 @@ import os
 # プロジェクトルートをパスに追加
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from styles import get_custom_css, render_sidebar
+from styles import inject_custom_css, render_sidebar
 
 # ページ設定（サイドバーを常に展開）
 st.set_page_config(page_title="AI早わかりガイド", layout="wide", initial_sidebar_state="expanded")
 
 # カスタムCSS適用
-st.markdown(get_custom_css(), unsafe_allow_html=True)
+inject_custom_css()
 
 # サイドバーナビゲーション
 render_sidebar()
@@ -6,7 +6,7 @@ import pandas as pd
 # プロジェクトルートをパスに追加
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from styles import get_custom_css, render_sidebar
+from styles import inject_custom_css, render_sidebar
 
 # ページ設定（サイドバーを常に展開）
 st.set_page_config(
@@ -16,7 +16,7 @@ st.set_page_config(
 )
 
 # カスタムCSS適用
-st.markdown(get_custom_css(), unsafe_allow_html=True)
+inject_custom_css()
 
 # サイドバーナビゲーション
 render_sidebar()
@@ -1,10 +1,9 @@
 import streamlit as st
-import json
-import os
-import base64
 from datetime import datetime, timedelta, timezone
 
-from styles import get_custom_css, render_sidebar
+from styles import get_logo_src, inject_custom_css, render_sidebar
+from knowledge_base import get_knowledge_base
+from rendering import render_header_image_html
 
 # ページ設定（サイドバーを常に展開）
 st.set_page_config(
@@ -14,39 +13,12 @@ st.set_page_config(
 )
 
 # カスタムCSS適用
-st.markdown(get_custom_css(), unsafe_allow_html=True)
+inject_custom_css()
 
 # サイドバーナビゲーション
 render_sidebar()
 
 
-@st.cache_data(ttl=300)
-def load_knowledge_base():
-    """AI戦術データをJSONファイルから読み込む"""
-    base_dir = os.path.dirname(os.path.dirname(__file__))
-    ai_tactics_path = os.path.join(base_dir, "data", "ai_tactics.json")
-    
-    try:
-        if os.path.exists(ai_tactics_path):
-            with open(ai_tactics_path, "r", encoding="utf-8") as f:
-                ai_tactics = json.load(f)
-                return ai_tactics
-        return []
-    except Exception as e:
-        st.error(f"❌ データ読み込みエラー: {e}")
-        return []
-
-
-def get_svg_as_base64(svg_path):
-    """SVGファイルをBase64エンコード"""
-    try:
-        with open(svg_path, "rb") as f:
-            data = f.read()
-        return base64.b64encode(data).decode()
-    except:
-        return None
-
-
 # 戻るボタン
 col_back, col_logo = st.columns([1, 5])
 with col_back:
@@ -54,65 +26,78 @@ with col_back:
         st.switch_page("app.py")
 
 # ロゴとヘッダー画像
-logo_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), "assets", "logo_b.svg")
-logo_b64 = get_svg_as_base64(logo_path)
+logo_src = get_logo_src()
 
-if logo_b64:
+if logo_src:
     st.markdown(
         f"""
         <div style="text-align: center; padding: 1rem 0;">
-            <img src="data:image/svg+xml;base64,{logo_b64}" width="200" alt="Logo">
+            <img src="{logo_src}" width="200" alt="Logo">
         </div>
         """,
         unsafe_allow_html=True
     )
 
-# 記事データ取得
-knowledge_base = load_knowledge_base()
-selected_article_id = st.session_state.get("selected_article_id")
+# 記事IDはURLのクエリパラメータ（?id=...）を優先し、なければトップページでの選択を使う
+selected_article_id = st.query_params.get("id") or st.session_state.get("selected_article_id")
 
 if not selected_article_id:
     st.warning("記事が選択されていません。")
     st.stop()
 
-# 記事を検索
-article = None
-for item in knowledge_base:
-    if item.get("id") == selected_article_id:
-        article = item
-        break
+# 共有・リロードできるようにURLにも記事IDを反映
+if st.query_params.get("id") != selected_article_id:
+    st.query_params["id"] = selected_article_id
+st.session_state.selected_article_id = selected_article_id
+
+# 記事を取得（共有データのIDインデックスから直接引く）
+knowledge_base = get_knowledge_base()
+article = knowledge_base.get(selected_article_id)
 
 if not article:
     st.error("記事が見つかりません。")
     st.stop()
 
-# ヘッダービジュアル（グラデーション + アイコン）
+# ヘッダービジュアル（画像があれば最適化済み画像、なければグラデーション + アイコン）
 visual_theme = article.get("visual_theme", {})
 gradient = visual_theme.get("gradient", "linear-gradient(135deg, #667eea 0%, #764ba2 100%)")
 icon = visual_theme.get("icon", "🤖")
 
-st.markdown(
-    f"""
-    <div style="
-        height: 300px;
-        background: {gradient};
-        display: flex;
-        align-items: center;
-        justify-content: center;
-        color: white;
-        font-size: 6rem;
-        border-radius: 12px;
-        margin-bottom: 2rem;
-        box-shadow: 0 4px 20px rgba(0,0,0,0.15);
-    ">
-        {icon}
-    </div>
-    """,
-    unsafe_allow_html=True
-)
+header_image_html = render_header_image_html(article, "300px")
+if header_image_html:
+    st.markdown(
+        f'<div style="margin-bottom: 2rem; box-shadow: 0 4px 20px rgba(0,0,0,0.15); border-radius: 12px;">{header_image_html}</div>',
+        unsafe_allow_html=True
+    )
+else:
+    st.markdown(
+        f"""
+        <div style="
+            height: 300px;
+            background: {gradient};
+            display: flex;
+            align-items: center;
+            justify-content: center;
+            color: white;
+            font-size: 6rem;
+            border-radius: 12px;
+            margin-bottom: 2rem;
+            box-shadow: 0 4px 20px rgba(0,0,0,0.15);
+        ">
+            {icon}
+        </div>
+        """,
+        unsafe_allow_html=True
+    )
+
+# 記事本文（目次・アンカー付き本文・読了時間はマージ時に生成済み）
+article_render = knowledge_base.article_render(article)
 
 # 記事メタ情報
-st.caption(f"📅 {article.get('date', '')} | 📰 AI Daily News")
+if article_render:
+    st.caption(f"📅 {article.get('date', '')} | ⏱️ 約{article_render['reading_minutes']}分で読めます | 📰 AI Daily News")
+else:
+    st.caption(f"📅 {article.get('date', '')} | 📰 AI Daily News")
 
 # タイトル
 st.markdown(f"# {article.get('title', '')}")
@@ -125,49 +110,15 @@ if news_highlight:
 st.markdown("---")
 
 # 記事本文
-article_content = article.get("article")
-if article_content:
-    # 目次を生成
-    lines = article_content.split('\n')
-    toc_items = []
-    heading_count = 0 
-    
-    for line in lines:
-        # ## 見出しを検出（##で始まる行）
-        if line.startswith('## '):
-            heading = line.replace('## ', '').strip()
-            # アンカー用のIDを生成
-            anchor = f"heading-{heading_count}"
-            toc_items.append((heading, anchor))
-            heading_count += 1
-
-    
+if article_render:
     # 目次を表示
-    if toc_items:
+    if article_render["toc"]:
         st.markdown("### 📑 目次")
-        toc_md = ""
-        for heading, anchor in toc_items:
-            toc_md += f"- [{heading}](#{anchor})\n"
-        st.markdown(toc_md)
+        st.markdown(article_render["toc"])
         st.markdown("---")
     
-    # 本文を表示（見出しにアンカーIDを追加）
-    modified_lines = []
-    idx = 0
-    for line in lines:
-        if line.startswith('## '):
-            heading = line.replace('## ', '').strip()
-            anchor = f"heading-{idx}"
-            # Markdownの見出しにHTMLアンカーを追加（ヘッダー被り対策のオフセット付き）
-            modified_lines.append(f'<div id="{anchor}" style="position: relative; top: -100px; visibility: hidden;"></div>')
-            modified_lines.append("") # Markdownとして認識させるための空行
-            modified_lines.append(line)
-            idx += 1
-        else:
-            modified_lines.append(line)
-    
-    modified_content = '\n'.join(modified_lines)
-    st.markdown(modified_content, unsafe_allow_html=True)
+    # 本文を表示（見出しにアンカーIDを追加済み）
+    st.markdown(article_render["body"], unsafe_allow_html=True)
 else:
     st.warning("記事コンテンツがありません。")
 
@@ -0,0 +1,263 @@
+"""
+カード一覧の描画ヘルパー
+HTML生成・ページ分割・期間での絞り込みをStreamlitに依存しない形でまとめる
+
+カードのHTMLは merge_tactics（と image_pipeline）の実行時に1回だけ生成し、
+data/card_fragments.json に保存する。ページはそれを連結するだけで、再実行ごとの文字列生成は行わない。
+記事本文（目次・アンカー付きMarkdown・読了時間）も同様に data/article_renders.json に保存する。
+"""
+import functools
+import hashlib
+import html
+import json
+import math
+import os
+
+from scripts.tactics_store import write_json_atomic
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# scripts/image_pipeline.py が作成する派生画像（Streamlitの静的ファイル配信で公開）
+IMAGE_MANIFEST_PATH = os.path.join(BASE_DIR, "static", "images", "manifest.json")
+STATIC_IMAGES_URL = "app/static/images/"
+
+# 事前生成したカードのHTML（戦術ID → {"fingerprint", "html"}）
+CARD_FRAGMENTS_PATH = os.path.join(BASE_DIR, "data", "card_fragments.json")
+
+# カードのテンプレートを変更したら上げる（保存済みのHTMLをすべて作り直す）
+CARD_TEMPLATE_VERSION = 1
+
+# 事前生成した記事本文（戦術ID → render_article() の結果）
+ARTICLE_RENDERS_PATH = os.path.join(BASE_DIR, "data", "article_renders.json")
+
+# 記事本文の変換処理を変更したら上げる
+ARTICLE_RENDER_VERSION = 1
+
+# 読了時間の目安（日本語の黙読: 1分あたりの文字数）
+READING_CHARS_PER_MINUTE = 500
+
+DEFAULT_GRADIENT = "linear-gradient(135deg, #667eea 0%, #764ba2 100%)"
+DEFAULT_ICON = "🤖"
+
+# 1ページあたりのカード数（3列グリッドなので3の倍数）
+PAGE_SIZE_OPTIONS = [12, 24, 48]
+
+
+@functools.lru_cache(maxsize=1)
+def _load_image_manifest(version):
+    try:
+        with open(IMAGE_MANIFEST_PATH, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return {entry["tactic_id"]: entry for entry in manifest.values() if entry.get("tactic_id")}
+
+
+def get_image_variants(tactic_id):
+    """戦術IDに対応する派生画像の情報（なければ None）"""
+    try:
+        version = os.path.getmtime(IMAGE_MANIFEST_PATH)
+    except OSError:
+        return None
+    return _load_image_manifest(version).get(tactic_id)
+
+
+def render_header_image_html(item, height, thumbnail=False, radius="12px", css_class=None):
+    """ヘッダー画像のHTML（画像がなければ None）
+
+    カード用はサムネイル、記事ページ用はAVIF/WebPの<picture>。どちらも遅延読み込み。
+    css_class を指定した場合はインラインのstyleの代わりにクラスを付ける。
+    """
+    variants = get_image_variants(item.get("id"))
+    if not variants:
+        return None
+    if css_class:
+        style_attr = f'class="{css_class}"'
+    else:
+        style_attr = f'style="width: 100%; height: {height}; object-fit: cover; display: block; border-radius: {radius};"'
+    if thumbnail:
+        width, image_height = variants.get("thumb_size", [400, 400])
+        return (f'<img src="{STATIC_IMAGES_URL}{variants["thumb"]}" width="{width}" height="{image_height}" '
+                f'loading="lazy" decoding="async" alt="" {style_attr}>')
+    avif = f'<source type="image/avif" srcset="{STATIC_IMAGES_URL}{variants["avif"]}">' if variants.get("avif") else ""
+    return (f'<picture>{avif}<img src="{STATIC_IMAGES_URL}{variants["full"]}" '
+            f'width="{variants["width"]}" height="{variants["height"]}" '
+            f'loading="lazy" decoding="async" alt="" {style_attr}></picture>')
+
+
+def _truncate(text, limit):
+    return text[:limit] + "..." if len(text) > limit else text
+
+
+def render_card_html(item):
+    """記事カードのHTMLを生成（見た目は styles.py の .tactic-card-* クラス）"""
+    # 画像があればサムネイル、なければグラデーション + アイコン
+    image_html = render_header_image_html(item, "200px", thumbnail=True, css_class="tactic-card-thumb")
+    if image_html is None:
+        visual_theme = item.get("visual_theme") or {}
+        gradient = visual_theme.get("gradient", DEFAULT_GRADIENT)
+        icon = visual_theme.get("icon", DEFAULT_ICON)
+        image_html = f'<div class="tactic-card-visual" style="background: {gradient};">{icon}</div>'
+
+    title = html.escape(_truncate(item.get("title", ""), 60), quote=False)
+    highlight = html.escape(_truncate(item.get("news_highlight", ""), 80), quote=False)
+
+    return (f'<div class="tactic-card">{image_html}<div class="tactic-card-body">'
+            f'<div class="tactic-card-date">{item.get("date", "")}</div>'
+            f'<h3 class="tactic-card-title">{title}</h3>'
+            f'<p class="tactic-card-highlight">{highlight}</p>'
+            f'</div></div>')
+
+
+def card_fingerprint(item):
+    """カードの見た目に影響する値のハッシュ（変わったときだけHTMLを作り直す）"""
+    variants = get_image_variants(item.get("id")) or {}
+    visual_theme = item.get("visual_theme") or {}
+    source = [CARD_TEMPLATE_VERSION, item.get("title", ""), item.get("news_highlight", ""), item.get("date", ""),
+              visual_theme.get("gradient"), visual_theme.get("icon"), variants.get("thumb"), variants.get("thumb_size")]
+    return hashlib.sha256(json.dumps(source, ensure_ascii=False).encode("utf-8")).hexdigest()[:16]
+
+
+def load_card_fragments(path=CARD_FRAGMENTS_PATH):
+    """保存済みのカードHTML（なければ空）"""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def build_card_fragments(tactics, previous=None):
+    """全戦術のカードHTMLを生成（内容が変わっていないカードは前回のHTMLを再利用）
+
+    戻り値: (戦術ID → {"fingerprint", "html"}, 作り直した件数)
+    """
+    previous = previous or {}
+    fragments = {}
+    rendered = 0
+    for tactic in tactics:
+        tactic_id = tactic.get("id")
+        if not tactic_id:
+            continue
+        fingerprint = card_fingerprint(tactic)
+        entry = previous.get(tactic_id)
+        if not entry or entry.get("fingerprint") != fingerprint:
+            entry = {"fingerprint": fingerprint, "html": render_card_html(tactic)}
+            rendered += 1
+        fragments[tactic_id] = entry
+    return fragments, rendered
+
+
+def build_and_save_card_fragments(tactics, path=CARD_FRAGMENTS_PATH, incremental=False):
+    """カードHTMLを生成して保存
+
+    incremental=True なら保存済みのHTMLにないIDのカードだけを追加する（既存のカードは見直さない）。
+    """
+    previous = load_card_fragments(path)
+    if incremental:
+        added, rendered = build_card_fragments([t for t in tactics if t.get("id") not in previous])
+        fragments = {**previous, **added}
+    else:
+        fragments, rendered = build_card_fragments(tactics, previous)
+    if fragments != previous or not os.path.exists(path):
+        write_json_atomic(path, fragments, separators=(",", ":"))
+    print(f"🃏 カードHTMLを更新: {len(fragments)}件（再生成 {rendered}件）")
+    return fragments
+
+
+def article_content_hash(text):
+    """記事本文のハッシュ（本文か変換処理が変わったときだけ作り直す）"""
+    return hashlib.sha256(f"{ARTICLE_RENDER_VERSION}\n{text}".encode("utf-8")).hexdigest()[:16]
+
+
+def render_article(text):
+    """記事本文（Markdown）から目次・アンカー付き本文・読了時間を作成
+
+    「## 」で始まる行を見出しとし、heading-<番号> のアンカーを直前に挿入する。
+    """
+    headings = []
+    body_lines = []
+    for line in text.split("\n"):
+        if line.startswith("## "):
+            heading = line.replace("## ", "").strip()
+            anchor = f"heading-{len(headings)}"
+            headings.append({"text": heading, "anchor": anchor})
+            # ヘッダー被り対策のオフセット付きアンカー（空行でMarkdownの見出しとして認識させる）
+            body_lines.extend([f'<div id="{anchor}" class="article-anchor"></div>', "", line])
+        else:
+            body_lines.append(line)
+
+    # 記号・空白を除いた文字数から読了時間を概算
+    chars = sum(1 for ch in text if not ch.isspace() and ch not in "#*-|>`[]()")
+    return {
+        "content_hash": article_content_hash(text),
+        "headings": headings,
+        "toc": "".join(f"- [{h['text']}](#{h['anchor']})\n" for h in headings),
+        "body": "\n".join(body_lines),
+        "reading_minutes": max(1, math.ceil(chars / READING_CHARS_PER_MINUTE)),
+    }
+
+
+def load_article_renders(path=ARTICLE_RENDERS_PATH):
+    """保存済みの記事本文（なければ空）"""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def build_article_renders(tactics, previous=None):
+    """記事本文のある戦術を変換（本文が変わっていない記事は前回の結果を再利用）
+
+    戻り値: (戦術ID → render_article() の結果, 作り直した件数)
+    """
+    previous = previous or {}
+    renders = {}
+    rendered = 0
+    for tactic in tactics:
+        tactic_id = tactic.get("id")
+        text = tactic.get("article")
+        if not tactic_id or not text:
+            continue
+        entry = previous.get(tactic_id)
+        if not entry or entry.get("content_hash") != article_content_hash(text):
+            entry = render_article(text)
+            rendered += 1
+        renders[tactic_id] = entry
+    return renders, rendered
+
+
+def build_and_save_article_renders(tactics, path=ARTICLE_RENDERS_PATH, incremental=False):
+    """記事本文を変換して保存
+
+    incremental=True なら保存済みの結果にないIDの記事だけを追加する（既存の記事は見直さない）。
+    """
+    previous = load_article_renders(path)
+    if incremental:
+        added, rendered = build_article_renders([t for t in tactics if t.get("id") not in previous])
+        renders = {**previous, **added}
+    else:
+        renders, rendered = build_article_renders(tactics, previous)
+    if renders != previous or not os.path.exists(path):
+        write_json_atomic(path, renders, separators=(",", ":"))
+    print(f"📄 記事本文を更新: {len(renders)}件（再生成 {rendered}件）")
+    return renders
+
+
+def filter_by_date(items, start_date=None, end_date=None):
+    """日付文字列（YYYY-MM-DD）が期間内のものだけ返す"""
+    start = start_date.isoformat() if start_date else ""
+    end = end_date.isoformat() if end_date else "9999-12-31"
+    return [item for item in items if start <= item.get("date", "") <= end]
+
+
+def paginate(items, page, page_size):
+    """ページ番号（1始まり）に対応する範囲を返す
+
+    戻り値: (ページ内のアイテム, 総ページ数, 補正後のページ番号)
+    """
+    total_pages = max(1, math.ceil(len(items) / page_size))
+    page = min(max(1, page), total_pages)
+    start = (page - 1) * page_size
+    return items[start:start + page_size], total_pages, page
@@ -6,12 +6,18 @@ import json
 import os
 import sys
 from datetime import datetime, timedelta, timezone
-import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor
 # グラデーション設定はJSON内に保存し、フロントエンドで適用
 
 # プロジェクトルートをパスに追加
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from scripts.rate_limit import get_limiter
+from scripts.dedup_index import DedupIndex, normalize_url
+from scripts.visual_theme import get_visual_theme
+from scripts import article_batch, article_stream, json_stream, llm_cache, resilience, telemetry
+
 # Gemini APIライブラリのインポート
 try:
     from google import genai
@@ -37,19 +43,8 @@ except ImportError:
     ANTHROPIC_AVAILABLE = False
 
 
-def analyze_news_to_tactic(client, news_item, max_retries=3):
-    """ニュースを実務で使える戦術に変換"""
-    
-    news_title = news_item.get('title', 'N/A')[:100]
-    news_summary = news_item.get('summary', 'N/A')[:200]
-    news_url = news_item.get('url', '')
-    
-    prompt_text = f"""あなたはAI技術コンサルタントです。以下のニュースを、エンジニアが実務で使える戦術に変換してください。
-
-ニュース: {news_title}
-要約: {news_summary}
-
-【重要な制約】
+# 戦術生成の指示（1件ずつ・複数件まとめてのプロンプトで共通）
+TACTIC_RULES = """【重要な制約】
 - 「トレンド調査」「情報収集」「チェックリスト作成」のような抽象的な戦術は禁止
 - 具体的な「コード生成」「レビュー」「デバッグ」「設計」などの実作業に焦点を当てる
 - titleには必ずニュースで紹介されているAIモデル名/AIサービス名/AIツール名を含めること
@@ -62,8 +57,8 @@ def analyze_news_to_tactic(client, news_item, max_retries=3):
 ✅ 良い例: 「Claude 4がベンチマークでGPT-4oを上回り、API価格は30%値下げ」
 
 【プロンプトの書き方 - 超重要】
-promptフィールドは{{変数}}を使わず、そのままコピペで使える完成形にすること！
-❌ ダメな例: 「{{言語}}と{{フレームワーク}}を使って...」
+promptフィールドは{変数}を使わず、そのままコピペで使える完成形にすること！
+❌ ダメな例: 「{言語}と{フレームワーク}を使って...」
 ✅ 良い例: 「TypeScriptとReactを使って、ログイン画面を作成してください。メールアドレス入力、パスワード入力、ログインボタンを含めてください。」
 
 【use_casesの書き方】
@@ -74,152 +69,253 @@ promptフィールドは{{変数}}を使わず、そのままコピペで使え
 【stepsの書き方】
 今すぐ実行できる具体的な手順を書く
 ❌ ダメな例: 「1. コードを準備 2. AIに依頼」
-✅ 良い例: 「1. エラーが出ているファイルを開く 2. エラーメッセージをコピー 3. AIに貼り付けて修正案を依頼 4. 提案されたコードをテスト」
+✅ 良い例: 「1. エラーが出ているファイルを開く 2. エラーメッセージをコピー 3. AIに貼り付けて修正案を依頼 4. 提案されたコードをテスト」"""
+
+TACTIC_JSON_FORMAT = '''{"title": "AI名で○○する（30文字以内）", "news_highlight": "ニュースの重要ポイント（具体的な数値含む、60文字以内）", "problem_context": "解決する課題（40文字以内）", "recommended_ai": {"model": "推奨AIモデル名", "reason": "推奨理由（30文字以内）", "badge_color": "orange"}, "use_cases": ["具体的なシーン1", "具体的なシーン2", "具体的なシーン3"], "steps": ["具体的な手順1", "具体的な手順2", "具体的な手順3", "具体的な手順4"], "prompt": "そのまま使える完成したプロンプト（変数なし、150文字以内）", "tags": ["タグ1", "タグ2"]}'''
+
+# 戦術データの必須フィールド（欠けていれば不正な応答として扱う）
+REQUIRED_TACTIC_FIELDS = ("title", "news_highlight", "problem_context", "recommended_ai",
+                          "use_cases", "steps", "prompt", "tags")
+
+# 1回のGemini呼び出しにまとめるニュースの最大件数（応答が長くなりすぎないように）
+TACTIC_BATCH_SIZE = 10
+
+GEMINI_MODEL = 'gemini-2.5-flash'
+
+# Geminiの構造化出力（response_schema）に渡す戦術データのスキーマ
+_STRING = {"type": "STRING"}
+_STRING_LIST = {"type": "ARRAY", "items": _STRING}
+TACTIC_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {
+        "title": _STRING,
+        "news_highlight": _STRING,
+        "problem_context": _STRING,
+        "recommended_ai": {
+            "type": "OBJECT",
+            "properties": {"model": _STRING, "reason": _STRING, "badge_color": _STRING},
+            "required": ["model", "reason", "badge_color"],
+        },
+        "use_cases": _STRING_LIST,
+        "steps": _STRING_LIST,
+        "prompt": _STRING,
+        "tags": _STRING_LIST,
+    },
+    "required": list(REQUIRED_TACTIC_FIELDS),
+    "property_ordering": list(REQUIRED_TACTIC_FIELDS),
+}
+MULTI_TACTIC_SCHEMA = {
+    "type": "ARRAY",
+    "items": {
+        **TACTIC_SCHEMA,
+        "properties": {"news_index": {"type": "INTEGER"}, **TACTIC_SCHEMA["properties"]},
+        "required": ["news_index", *REQUIRED_TACTIC_FIELDS],
+        "property_ordering": ["news_index", *REQUIRED_TACTIC_FIELDS],
+    },
+}
+
+
+def tactic_generation_config(schema):
+    """戦術生成の設定（JSONのみを返す構造化出力）"""
+    return {
+        "temperature": 0.3,  # さらに低くして確実性を上げる
+        "response_mime_type": "application/json",
+        "response_schema": schema,
+    }
+
+
+def build_tactic_prompt(news_item):
+    """1件のニュースから戦術を生成するプロンプト"""
+    news_title = news_item.get('title', 'N/A')[:100]
+    news_summary = news_item.get('summary', 'N/A')[:200]
+    
+    return f"""あなたはAI技術コンサルタントです。以下のニュースを、エンジニアが実務で使える戦術に変換してください。
+
+ニュース: {news_title}
+要約: {news_summary}
+
+{TACTIC_RULES}
 
 以下のJSON形式で出力してください。文字列内に改行を入れないでください：
 
-{{"title": "AI名で○○する（30文字以内）", "news_highlight": "ニュースの重要ポイント（具体的な数値含む、60文字以内）", "problem_context": "解決する課題（40文字以内）", "recommended_ai": {{"model": "推奨AIモデル名", "reason": "推奨理由（30文字以内）", "badge_color": "orange"}}, "use_cases": ["具体的なシーン1", "具体的なシーン2", "具体的なシーン3"], "steps": ["具体的な手順1", "具体的な手順2", "具体的な手順3", "具体的な手順4"], "prompt": "そのまま使える完成したプロンプト（変数なし、150文字以内）", "tags": ["タグ1", "タグ2"]}}
+{TACTIC_JSON_FORMAT}
 
 JSONのみ出力してください。"""
 
-    for attempt in range(max_retries):
-        try:
-            response = client.models.generate_content(
-                model='gemini-2.5-flash',
+
+def build_multi_tactic_prompt(news_items):
+    """複数のニュースから戦術をまとめて生成するプロンプト（指示は1回だけ送る）"""
+    news_lines = "\n\n".join(
+        f"[{index}]\nニュース: {news.get('title', 'N/A')[:100]}\n要約: {news.get('summary', 'N/A')[:200]}"
+        for index, news in enumerate(news_items, 1)
+    )
+    item_format = TACTIC_JSON_FORMAT.replace('{"title"', '{"news_index": ニュース番号, "title"', 1)
+    
+    return f"""あなたはAI技術コンサルタントです。以下の{len(news_items)}件のニュースを、それぞれエンジニアが実務で使える戦術に変換してください。
+
+{news_lines}
+
+{TACTIC_RULES}
+
+ニュース1件につき1つ、以下の形式のオブジェクトを作り、news_index にニュース番号（[1]なら1）を入れてください。
+全件をJSON配列で出力してください。文字列内に改行を入れないでください：
+
+[{item_format}, ...]
+
+JSON配列のみ出力してください。"""
+
+
+def call_gemini_json(client, prompt_text, generation_config, opener="{", check_member=None, validate=None,
+                     operation="tactic"):
+    """Geminiの応答をストリーミングで受け取りながらJSONとして読み、(値, 応答テキスト) を返す
+    
+    check_member(キー or 番号, 値) が問題を返したら受信を打ち切って json_stream.MalformedJSON を送出する。
+    validate(値) が偽の応答はLLMキャッシュに保存しない（キャッシュ済みでも使わない）。
+    operation は計測（scripts/telemetry.py）での呼び出しの種類。
+    """
+    def attempt(timeout):
+        with get_limiter("gemini"):
+            chunks = client.models.generate_content_stream(
+                model=GEMINI_MODEL,
                 contents=[prompt_text],
                 config=types.GenerateContentConfig(
-                    temperature=0.3  # さらに低くして確実性を上げる
+                    **generation_config, http_options=types.HttpOptions(timeout=int(timeout * 1000))
                 )
             )
+            parser = json_stream.read_stream(telemetry.gemini_text_chunks(chunks), opener, check_member)
+        return parser.text
+    
+    def call_gemini():
+        return resilience.call("gemini", attempt)
+    
+    def is_valid(text):
+        parser = json_stream.IncrementalJSONParser(opener)
+        parser.feed(text)
+        return parser.done and (validate is None or validate(parser.value()))
+    
+    with telemetry.track_call("gemini", GEMINI_MODEL, operation):
+        response_text = llm_cache.get_cache().cached_call(
+            GEMINI_MODEL, prompt_text, generation_config, call_gemini, validate=is_valid
+        )
+    return json_stream.parse_json(response_text, opener), response_text
+
+
+def validate_tactic(tactic_data):
+    """戦術データの必須フィールドを確認し、欠けているフィールド名のリストを返す"""
+    if not isinstance(tactic_data, dict):
+        return list(REQUIRED_TACTIC_FIELDS)
+    missing = [field for field in REQUIRED_TACTIC_FIELDS if not tactic_data.get(field)]
+    recommended_ai = tactic_data.get("recommended_ai")
+    if recommended_ai and not (isinstance(recommended_ai, dict) and recommended_ai.get("model")):
+        missing.append("recommended_ai.model")
+    return missing
+
+
+def check_tactic_member(key, value):
+    """受信途中の戦術データのフィールドを検証し、問題があれば説明を返す"""
+    if key in REQUIRED_TACTIC_FIELDS and not value:
+        return f"{key} が空です"
+    if key == "recommended_ai" and not (isinstance(value, dict) and value.get("model")):
+        return "recommended_ai.model がありません"
+    return None
+
+
+def analyze_news_to_tactic(client, news_item, max_retries=3):
+    """ニュースを実務で使える戦術に変換
+    
+    壊れた・必須フィールドが欠けた応答は保存せず、すぐに生成し直す。
+    max_retries 回とも不正な応答なら None（仮の戦術データで埋めない）。
+    APIエラーの再試行は resilience.call が行うので、ここまで届いたエラーでは生成し直さない。
+    """
+    
+    prompt_text = build_tactic_prompt(news_item)
+    generation_config = tactic_generation_config(TACTIC_SCHEMA)
+
+    for attempt in range(max_retries):
+        try:
+            tactic_data, _ = call_gemini_json(
+                client, prompt_text, generation_config,
+                check_member=check_tactic_member,
+                validate=lambda value: not validate_tactic(value),
+            )
+            missing = validate_tactic(tactic_data)
+            if not missing:
+                return tactic_data
+            # 途中で切れた応答など（書き終わったフィールドだけでは足りない）
+            print(f"  ⚠️ 不正な応答 (試行 {attempt + 1}/{max_retries}): 欠けているフィールド {', '.join(missing)}")
             
-            response_text = response.text.strip()
-            
-            # JSONマークダウンコードブロックを除去
-            if "```json" in response_text:
-                response_text = response_text.split("```json")[1].split("```")[0].strip()
-            elif "```" in response_text:
-                parts = response_text.split("```")
-                if len(parts) >= 2:
-                    response_text = parts[1].strip()
-            
-            # JSONの開始位置を見つける
-            json_start = response_text.find('{')
-            json_end = response_text.rfind('}') + 1
-            if json_start != -1 and json_end > json_start:
-                response_text = response_text[json_start:json_end]
-            
-            # 改行を除去
-            response_text = response_text.replace('\n', ' ').replace('\r', '').replace('\t', ' ')
-            
-            # 途中で切れた文字列を修復
-            def fix_truncated_json(text):
-                """途中で切れたJSONを修復"""
-                # 開いている引用符を閉じる
-                in_string = False
-                escaped = False
-                fixed = []
-                for i, char in enumerate(text):
-                    if escaped:
-                        escaped = False
-                        fixed.append(char)
-                        continue
-                    if char == '\\':
-                        escaped = True
-                        fixed.append(char)
-                        continue
-                    if char == '"':
-                        in_string = not in_string
-                    fixed.append(char)
-                
-                result = ''.join(fixed)
-                if in_string:
-                    result += '"'  # 閉じ引用符を追加
-                
-                # 括弧を補完
-                open_braces = result.count('{') - result.count('}')
-                open_brackets = result.count('[') - result.count(']')
-                result += ']' * open_brackets + '}' * open_braces
-                
-                return result
-            
-            # まず直接パースを試みる
-            try:
-                tactic_data = json.loads(response_text)
-            except json.JSONDecodeError:
-                # 修復を試みる
-                fixed_text = fix_truncated_json(response_text)
-                try:
-                    tactic_data = json.loads(fixed_text)
-                except json.JSONDecodeError:
-                    # 最後の手段：必須フィールドだけの最小JSONを構築
-                    # titleとpromptを抽出
-                    title_match = response_text.split('"title"')[1].split('"')[1] if '"title"' in response_text else "AI戦術"
-                    tactic_data = {
-                        "title": title_match[:50],
-                        "problem_context": "AI技術の活用",
-                        "recommended_ai": {"model": "Gemini", "reason": "高性能", "badge_color": "orange"},
-                        "prompt": "最新のAI技術を活用して効率化を図ってください。",
-                        "tags": ["AI", "自動生成"]
-                    }
-            
-            return tactic_data
+        except json_stream.MalformedJSON as e:
+            print(f"  ⚠️ 不正な応答 (試行 {attempt + 1}/{max_retries}): {e}")
             
         except Exception as e:
-            wait_time = 5 + (5 * attempt)
-            print(f"  ⚠️ APIエラー (試行 {attempt + 1}/{max_retries}): {str(e)[:80]}")
-            if attempt < max_retries - 1:
-                print(f"     {wait_time}秒後にリトライします...")
-                time.sleep(wait_time)
+            print(f"  ⚠️ APIエラー: {str(e)[:80]}")
+            return None
     
     return None
 
 
-# グラデーションとアイコンの設定マッピング
-GRADIENT_THEMES = [
-    {"gradient": "linear-gradient(135deg, #667eea 0%, #764ba2 100%)", "icon": "🤖"},  # Purple AI
-    {"gradient": "linear-gradient(135deg, #f093fb 0%, #f5576c 100%)", "icon": "🧠"},  # Pink Brain
-    {"gradient": "linear-gradient(135deg, #4facfe 0%, #00f2fe 100%)", "icon": "💡"},  # Blue Cyan
-    {"gradient": "linear-gradient(135deg, #43e97b 0%, #38f9d7 100%)", "icon": "⚡"},  # Green Teal
-    {"gradient": "linear-gradient(135deg, #fa709a 0%, #fee140 100%)", "icon": "🔥"},  # Pink Yellow
-    {"gradient": "linear-gradient(135deg, #a8edea 0%, #fed6e3 100%)", "icon": "✨"},  # Soft Pastel
-    {"gradient": "linear-gradient(135deg, #5ee7df 0%, #b490ca 100%)", "icon": "🚀"},  # Teal Purple
-    {"gradient": "linear-gradient(135deg, #d299c2 0%, #fef9d7 100%)", "icon": "💎"},  # Rose Cream
-    {"gradient": "linear-gradient(135deg, #89f7fe 0%, #66a6ff 100%)", "icon": "🌐"},  # Sky Blue
-    {"gradient": "linear-gradient(135deg, #ffecd2 0%, #fcb69f 100%)", "icon": "🎯"},  # Peach
-]
-
-def get_visual_theme(news_item, index):
-    """ニュースからビジュアルテーマ（グラデーション・アイコン）を決定"""
-    tags = news_item.get('tags', [])
-    title = news_item.get('title', '').lower()
-    
-    # タグ・タイトルに基づいてテーマを選択
-    if any(kw in title for kw in ['gpt', 'openai', 'chatgpt']):
-        return {"gradient": "linear-gradient(135deg, #10a37f 0%, #1a7f5a 100%)", "icon": "🤖"}
-    elif any(kw in title for kw in ['gemini', 'google', 'bard']):
-        return {"gradient": "linear-gradient(135deg, #4285f4 0%, #34a853 100%)", "icon": "✨"}
-    elif any(kw in title for kw in ['claude', 'anthropic']):
-        return {"gradient": "linear-gradient(135deg, #d4a27f 0%, #cc785c 100%)", "icon": "🧠"}
-    elif any(kw in title for kw in ['llama', 'meta']):
-        return {"gradient": "linear-gradient(135deg, #0668E1 0%, #1877f2 100%)", "icon": "🦙"}
-    elif any(kw in title for kw in ['code', 'coding', 'developer', 'プログラミング']):
-        return {"gradient": "linear-gradient(135deg, #6366f1 0%, #8b5cf6 100%)", "icon": "💻"}
-    elif any(kw in title for kw in ['image', '画像', 'vision', 'イメージ']):
-        return {"gradient": "linear-gradient(135deg, #ec4899 0%, #f43f5e 100%)", "icon": "🎨"}
-    elif any(kw in title for kw in ['agent', 'エージェント', 'workflow']):
-        return {"gradient": "linear-gradient(135deg, #f59e0b 0%, #ef4444 100%)", "icon": "🚀"}
-    else:
-        # デフォルト: インデックスに基づいてローテーション
-        return GRADIENT_THEMES[index % len(GRADIENT_THEMES)]
+def parse_multi_tactic_response(items, count):
+    """複数件の応答（JSON配列）を ニュース番号（1始まり）→ 戦術データ に変換
+    
+    必須フィールドが欠けた要素・番号が範囲外や重複の要素は含めない。
+    途中で切れた応答は、書き終わった要素だけを使う。
+    """
+    if isinstance(items, str):
+        items = json_stream.parse_json(items, "[")
+    if isinstance(items, dict):
+        items = [items]
+    
+    tactics = {}
+    for item in items or []:
+        if not isinstance(item, dict):
+            continue
+        item = dict(item)
+        try:
+            index = int(item.pop("news_index", None))
+        except (TypeError, ValueError):
+            continue
+        if 1 <= index <= count and index not in tactics and not validate_tactic(item):
+            tactics[index] = item
+    return tactics
 
 
-def generate_deep_article(claude_client, news_item, max_retries=3):
-    """ニュースから深掘り記事を生成（Claude claude-sonnet-4-5-20250929使用）"""
+def analyze_news_batch(client, news_items, batch_size=TACTIC_BATCH_SIZE):
+    """複数のニュースを1回のGemini呼び出しでまとめて戦術に変換
     
-    if claude_client is None:
-        print("   ⚠️ Claude APIが利用不可のため記事生成をスキップ")
-        return None
+    戻り値: ニュース番号（1始まり）→ 戦術データ。
+    不正・欠落した番号は含まないので、呼び出し側で1件ずつ生成し直す。
+    """
+    tactics = {}
+    for offset in range(0, len(news_items), batch_size):
+        chunk = news_items[offset:offset + batch_size]
+        try:
+            items, _ = call_gemini_json(client, build_multi_tactic_prompt(chunk),
+                                        tactic_generation_config(MULTI_TACTIC_SCHEMA), opener="[",
+                                        operation="tactic_batch")
+            parsed = parse_multi_tactic_response(items, len(chunk))
+        except Exception as e:
+            print(f"  ⚠️ まとめての戦術生成に失敗: {str(e)[:80]}")
+            parsed = {}
+        for index, tactic_data in parsed.items():
+            tactics[offset + index] = tactic_data
+        print(f"📦 {len(chunk)}件のニュースを1回のリクエストで変換: {len(parsed)}件成功")
     
+    retry_count = len(news_items) - len(tactics)
+    if retry_count:
+        print(f"↪️ {retry_count}件は1件ずつ生成し直します")
+    return tactics
+
+
+# 記事生成に使うモデルと出力上限
+ARTICLE_MODEL = 'claude-sonnet-4-5-20250929'
+ARTICLE_MAX_TOKENS = 8192
+
+# 記事生成の方式（sync: 一括応答 / stream: ストリーミング / batch: 全件を1つのバッチで生成）
+ARTICLE_MODES = ("sync", "stream", "batch")
+
+
+def build_article_prompt(news_item):
+    """深掘り記事生成のプロンプト"""
     news_title = news_item.get('title', 'N/A')
     news_summary = news_item.get('summary', 'N/A')
     news_url = news_item.get('url', '')
@@ -268,53 +364,188 @@ URL: {news_url}
 - Markdown形式
 
 Markdown記事のみ返してください。JSONや説明文は不要です。"""
+    return prompt_text
 
-    for attempt in range(max_retries):
-        try:
+
+def clean_article_text(article_text):
+    """Claudeの応答から記事本文を取り出す（コードブロック・重複するタイトル見出しを除去）"""
+    article_text = article_text.strip()
+    
+    # マークダウンコードブロックを除去（もしあれば）
+    if article_text.startswith("```markdown"):
+        article_text = article_text[11:].strip()
+    elif article_text.startswith("```"):
+        article_text = article_text[3:].strip()
+    if article_text.endswith("```"):
+        article_text = article_text[:-3].strip()
+    
+    # 最初の見出し（# で始まる行）を削除（重複を防ぐ）
+    lines = article_text.split('\n')
+    if lines and lines[0].startswith('# '):
+        lines = lines[1:]  # 最初の見出しを削除
+        article_text = '\n'.join(lines).strip()
+    
+    return article_text
+
+
+def generate_deep_article(claude_client, news_item, mode="sync", label=""):
+    """ニュースから深掘り記事を生成（Claude claude-sonnet-4-5-20250929使用）
+    
+    mode="stream" の場合はストリーミングで受信し、途中経過の保存・まとめでの打ち切り・
+    TTFT/tokens/sec の記録を行う（scripts/article_stream.py）。
+    エラー時の再試行・タイムアウトは resilience.call（プロバイダ "claude"）の設定に従う。
+    """
+    
+    if claude_client is None:
+        print("   ⚠️ Claude APIが利用不可のため記事生成をスキップ")
+        return None
+    
+    prompt_text = build_article_prompt(news_item)
+    config = {"max_tokens": ARTICLE_MAX_TOKENS}
+    partial_path = article_stream.partial_path_for(ARTICLE_MODEL, prompt_text, config)
+
+    def attempt(timeout):
+        with get_limiter("claude"):
+            if mode == "stream":
+                # 切断された場合は次の試行で保存済みの途中経過から再開する
+                text, metrics = article_stream.stream_article(
+                    claude_client, ARTICLE_MODEL, prompt_text, ARTICLE_MAX_TOKENS, partial_path, timeout=timeout
+                )
+                article_stream.get_metrics().record(label, metrics)
+                telemetry.add_usage(metrics["input_tokens"], metrics["output_tokens"],
+                                    estimated=metrics["tokens_estimated"])
+                return text
             response = claude_client.messages.create(
-                model='claude-sonnet-4-5-20250929',
-                max_tokens=8192,
+                model=ARTICLE_MODEL,
+                max_tokens=ARTICLE_MAX_TOKENS,
                 messages=[
                     {"role": "user", "content": prompt_text}
-                ]
+                ],
+                timeout=timeout
             )
-            
-            article_text = response.content[0].text.strip()
-            
-            # マークダウンコードブロックを除去（もしあれば）
-            if article_text.startswith("```markdown"):
-                article_text = article_text[11:].strip()
-            elif article_text.startswith("```"):
-                article_text = article_text[3:].strip()
-            if article_text.endswith("```"):
-                article_text = article_text[:-3].strip()
-            
-            # 最初の見出し（# で始まる行）を削除（重複を防ぐ）
-            lines = article_text.split('\n')
-            if lines and lines[0].startswith('# '):
-                lines = lines[1:]  # 最初の見出しを削除
-                article_text = '\n'.join(lines).strip()
-            
-            return article_text
-            
-        except Exception as e:
-            wait_time = 5 + (5 * attempt)
-            print(f"  ⚠️ Claude記事生成エラー (試行 {attempt + 1}/{max_retries}): {str(e)[:80]}")
-            if attempt < max_retries - 1:
-                print(f"     {wait_time}秒後にリトライします...")
-                time.sleep(wait_time)
+            telemetry.add_usage(response.usage.input_tokens, response.usage.output_tokens)
+            return response.content[0].text
     
-    return None
+    try:
+        with telemetry.track_call("claude", ARTICLE_MODEL, "article_stream" if mode == "stream" else "article"):
+            article_text = llm_cache.get_cache().cached_call(
+                ARTICLE_MODEL, prompt_text, config, lambda: resilience.call("claude", attempt)
+            )
+        article_stream.discard_partial(partial_path)
+        return clean_article_text(article_text)
+        
+    except Exception as e:
+        print(f"  ⚠️ Claude記事生成エラー: {str(e)[:80]}")
+        return None
 
     
-def analyze_and_generate_tactics():
-    """ニュースを戦術に変換するメイン処理"""
+def generate_articles_in_batch(claude_client, items, timeout=article_batch.BATCH_TIMEOUT,
+                               poll_interval=article_batch.POLL_INTERVAL):
+    """複数の戦術の記事をまとめて1つのバッチで生成し、各戦術の "article" に設定する
+    
+    items: (戦術データ, ニュース) のリスト。キャッシュ済みの記事はバッチに含めない。
+    バッチAPIが使えない場合や、バッチ内で失敗した記事は1件ずつ同期で生成する。
+    """
+    if claude_client is None:
+        print("⚠️ Claude APIが利用不可のため記事生成をスキップ")
+        return
+    
+    cache = llm_cache.get_cache()
+    config = {"max_tokens": ARTICLE_MAX_TOKENS}
+    pending = {}
+    for tactic, news in items:
+        prompt_text = build_article_prompt(news)
+        cached = cache.get(ARTICLE_MODEL, prompt_text, config)
+        if cached is not None:
+            tactic["article"] = clean_article_text(cached)
+        else:
+            pending[tactic["id"]] = (tactic, news, prompt_text)
+    
+    if not pending:
+        return
+    print(f"\n📦 記事{len(pending)}件をバッチで生成します...")
+    texts = article_batch.generate_batch(
+        claude_client, {tactic_id: prompt for tactic_id, (_, _, prompt) in pending.items()},
+        ARTICLE_MODEL, ARTICLE_MAX_TOKENS, poll_interval=poll_interval, timeout=timeout
+    )
+    if texts is None:
+        print("   ↪️ バッチAPIが使えないため1件ずつ生成します")
+        texts = {}
+    
+    for tactic_id, (tactic, news, prompt_text) in pending.items():
+        if tactic_id in texts:
+            cache.set(ARTICLE_MODEL, prompt_text, config, texts[tactic_id])
+            tactic["article"] = clean_article_text(texts[tactic_id])
+            continue
+        print(f"   📝 {tactic_id} を同期生成...")
+        tactic["article"] = generate_deep_article(claude_client, news)
+    
+    generated = sum(1 for tactic, _ in items if tactic.get("article"))
+    print(f"📝 記事生成: {generated}/{len(items)}件")
+
+
+def build_tactic(gemini_client, claude_client, news, idx, total, run_id, run_date, article_mode="sync",
+                 tactic_data=None):
+    """1件のニュースから戦術データ（記事・テーマ付き）を生成
+    
+    tactic_data を渡した場合（まとめて生成済み）はGeminiを呼ばずにそれを使う。
+    """
+    label = f"[{idx}/{total}]"
+    print(f"🔄 {label} {news.get('title', 'N/A')[:40]}...")
+    
+    # 戦術データを生成（Gemini使用）
+    if tactic_data is None:
+        with telemetry.stage("tactic_generation"):
+            tactic_data = analyze_news_to_tactic(gemini_client, news)
+    
+    if not tactic_data:
+        print(f"   ❌ {label} スキップ")
+        return None
+    
+    # 実行開始時刻ベースのユニークID（同日複数回実行でも重複しない）
+    tactic_data["id"] = f"{run_id}_{idx:02d}"
+    tactic_data["date"] = run_date
+    
+    # ソース情報を追加
+    tactic_data["source_news"] = {
+        "title": news.get("title", ""),
+        "url": news.get("url", "")
+    }
+    
+    # 深掘り記事を生成（Claude使用・バッチの場合は全件の戦術生成後にまとめて生成）
+    if article_mode == "batch":
+        tactic_data["article"] = None
+        print(f"   ✅ {label} → {tactic_data.get('title', 'N/A')[:50]} (記事はバッチで生成)")
+    else:
+        print(f"   📝 {label} Claude記事生成中...")
+        with telemetry.stage("article_generation"):
+            article_content = generate_deep_article(claude_client, news, mode=article_mode, label=label)
+        tactic_data["article"] = article_content
+        if article_content:
+            print(f"   ✅ {label} → {tactic_data.get('title', 'N/A')[:50]} (+記事)")
+        else:
+            print(f"   ✅ {label} → {tactic_data.get('title', 'N/A')[:50]} (記事生成失敗)")
+    
+    # ビジュアルテーマを設定（グラデーション + アイコン）
+    visual_theme = get_visual_theme(tactic_data, idx)
+    tactic_data["visual_theme"] = visual_theme
+    print(f"   🎨 {label} テーマ設定: {visual_theme['icon']}")
+    
+    return tactic_data
+
+
+def create_clients():
+    """Gemini・Claudeのクライアントを作る（それぞれがHTTP接続プールを持つので、プロセス内で使い回す）
+    
+    戻り値: (gemini_client, claude_client)。GEMINI_API_KEYがなければ gemini_client は None、
+    Claudeが使えなければ claude_client は None（記事生成をスキップ）。
+    """
     gemini_api_key = os.getenv("GEMINI_API_KEY")
     anthropic_api_key = os.getenv("ANTHROPIC_API_KEY")
     
     if not gemini_api_key:
         print("エラー: GEMINI_API_KEYが設定されていません")
-        return None
+        return None, None
     
     # Gemini APIクライアントを初期化（戦術生成・画像生成用）
     gemini_client = genai.Client(api_key=gemini_api_key)
@@ -323,11 +554,49 @@ def analyze_and_generate_tactics():
     # Claude APIクライアントを初期化（記事生成用）
     claude_client = None
     if ANTHROPIC_AVAILABLE and anthropic_api_key:
-        claude_client = anthropic.Anthropic(api_key=anthropic_api_key)
+        # 再試行は resilience.call で行う（SDK内の再試行と二重にしない）
+        claude_client = anthropic.Anthropic(api_key=anthropic_api_key, max_retries=0)
         print("📝 Claude API (claude-sonnet-4-5-20250929) を記事生成に使用")
     else:
         print("⚠️ Claude APIが利用不可（ANTHROPIC_API_KEY未設定またはライブラリなし）")
     
+    return gemini_client, claude_client
+
+
+def filter_new_news(news_items, dedup_index, in_flight=None):
+    """戦術化済みのニュース・入力内の重複を除いたリストを返す（LLMを呼ぶ前に照合する）
+    
+    in_flight: 処理中のニュースの正規化URLの集合（パイプラインで、公開前のニュースを再度取り込まないように）
+    """
+    fresh_news = []
+    seen_urls = set(in_flight or ())
+    for news in news_items:
+        duplicate = dedup_index.find_duplicate(news.get("url", ""), news.get("title", ""), news.get("original_title", ""))
+        url_key = normalize_url(news.get("url", ""))
+        if duplicate or url_key in seen_urls:
+            reason = duplicate[0] if duplicate else "url"
+            print(f"♻️ 処理済みのためスキップ ({reason}): {news.get('title', 'N/A')[:40]}")
+            continue
+        seen_urls.add(url_key)
+        fresh_news.append(news)
+    dedup_index.record_skipped_news(len(news_items) - len(fresh_news))
+    return fresh_news
+
+
+def analyze_and_generate_tactics(workers=1, article_mode="sync", batch_timeout=article_batch.BATCH_TIMEOUT,
+                                 tactic_batch=False):
+    """ニュースを戦術に変換するメイン処理
+    
+    workers > 1 の場合はニュースごとの処理を並列実行する。
+    API呼び出しはプロバイダごとのリミッタ（scripts/rate_limit.py）で制御される。
+    article_mode は記事生成の方式（ARTICLE_MODES）。"batch" の場合は全件の戦術を生成した後、
+    記事をまとめて1つのバッチで生成する（待ち時間の上限は batch_timeout 秒）。
+    tactic_batch=True の場合は、戦術データを複数件まとめて1回のGemini呼び出しで生成する。
+    """
+    gemini_client, claude_client = create_clients()
+    if gemini_client is None:
+        return None
+    
     # ニュースデータを読み込む
     news_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), "news_raw.json")
     
@@ -354,51 +623,54 @@ def analyze_and_generate_tactics():
         print("⚠️ 有効なニュースがありません（URLが含まれるニュースのみ処理）")
         return []
     
+    # 既に戦術化済みのニュース・今回の入力内の重複はLLMを呼ばずにスキップ
+    dedup_index = DedupIndex.load()
+    valid_news = filter_new_news(valid_news, dedup_index)
+    
     print(f"📰 {len(valid_news)}件のニュースを戦術に変換します...\n")
     
-    tactics = []
+    # IDと日付は実行開始時刻から決める（並列実行でも順序・IDが変わらない）
+    JST = timezone(timedelta(hours=9))
+    run_started = datetime.now(JST)
+    run_id = run_started.strftime("%Y%m%d_%H%M%S")
+    run_date = run_started.strftime("%Y-%m-%d")
+    total = len(valid_news)
     
-    for idx, news in enumerate(valid_news, 1):
-        print(f"🔄 [{idx}/{len(valid_news)}] {news.get('title', 'N/A')[:40]}...")
-        
-        # 戦術データを生成（Gemini使用）
-        tactic_data = analyze_news_to_tactic(gemini_client, news)
-        
-        if tactic_data:
-            # タイムスタンプベースのユニークID（同日複数回実行でも重複しない）
-            JST = timezone(timedelta(hours=9))
-            timestamp_id = datetime.now(JST).strftime("%Y%m%d_%H%M%S") + f"_{idx:02d}"
-            tactic_data["id"] = timestamp_id
-            tactic_data["date"] = datetime.now(JST).strftime("%Y-%m-%d")
-            
-            # ソース情報を追加
-            tactic_data["source_news"] = {
-                "title": news.get("title", ""),
-                "url": news.get("url", "")
-            }
-            
-            # 深掘り記事を生成（Claude使用）
-            print(f"   📝 Claude記事生成中...")
-            article_content = generate_deep_article(claude_client, news)
-            if article_content:
-                tactic_data["article"] = article_content
-                print(f"   ✅ → {tactic_data.get('title', 'N/A')[:50]} (+記事)")
-            else:
-                tactic_data["article"] = None
-                print(f"   ✅ → {tactic_data.get('title', 'N/A')[:50]} (記事生成失敗)")
-            
-            # ビジュアルテーマを設定（グラデーション + アイコン）
-            visual_theme = get_visual_theme(tactic_data, idx)
-            tactic_data["visual_theme"] = visual_theme
-            print(f"   🎨 テーマ設定: {visual_theme['icon']}")
-            
-            tactics.append(tactic_data)
-        else:
-            print(f"   ❌ スキップ")
-        
-        # レート制限対策（十分に待機）
-        if idx < len(valid_news):
-            time.sleep(3)  # 記事生成があるので少し長めに
+    # 戦術データをまとめて生成（指示文を1回だけ送る。不正な要素は build_tactic で1件ずつ生成し直す）
+    prefetched = {}
+    if tactic_batch and valid_news:
+        with telemetry.stage("tactic_generation"):
+            prefetched = analyze_news_batch(gemini_client, valid_news)
+    
+    def process(idx, news):
+        return build_tactic(gemini_client, claude_client, news, idx, total, run_id, run_date, article_mode,
+                            tactic_data=prefetched.get(idx))
+    
+    if workers > 1:
+        print(f"⚡ 並列モード: 最大{workers}件を同時処理します\n")
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(process, idx, news) for idx, news in enumerate(valid_news, 1)]
+            # 投入順に結果を回収して、出力順を入力順と一致させる
+            results = [future.result() for future in futures]
+    else:
+        results = [process(idx, news) for idx, news in enumerate(valid_news, 1)]
+    
+    tactics = [tactic for tactic in results if tactic]
+    
+    if article_mode == "batch":
+        with telemetry.stage("article_generation"):
+            generate_articles_in_batch(
+                claude_client, [(tactic, news) for news, tactic in zip(valid_news, results) if tactic],
+                timeout=batch_timeout
+            )
+    
+    # 生成できたニュースを重複インデックスに登録
+    for news, tactic in zip(valid_news, results):
+        if tactic:
+            dedup_index.add(news.get("url", ""), news.get("title", ""), news.get("original_title", ""),
+                            tactic_id=tactic["id"], seen_at=tactic["date"])
+    dedup_index.save()
+    dedup_index.print_report()
     
     # 結果をファイルに保存
     output_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), "new_tactics.json")
@@ -416,7 +688,28 @@ if __name__ == "__main__":
     print("ニュースを実務で使えるプロンプトに変換します...")
     print("=" * 50)
     
-    result = analyze_and_generate_tactics()
+    parser = argparse.ArgumentParser(description="ニュースを戦術データに変換")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="同時に処理するニュース件数（既定: 1 = 逐次処理）")
+    parser.add_argument("--article-mode", choices=ARTICLE_MODES, default="sync",
+                        help="記事生成の方式（stream: ストリーミング・途中経過を保存・TTFTを記録 / "
+                             "batch: 全件を1つのバッチで生成）")
+    parser.add_argument("--tactic-batch", action="store_true",
+                        help="戦術データを複数件まとめて1回のGemini呼び出しで生成する")
+    parser.add_argument("--batch-timeout", type=int, default=article_batch.BATCH_TIMEOUT,
+                        help="batchモードで完了を待つ最大秒数（超えたら残りを同期生成）")
+    llm_cache.add_cache_arguments(parser)
+    args = parser.parse_args()
+    cache = llm_cache.configure(mode=args.cache_mode)
+    
+    result = analyze_and_generate_tactics(workers=args.workers, article_mode=args.article_mode,
+                                          batch_timeout=args.batch_timeout, tactic_batch=args.tactic_batch)
+    
+    if args.article_mode == "stream":
+        print(article_stream.get_metrics().summary())
+    print(cache.summary())
+    cache.prune()
+    telemetry.write_report("analyst")
     
     if result is not None:  # 0件でも成功（有効なニュースがなかった場合）
         print("\n" + "=" * 50)
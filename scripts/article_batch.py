@@ -0,0 +1,149 @@
+"""
+Claude記事生成のバッチ処理（Message Batches API）
+
+複数件の記事プロンプトを1つのバッチジョブにまとめて送信し、完了を待って
+custom_id（戦術ID）ごとに結果を返す。バッチは通常の呼び出しより安価で、
+件数が多い日やバックフィルでもAPIとの往復が「作成1回 + ポーリング + 結果取得1回」で済む。
+
+バッチAPIが使えない場合（ライブラリが古い・エンドポイントがない・権限がない）は None を返し、
+呼び出し側で1件ずつの同期呼び出しに切り替える。
+作成・状態確認・結果取得・キャンセルの各呼び出しは resilience.call で再試行する。
+"""
+import time
+
+from scripts import resilience, telemetry
+from scripts.rate_limit import get_limiter
+
+# 完了確認の間隔と待ち時間の上限（秒）
+POLL_INTERVAL = 30
+BATCH_TIMEOUT = 60 * 60
+# キャンセル後、処理中の要求が打ち切られてバッチが終わるまで待つ上限（秒）
+CANCEL_TIMEOUT = 10 * 60
+
+
+def _batches_api(claude_client):
+    """クライアントのバッチAPI（なければ None）"""
+    messages = getattr(claude_client, "messages", None)
+    return getattr(messages, "batches", None)
+
+
+def submit_batch(claude_client, prompts, model, max_tokens):
+    """custom_id → プロンプト をまとめて1つのバッチとして送信し、バッチIDを返す"""
+    requests = [
+        {
+            "custom_id": custom_id,
+            "params": {
+                "model": model,
+                "max_tokens": max_tokens,
+                "messages": [{"role": "user", "content": prompt}],
+            },
+        }
+        for custom_id, prompt in prompts.items()
+    ]
+
+    def create(timeout):
+        with get_limiter("claude"):
+            return _batches_api(claude_client).create(requests=requests, timeout=timeout)
+
+    return resilience.call("claude", create).id
+
+
+def wait_for_batch(claude_client, batch_id, poll_interval=POLL_INTERVAL, timeout=BATCH_TIMEOUT,
+                   cancel_timeout=CANCEL_TIMEOUT):
+    """バッチの処理が終わるまで待つ
+
+    時間切れならキャンセルし、バッチが終わる（処理中の要求が打ち切られる）まで最大 cancel_timeout 秒待つ。
+    キャンセルしたバッチにも、それまでに成功した要求の結果は残る。終わらなければ None。
+    """
+    batches = _batches_api(claude_client)
+    deadline = time.monotonic() + timeout
+    canceled = False
+    while True:
+        batch = resilience.call("claude", lambda timeout: batches.retrieve(batch_id, timeout=timeout))
+        if batch.processing_status == "ended":
+            return batch
+        if time.monotonic() >= deadline:
+            if canceled:
+                print(f"   ⚠️ キャンセルしたバッチが{cancel_timeout}秒以内に終わりません: {batch_id}")
+                return None
+            print(f"   ⚠️ バッチが{timeout}秒以内に終わらないためキャンセルします: {batch_id}")
+            cancel_batch(claude_client, batch_id)
+            canceled = True
+            deadline = time.monotonic() + cancel_timeout
+        counts = batch.request_counts
+        print(f"   ⏳ バッチ処理中: 完了 {counts.succeeded + counts.errored}/"
+              f"{counts.processing + counts.succeeded + counts.errored + counts.canceled + counts.expired}件")
+        time.sleep(min(poll_interval, max(0.0, deadline - time.monotonic())))
+
+
+def cancel_batch(claude_client, batch_id):
+    """バッチをキャンセルする（失敗しても呼び出し側は同期生成に切り替えるだけなので、警告を出して続ける）"""
+    def cancel(timeout):
+        with get_limiter("claude"):
+            return _batches_api(claude_client).cancel(batch_id, timeout=timeout)
+
+    try:
+        resilience.call("claude", cancel)
+    except Exception as e:
+        print(f"   ⚠️ バッチのキャンセルに失敗: {str(e)[:80]}")
+        return False
+    return True
+
+
+def collect_results(claude_client, batch_id):
+    """バッチの結果を custom_id → 応答テキスト にまとめる（失敗した要求は含めない）"""
+    texts = {}
+    results = resilience.call("claude", lambda timeout: _batches_api(claude_client).results(batch_id, timeout=timeout))
+    for item in results:
+        result = item.result
+        if result.type == "succeeded":
+            usage = result.message.usage
+            telemetry.add_usage(usage.input_tokens, usage.output_tokens)
+            texts[item.custom_id] = "".join(
+                block.text for block in result.message.content if block.type == "text"
+            )
+        else:
+            detail = ""
+            if result.type == "errored":
+                error = getattr(result.error, "error", result.error)
+                detail = f": {str(getattr(error, 'message', error))[:80]}"
+            print(f"   ⚠️ バッチ内の要求が失敗 ({result.type}) {item.custom_id}{detail}")
+    return texts
+
+
+def generate_batch(claude_client, prompts, model, max_tokens, poll_interval=POLL_INTERVAL, timeout=BATCH_TIMEOUT):
+    """複数のプロンプトを1つのバッチで生成
+
+    戻り値: custom_id → 応答テキスト（失敗・時間切れの分は含まない）。
+    バッチAPIが使えない場合は None。作成後の状態確認・結果取得が再試行しても失敗した場合は、
+    例外にせず取得できた分だけを返す（残りは呼び出し側が同期で生成する）。
+    """
+    if not prompts:
+        return {}
+    if _batches_api(claude_client) is None:
+        print("   ⚠️ このクライアントはバッチAPIに対応していません")
+        return None
+
+    # バッチ全体（作成・状態確認・結果取得）を1回の呼び出しとして計測する（料金はバッチ割引）
+    with telemetry.track_call("claude", model, "article_batch", batch=True):
+        try:
+            batch_id = submit_batch(claude_client, prompts, model, max_tokens)
+        except Exception as e:
+            print(f"   ⚠️ バッチを作成できませんでした: {str(e)[:80]}")
+            return None
+        print(f"   📦 バッチを送信: {batch_id}（{len(prompts)}件）")
+
+        batch = None
+        try:
+            batch = wait_for_batch(claude_client, batch_id, poll_interval, timeout)
+            if batch is None:
+                return {}
+            texts = collect_results(claude_client, batch_id)
+        except Exception as e:
+            print(f"   ⚠️ バッチの状態確認・結果取得に失敗しました: {str(e)[:80]}")
+            if batch is None:
+                # 処理中のバッチを残さない（同期生成と二重に課金されないように）
+                cancel_batch(claude_client, batch_id)
+            return {}
+    print(f"   ✅ バッチ完了: {len(texts)}/{len(prompts)}件成功")
+    return texts
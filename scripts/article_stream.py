@@ -0,0 +1,206 @@
+"""
+Claude記事生成のストリーミング処理
+
+- 受信したテキストを .cache/partial_articles/ に随時保存し、タイムアウトやエラーで
+  途中まで生成した内容を失わない（リトライ時は保存済みの続きから生成させる）
+- 必須セクションが「### まとめ」まで揃ったら、それ以降の生成を待たずに打ち切る
+- 記事ごとに最初のトークンまでの時間（TTFT）と tokens/sec を記録する
+"""
+import os
+import re
+import threading
+import time
+
+from scripts import llm_cache
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PARTIAL_DIR = os.path.join(BASE_DIR, ".cache", "partial_articles")
+
+# 記事に必須のセクション（プロンプトの【記事構成】と同じ順）
+REQUIRED_SECTIONS = (
+    "### 概要",
+    "### 技術詳細",
+    "### 従来ソリューションとの比較",
+    "### ビジネス活用シーン",
+    "### 導入ステップ",
+    "### まとめ",
+)
+SUMMARY_HEADING = REQUIRED_SECTIONS[-1]
+
+# まとめ本文がこの文字数に達した後の段落の区切りで打ち切る
+# （プロンプトの指定は100-150文字だが短めに書かれることがあるため、半分を目安にする）
+SUMMARY_MIN_CHARS = 50
+
+# まとめの後に来たら記事の終わりとみなすもの（空行・見出し・区切り線・コードブロックの終わり）
+_SUMMARY_END = re.compile(r"\n[ \t]*\n|\n#{1,6} |\n---|\n```")
+
+# 途中経過を保存する間隔（秒）
+FLUSH_INTERVAL = 1.0
+
+# 打ち切りで出力トークン数が返らない場合の概算（日本語の記事での目安）
+ESTIMATED_CHARS_PER_TOKEN = 1.5
+
+
+class StreamInterrupted(ConnectionError):
+    """ストリームが完了イベントを受け取る前に終わった（接続断として再試行の対象にする）"""
+
+
+def find_article_end(text):
+    """必須セクションが揃い、まとめが書き終わった位置（まだなら None）"""
+    start = text.find(SUMMARY_HEADING)
+    if start == -1 or any(section not in text for section in REQUIRED_SECTIONS[:-1]):
+        return None
+    body_start = text.find("\n", start)
+    if body_start == -1:
+        return None
+    for match in _SUMMARY_END.finditer(text, body_start):
+        if len(text[body_start:match.start()].strip()) >= SUMMARY_MIN_CHARS:
+            return match.start()
+    return None
+
+
+def partial_path_for(model, prompt, config):
+    """途中経過の保存先（LLMキャッシュと同じキー。同じニュースの再実行で続きから再開できる）"""
+    return os.path.join(PARTIAL_DIR, llm_cache.make_key(model, prompt, config) + ".md")
+
+
+def _save_partial(path, text):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+def _load_partial(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return f.read()
+    except OSError:
+        return ""
+
+
+def discard_partial(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def stream_article(claude_client, model, prompt_text, max_tokens, partial_path=None, timeout=None):
+    """記事をストリーミングで生成し、(本文, 計測値) を返す
+
+    partial_path に途中経過があれば、それをアシスタントの書き出しとして渡して続きを生成させる。
+    完了前にストリームが切れた場合は途中経過を保存して StreamInterrupted を送出する。
+    timeout は受信が途切れてから打ち切るまでの秒数（省略時はクライアントの設定）。
+    """
+    # 末尾の空白で終わる書き出しはAPIが受け付けない
+    resumed = _load_partial(partial_path).rstrip() if partial_path else ""
+    messages = [{"role": "user", "content": prompt_text}]
+    if resumed:
+        messages.append({"role": "assistant", "content": resumed})
+
+    options = {"timeout": timeout} if timeout is not None else {}
+    text = resumed
+    started = time.perf_counter()
+    first_token_at = None
+    last_flush = started
+    early_stop = False
+    summary_seen = False
+    try:
+        with claude_client.messages.stream(model=model, max_tokens=max_tokens, messages=messages,
+                                           **options) as stream:
+            for delta in stream.text_stream:
+                now = time.perf_counter()
+                if first_token_at is None:
+                    first_token_at = now
+                text += delta
+                # まとめの見出しが出るまでは終了判定をしない
+                summary_seen = summary_seen or SUMMARY_HEADING in text
+                if summary_seen:
+                    end = find_article_end(text)
+                    if end is not None:
+                        text = text[:end]
+                        early_stop = True
+                        break
+                if partial_path and now - last_flush >= FLUSH_INTERVAL:
+                    _save_partial(partial_path, text)
+                    last_flush = now
+            snapshot = stream.current_message_snapshot
+    except BaseException:
+        if partial_path and len(text) > len(resumed):
+            _save_partial(partial_path, text)
+        raise
+
+    if not early_stop and snapshot.stop_reason is None:
+        if partial_path:
+            _save_partial(partial_path, text)
+        raise StreamInterrupted(f"ストリームが途中で終了しました（{len(text)}文字まで受信）")
+
+    finished = time.perf_counter()
+    generated_chars = len(text) - len(resumed)
+    output_tokens = None if early_stop else snapshot.usage.output_tokens
+    estimated = output_tokens is None
+    if estimated:
+        output_tokens = round(generated_chars / ESTIMATED_CHARS_PER_TOKEN)
+    generation_seconds = finished - (first_token_at or started)
+    metrics = {
+        "ttft_s": (first_token_at - started) if first_token_at else None,
+        "duration_s": finished - started,
+        "input_tokens": snapshot.usage.input_tokens,
+        "output_tokens": output_tokens,
+        "tokens_estimated": estimated,
+        "tokens_per_sec": output_tokens / generation_seconds if generation_seconds > 0 else None,
+        "early_stop": early_stop,
+        "resumed_chars": len(resumed),
+        "stop_reason": "early_stop" if early_stop else snapshot.stop_reason,
+    }
+    return text, metrics
+
+
+class ArticleMetrics:
+    """記事ごとの生成計測値を集計（スレッドセーフ）"""
+
+    def __init__(self):
+        self._items = []
+        self._lock = threading.Lock()
+
+    def record(self, label, metrics):
+        with self._lock:
+            self._items.append((label, metrics))
+
+    def __len__(self):
+        return len(self._items)
+
+    def items(self):
+        """(ラベル, 計測値) の一覧"""
+        with self._lock:
+            return list(self._items)
+
+    def summary(self):
+        """計測値の一覧と平均"""
+        if not self._items:
+            return "📈 記事生成の計測値: なし"
+        lines = ["📈 記事生成の計測値（ストリーミング）"]
+        for label, m in self._items:
+            ttft = f"{m['ttft_s']:.2f}秒" if m["ttft_s"] is not None else "-"
+            tps = f"{m['tokens_per_sec']:.1f}" if m["tokens_per_sec"] else "-"
+            approx = "≈" if m["tokens_estimated"] else ""
+            flags = " / まとめで打ち切り" if m["early_stop"] else ""
+            if m["resumed_chars"]:
+                flags += f" / {m['resumed_chars']}文字から再開"
+            lines.append(f"   {label} TTFT {ttft} | {approx}{m['output_tokens']}トークン"
+                         f" | {tps} tokens/sec | 合計 {m['duration_s']:.1f}秒{flags}")
+        ttfts = [m["ttft_s"] for _, m in self._items if m["ttft_s"] is not None]
+        rates = [m["tokens_per_sec"] for _, m in self._items if m["tokens_per_sec"]]
+        if ttfts and rates:
+            lines.append(f"   平均 TTFT {sum(ttfts) / len(ttfts):.2f}秒 | 平均 {sum(rates) / len(rates):.1f} tokens/sec"
+                         f" | 打ち切り {sum(1 for _, m in self._items if m['early_stop'])}/{len(self._items)}件")
+        return "\n".join(lines)
+
+
+_metrics = ArticleMetrics()
+
+
+def get_metrics():
+    return _metrics
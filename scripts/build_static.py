@@ -0,0 +1,96 @@
+"""
+CSSとロゴの静的ファイルをビルド
+
+styles.get_custom_css() のCSSと assets/logo_b.svg を最小化し、内容ハッシュ付きのファイル名で
+static/ に書き出す（Streamlitの静的ファイル配信で /app/static/ から配信）。
+各ページは数十バイトの参照だけを埋め込み、本体はブラウザが1回だけ取得してキャッシュする。
+
+- static/app.<内容ハッシュ>.css
+- static/logo_b.<内容ハッシュ>.svg
+- static/manifest.json : 元データのハッシュ → 配信ファイル名
+
+元のCSS/ロゴを変更してビルドし直していない場合、ページはマニフェストの不一致を検出して
+従来どおりインラインで埋め込む（古いCSSが表示されることはない）。
+
+使い方:
+    python scripts/build_static.py
+"""
+import os
+import re
+import sys
+
+# プロジェクトルートをパスに追加
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts import tactics_store
+from styles import LOGO_PATH, STATIC_MANIFEST_PATH, get_custom_css, source_digest
+
+STATIC_DIR = os.path.dirname(STATIC_MANIFEST_PATH)
+
+# ビルドで作成するファイル名（古い版の削除に使う）
+_BUILT_FILE_PATTERN = re.compile(r"^(app\.[0-9a-f]+\.css|logo_b\.[0-9a-f]+\.svg)$")
+
+
+def minify_css(css):
+    """<style>タグ・コメント・余分な空白を取り除く"""
+    css = re.sub(r"</?style[^>]*>", "", css)
+    css = re.sub(r"/\*.*?\*/", "", css, flags=re.S)
+    css = re.sub(r"\s+", " ", css)
+    css = re.sub(r"\s*([{};,>])\s*", r"\1", css)
+    # 「a :hover」（子孫の疑似クラス）と区別するため、コロンは後ろの空白だけ詰める
+    css = re.sub(r":\s+", ":", css)
+    css = css.replace(";}", "}")
+    return css.strip()
+
+
+def minify_svg(svg):
+    """コメント・タグ間の空白を取り除き、連続する空白を詰める（DOCTYPEの実体宣言は残す）"""
+    svg = re.sub(r"<!--.*?-->", "", svg, flags=re.S)
+    svg = re.sub(r">\s+<", "><", svg)
+    svg = re.sub(r"\s+", " ", svg)
+    return svg.strip()
+
+
+def _write_fingerprinted(prefix, ext, content):
+    data = content.encode("utf-8")
+    name = f"{prefix}.{source_digest(data)[:12]}.{ext}"
+    path = os.path.join(STATIC_DIR, name)
+    if not os.path.exists(path):
+        with open(path, "wb") as f:
+            f.write(data)
+    return name, len(data)
+
+
+def build_static():
+    """CSSとロゴをビルドしてマニフェストを更新"""
+    os.makedirs(STATIC_DIR, exist_ok=True)
+
+    css = get_custom_css()
+    with open(LOGO_PATH, "rb") as f:
+        logo = f.read()
+
+    css_file, css_bytes = _write_fingerprinted("app", "css", minify_css(css))
+    logo_file, logo_bytes = _write_fingerprinted("logo_b", "svg", minify_svg(logo.decode("utf-8")))
+
+    manifest = {
+        "css": {"file": css_file, "source": source_digest(css)},
+        "logo": {"file": logo_file, "source": source_digest(logo)},
+    }
+    tactics_store.write_json_atomic(STATIC_MANIFEST_PATH, manifest, indent=2)
+
+    # 古い版のビルドファイルを削除
+    removed = 0
+    for name in os.listdir(STATIC_DIR):
+        if _BUILT_FILE_PATTERN.match(name) and name not in (css_file, logo_file):
+            os.remove(os.path.join(STATIC_DIR, name))
+            removed += 1
+
+    print(f"✅ CSS : {len(css.encode('utf-8')):,} bytes → static/{css_file}（{css_bytes:,} bytes）")
+    print(f"✅ ロゴ: {len(logo):,} bytes → static/{logo_file}（{logo_bytes:,} bytes）")
+    if removed:
+        print(f"🗑️ 古いビルドファイルを削除: {removed}件")
+    return manifest
+
+
+if __name__ == "__main__":
+    build_static()
@@ -8,10 +8,16 @@ import sys
 import re
 from datetime import datetime, timedelta, timezone
 import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor
 
 # プロジェクトルートをパスに追加
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from scripts.dedup_index import DedupIndex
+from scripts.rate_limit import get_limiter
+from scripts import json_stream, llm_cache, resilience, telemetry
+
 try:
     import feedparser
 except ImportError:
@@ -19,6 +25,13 @@ except ImportError:
     print("pip install feedparser を実行してください")
     sys.exit(1)
 
+try:
+    import requests
+except ImportError:
+    print("エラー: requestsライブラリがインストールされていません")
+    print("pip install requests を実行してください")
+    sys.exit(1)
+
 try:
     from google import genai
     from google.genai import types
@@ -68,6 +81,15 @@ RSS_FEEDS = [
     },
 ]
 
+# フィードごとのETag/Last-Modifiedと前回パースしたエントリを保存するファイル（条件付きGET用）
+# 実行のたびに変わるためコミットせず、ワークフローではキャッシュとして次の実行へ引き継ぐ
+FEED_STATE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "feed_state.json")
+
+# 1フィードあたりのタイムアウト（接続, 読み込み）秒
+FEED_TIMEOUT = (5, 15)
+
+FEED_USER_AGENT = "ai-code-collector/1.0 (+https://github.com/Moto2ne/ai-code)"
+
 # 日替わりフォーカステーマ（曜日/日付でローテーション）
 DAILY_FOCUS = [
     "モデルリリース・ベンチマーク",
@@ -87,51 +109,152 @@ def get_today_focus():
     return focus
 
 
-def fetch_rss_entries(max_age_days=7):
-    """RSSフィードから最新エントリを取得"""
+def load_feed_state(state_path=FEED_STATE_PATH):
+    """前回取得時のETag/Last-Modifiedとエントリを読み込む"""
+    if not os.path.exists(state_path):
+        return {}
+    try:
+        with open(state_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception as e:
+        print(f"⚠️ フィード状態ファイルの読み込みに失敗しました: {e}")
+        return {}
+
+
+def save_feed_state(state, state_path=FEED_STATE_PATH):
+    """ETag/Last-Modifiedとエントリを保存する"""
+    os.makedirs(os.path.dirname(state_path), exist_ok=True)
+    with open(state_path, "w", encoding="utf-8") as f:
+        json.dump(state, f, ensure_ascii=False, indent=2, sort_keys=True)
+
+
+def fetch_feed(feed_info, validators, timeout=FEED_TIMEOUT, session=None):
+    """1つのフィードを条件付きGETで取得
+    
+    session（requests.Session）を渡すと接続を使い回す（常駐モードで繰り返し取得する場合）。
+    戻り値: (status, feed, validators)
+      status は "ok" / "not_modified" / "error"
+    """
+    headers = {"User-Agent": FEED_USER_AGENT}
+    if validators.get("etag"):
+        headers["If-None-Match"] = validators["etag"]
+    if validators.get("last_modified"):
+        headers["If-Modified-Since"] = validators["last_modified"]
+    
+    try:
+        response = (session or requests).get(feed_info["url"], headers=headers, timeout=timeout)
+    except requests.RequestException as e:
+        print(f"  ❌ エラー: {feed_info['name']} - {str(e)[:50]}")
+        return "error", None, validators
+    
+    if response.status_code == 304:
+        print(f"  💤 更新なし: {feed_info['name']}")
+        return "not_modified", None, validators
+    
+    if response.status_code != 200:
+        print(f"  ⚠️ フィード取得失敗: {feed_info['name']} (HTTP {response.status_code})")
+        return "error", None, validators
+    
+    feed = feedparser.parse(response.content)
+    if feed.bozo and not feed.entries:
+        print(f"  ⚠️ フィード取得失敗: {feed_info['name']}")
+        return "error", None, validators
+    
+    new_validators = {}
+    if response.headers.get("ETag"):
+        new_validators["etag"] = response.headers["ETag"]
+    if response.headers.get("Last-Modified"):
+        new_validators["last_modified"] = response.headers["Last-Modified"]
+    
+    return "ok", feed, new_validators
+
+
+def _validators(saved):
+    """保存済みの状態から条件付きGETのヘッダーに使う値を取り出す
+
+    エントリを保存していない古い形式の状態では304を受け取っても候補を返せないため、送らない（全件取得し直す）。
+    """
+    if "entries" not in saved:
+        return {}
+    return {key: saved[key] for key in ("etag", "last_modified") if saved.get(key)}
+
+
+def fetch_rss_entries(max_age_days=7, feeds=None, state_path=FEED_STATE_PATH,
+                      timeout=FEED_TIMEOUT, max_workers=None, session=None):
+    """RSSフィードから最新エントリを取得
+    
+    全フィードを並列に取得し、前回から更新のないフィード（304）はパースせずに前回のエントリを使い直す
+    （選定されなかった・生成に失敗したニュースも候補に戻す。処理済みのものは呼び出し側で重複インデックスにより除く）。
+    全フィードの取得に失敗した場合は None を返す。
+    """
+    feeds = feeds if feeds is not None else RSS_FEEDS
     all_entries = []
     cutoff_date = datetime.now() - timedelta(days=max_age_days)
     
-    for feed_info in RSS_FEEDS:
-        try:
-            print(f"📡 {feed_info['name']} を取得中...")
-            feed = feedparser.parse(feed_info["url"])
+    state = load_feed_state(state_path) if state_path else {}
+    
+    print(f"📡 {len(feeds)}件のフィードを並列取得中...")
+    with ThreadPoolExecutor(max_workers=max_workers or len(feeds) or 1) as executor:
+        futures = [
+            executor.submit(fetch_feed, feed_info, _validators(state.get(feed_info["url"], {})), timeout, session)
+            for feed_info in feeds
+        ]
+        results = [future.result() for future in futures]
+    
+    if results and all(status == "error" for status, _, _ in results):
+        print("  ❌ 全てのフィードの取得に失敗しました")
+        return None
+    
+    not_modified = 0
+    for feed_info, (status, feed, validators) in zip(feeds, results):
+        if status == "not_modified":
+            not_modified += 1
+            cached = state.get(feed_info["url"], {}).get("entries", [])
+            for entry in cached:
+                published = entry.get("published")
+                if published and datetime.fromisoformat(published) < cutoff_date:
+                    continue
+                all_entries.append({**entry, "source": feed_info["name"], "priority": feed_info["priority"]})
+            continue
+        if status != "ok":
+            continue
+        
+        feed_entries = []
+        for entry in feed.entries[:5]:  # 各フィードから最新5件まで
+            # 日付を取得
+            published = None
+            if hasattr(entry, 'published_parsed') and entry.published_parsed:
+                published = datetime(*entry.published_parsed[:6])
+            elif hasattr(entry, 'updated_parsed') and entry.updated_parsed:
+                published = datetime(*entry.updated_parsed[:6])
             
-            if feed.bozo and not feed.entries:
-                print(f"  ⚠️ フィード取得失敗: {feed_info['name']}")
+            # 古すぎる記事はスキップ
+            if published and published < cutoff_date:
                 continue
             
-            for entry in feed.entries[:5]:  # 各フィードから最新5件まで
-                # 日付を取得
-                published = None
-                if hasattr(entry, 'published_parsed') and entry.published_parsed:
-                    published = datetime(*entry.published_parsed[:6])
-                elif hasattr(entry, 'updated_parsed') and entry.updated_parsed:
-                    published = datetime(*entry.updated_parsed[:6])
-                
-                # 古すぎる記事はスキップ
-                if published and published < cutoff_date:
-                    continue
-                
-                # タイトルにAI関連キーワードが含まれるかチェック
-                title = entry.get('title', '')
-                summary = entry.get('summary', entry.get('description', ''))[:500]
-                
-                all_entries.append({
-                    "title": title,
-                    "summary": summary,
-                    "url": entry.get('link', ''),
-                    "source": feed_info['name'],
-                    "priority": feed_info['priority'],
-                    "published": published.isoformat() if published else None,
-                    "collected_at": datetime.now(timezone(timedelta(hours=9))).isoformat()
-                })
-            
-            print(f"  ✅ {len(feed.entries[:5])}件取得")
+            # タイトルにAI関連キーワードが含まれるかチェック
+            title = entry.get('title', '')
+            summary = entry.get('summary', entry.get('description', ''))[:500]
             
-        except Exception as e:
-            print(f"  ❌ エラー: {feed_info['name']} - {str(e)[:50]}")
-            continue
+            feed_entries.append({
+                "title": title,
+                "summary": summary,
+                "url": entry.get('link', ''),
+                "source": feed_info['name'],
+                "priority": feed_info['priority'],
+                "published": published.isoformat() if published else None,
+                "collected_at": datetime.now(timezone(timedelta(hours=9))).isoformat()
+            })
+        
+        all_entries.extend(feed_entries)
+        state[feed_info["url"]] = {**validators, "entries": feed_entries}
+        print(f"  ✅ {feed_info['name']}: {len(feed.entries[:5])}件取得")
+    
+    if not_modified:
+        print(f"  💤 {not_modified}件のフィードは前回から更新なし（パースせず前回のエントリを使用）")
+    
+    if state_path:
+        save_feed_state(state, state_path)
     
     # 優先度と日付でソート
     all_entries.sort(key=lambda x: (x['priority'], x['published'] or ''), reverse=False)
@@ -139,6 +262,21 @@ def fetch_rss_entries(max_age_days=7):
     return all_entries
 
 
+# ニュース選定の構造化出力（response_schema）のスキーマ
+SELECTION_SCHEMA = {
+    "type": "ARRAY",
+    "items": {
+        "type": "OBJECT",
+        "properties": {"index": {"type": "INTEGER"}, "summary_ja": {"type": "STRING"}},
+        "required": ["index", "summary_ja"],
+        "property_ordering": ["index", "summary_ja"],
+    },
+}
+
+# 壊れた選定結果を生成し直す回数
+SELECTION_RETRIES = 3
+
+
 def filter_ai_news_with_llm(client, entries, max_news=3):
     """LLMを使ってAI関連の重要ニュースを選定・要約"""
     
@@ -181,43 +319,85 @@ def filter_ai_news_with_llm(client, entries, max_news=3):
 
 JSONのみ出力してください。"""
 
-    try:
-        response = client.models.generate_content(
-            model='gemini-2.5-flash',
-            contents=[prompt],
-            config=types.GenerateContentConfig(temperature=0.2)
-        )
-        
-        response_text = response.text.strip()
-        
-        # JSONを抽出
-        if "```json" in response_text:
-            response_text = response_text.split("```json")[1].split("```")[0].strip()
-        elif "```" in response_text:
-            response_text = response_text.split("```")[1].split("```")[0].strip()
-        
-        json_start = response_text.find('[')
-        json_end = response_text.rfind(']') + 1
-        if json_start != -1 and json_end > json_start:
-            response_text = response_text[json_start:json_end]
-        
-        selected = json.loads(response_text)
-        
-        # 選定されたニュースを返す
-        result = []
-        for item in selected[:max_news]:
-            idx = item.get('index', 1) - 1
-            if 0 <= idx < len(entries):
-                entry = entries[idx]
-                entry['summary_ja'] = item.get('summary_ja', entry['title'])
+    generation_config = {
+        "temperature": 0.2,
+        "response_mime_type": "application/json",
+        "response_schema": SELECTION_SCHEMA,
+    }
+    candidates = min(len(entries), 20)
+    
+    def check_item(_, item):
+        """選定結果の要素を受信した時点で検証する"""
+        if not isinstance(item, dict) or not isinstance(item.get('index'), int):
+            return f"index のない要素: {str(item)[:40]}"
+        if not 1 <= item['index'] <= candidates:
+            return f"範囲外の index: {item['index']}"
+        if not item.get('summary_ja'):
+            return f"summary_ja が空です (index {item['index']})"
+        return None
+    
+    def request_selection(timeout):
+        with get_limiter("gemini"):
+            chunks = client.models.generate_content_stream(
+                model='gemini-2.5-flash',
+                contents=[prompt],
+                config=types.GenerateContentConfig(
+                    **generation_config, http_options=types.HttpOptions(timeout=int(timeout * 1000))
+                )
+            )
+            parser = json_stream.read_stream(telemetry.gemini_text_chunks(chunks), "[", check_item)
+        return parser.text
+    
+    def call_gemini():
+        # 5xx・429・タイムアウトは resilience.call が待ってから再試行する
+        return resilience.call("gemini", request_selection)
+    
+    def is_valid(text):
+        parser = json_stream.IncrementalJSONParser("[")
+        parser.feed(text)
+        return parser.done and bool(parser.members) and not any(check_item(*member) for member in parser.members)
+    
+    for attempt in range(SELECTION_RETRIES):
+        try:
+            with telemetry.track_call("gemini", 'gemini-2.5-flash', "selection"):
+                response_text = llm_cache.get_cache().cached_call(
+                    'gemini-2.5-flash', prompt, generation_config, call_gemini, validate=is_valid
+                )
+            if not is_valid(response_text):
+                raise json_stream.MalformedJSON(f"選定結果のJSONが不完全です: {response_text[:60]}")
+            selected = json_stream.parse_json(response_text, "[")
+            
+            # 選定されたニュースを返す
+            result = []
+            for item in selected[:max_news]:
+                entry = entries[item['index'] - 1]
+                entry['summary_ja'] = item['summary_ja']
                 result.append(entry)
-        
-        return result
-        
-    except Exception as e:
-        print(f"⚠️ LLM選定エラー: {e}")
-        # フォールバック: 優先度順に上位を返す
-        return entries[:max_news]
+            
+            return result
+            
+        except json_stream.MalformedJSON as e:
+            # 壊れた応答はすぐに選定し直す
+            print(f"⚠️ LLM選定の応答が不正 (試行 {attempt + 1}/{SELECTION_RETRIES}): {e}")
+            
+        except Exception as e:
+            print(f"⚠️ LLM選定エラー: {e}")
+            break
+    
+    # フォールバック: 優先度順に上位を返す
+    return entries[:max_news]
+
+
+def build_news_item(entry):
+    """選定したエントリを news_raw.json の形式（analyst.py の入力）に変換"""
+    return {
+        "title": entry.get('summary_ja', entry['title']),
+        "original_title": entry['title'],
+        "summary": entry['summary'][:300],
+        "url": entry['url'],
+        "source": entry['source'],
+        "collected_at": entry['collected_at']
+    }
 
 
 def collect_news():
@@ -236,32 +416,53 @@ def collect_news():
     print("📡 公式RSSフィードからニュースを収集中...")
     print("=" * 50)
     
-    entries = fetch_rss_entries(max_age_days=7)
+    with telemetry.stage("rss_fetch"):
+        entries = fetch_rss_entries(max_age_days=7)
+    if entries is None:
+        return None
     print(f"\n📰 合計 {len(entries)}件のエントリを取得")
     
-    if not entries:
-        print("⚠️ ニュースが取得できませんでした")
+    output_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), "news_raw.json")
+    
+    # 処理済みのニュース（URL・タイトルの重複/近似重複）はLLMに渡さない
+    dedup_index = DedupIndex.load()
+    fresh_entries = []
+    for entry in entries:
+        duplicate = dedup_index.find_duplicate(entry['url'], entry['title'])
+        if duplicate:
+            print(f"  ♻️ 処理済みのためスキップ ({duplicate[0]}): {entry['title'][:40]}")
+        else:
+            fresh_entries.append(entry)
+    skipped = len(entries) - len(fresh_entries)
+    # 全件が処理済みなら選定呼び出し自体が不要になる
+    dedup_index.record_skipped_entries(skipped, {"gemini": 1} if entries and not fresh_entries else None)
+    dedup_index.save()
+    if skipped:
+        print(f"♻️ {skipped}件の処理済みニュースを除外しました")
+        dedup_index.print_report()
+    
+    if not fresh_entries:
+        # 対象のエントリがない・全件が処理済みの場合も空のnews_raw.jsonを書き出して後続処理を空振りさせる
+        if entries:
+            print(f"📭 新しいニュースはありませんでした（取得した{len(entries)}件はすべて処理済み）")
+        else:
+            print("📭 新しいニュースはありませんでした（直近7日のAI関連エントリなし）")
+        with open(output_path, "w", encoding="utf-8") as f:
+            json.dump([], f)
         return []
+    entries = fresh_entries
     
     # LLMで選定・要約
     print("\nLLMで重要ニュースを選定中...")
-    selected_news = filter_ai_news_with_llm(client, entries, max_news=3)
+    with telemetry.stage("news_selection"):
+        selected_news = filter_ai_news_with_llm(client, entries, max_news=3)
     
     print(f"✅ {len(selected_news)}件のニュースを選定しました")
     
     # 保存形式に変換
-    news_items = []
-    for news in selected_news:
-        news_items.append({
-            "title": news.get('summary_ja', news['title']),
-            "summary": news['summary'][:300],
-            "url": news['url'],
-            "source": news['source'],
-            "collected_at": news['collected_at']
-        })
+    news_items = [build_news_item(news) for news in selected_news]
     
     # 保存
-    output_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), "news_raw.json")
     with open(output_path, "w", encoding="utf-8") as f:
         json.dump(news_items, f, ensure_ascii=False, indent=2)
     
@@ -276,9 +477,23 @@ if __name__ == "__main__":
     print("公式RSSフィードから最新AIニュースを収集します...")
     print("=" * 50)
     
+    parser = argparse.ArgumentParser(description="公式RSSフィードからAIニュースを収集")
+    llm_cache.add_cache_arguments(parser)
+    args = parser.parse_args()
+    cache = llm_cache.configure(mode=args.cache_mode)
+    
     result = collect_news()
     
-    if result:
+    print(cache.summary())
+    cache.prune()
+    telemetry.write_report("collector")
+    
+    if result == []:
+        print("\n" + "=" * 50)
+        # 理由（処理済み・対象エントリなし）は collect_news が出力済み
+        print("📭 新しいニュースはありませんでした")
+        print("=" * 50)
+    elif result:
         print("\n" + "=" * 50)
         print(f"✅ 完了！{len(result)}件のニュースを収集しました")
         for i, news in enumerate(result, 1):
@@ -0,0 +1,285 @@
+"""
+ニュース・戦術の重複検出インデックス
+同じニュースに対してGemini/Claudeを何度も呼び出さないよう、LLM呼び出し前に照合する
+
+照合キー:
+  - 正規化URL（utm_*等の追跡パラメータ・フラグメント・末尾スラッシュを除去）
+  - 正規化タイトルのハッシュ
+  - タイトルの文字3-gramによるMinHash（LSHで近似重複を検出。直近 NEAR_DUP_WINDOW_DAYS 日に登録した
+    ニュースだけが対象で、バージョン番号などの数字が違うタイトルは別のニュースとして扱う）
+
+使い方:
+    python scripts/dedup_index.py --rebuild   # 既存の戦術データから再構築
+    python scripts/dedup_index.py --report    # 削減できたAPI呼び出し数を表示
+"""
+import argparse
+import hashlib
+import json
+import os
+import random
+import re
+import sys
+import unicodedata
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+# プロジェクトルートをパスに追加
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts import tactics_store
+
+INDEX_PATH = os.path.join(tactics_store.BASE_DIR, "data", "dedup_index.json")
+
+# MinHash / LSH の設定（16バンド x 4行 → Jaccard 0.7前後で候補になる）
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+SHINGLE_SIZE = 3
+# 候補は3-gramの実際のJaccard係数で判定する（"Gemini 2.5 Pro" と "Gemini 2.5 Flash" の同じ定型文は 0.69 程度）
+NEAR_DUP_THRESHOLD = 0.75
+# 近似重複とみなすのは直近この日数に登録したニュースだけ（収集対象の記事の古さの上限 collector の max_age_days と同じ）
+NEAR_DUP_WINDOW_DAYS = 7
+
+# 1件の重複ニュースをスキップした場合に節約できる呼び出し（戦術生成 + 記事生成）
+CALLS_PER_NEWS = {"gemini": 1, "claude": 1}
+
+_TRACKING_PARAMS = re.compile(r"^(utm_.*|ref|ref_src|fbclid|gclid|mc_cid|mc_eid|source)$", re.IGNORECASE)
+_MERSENNE_PRIME = (1 << 61) - 1
+_rng = random.Random(20251215)
+_PERMUTATIONS = [(_rng.randrange(1, _MERSENNE_PRIME), _rng.randrange(0, _MERSENNE_PRIME)) for _ in range(NUM_PERM)]
+
+
+def normalize_url(url):
+    """URLを正規化（追跡パラメータ・フラグメント・末尾スラッシュを除去）"""
+    if not url:
+        return ""
+    parts = urlsplit(url.strip())
+    host = parts.netloc.lower()
+    if host.startswith("www."):
+        host = host[4:]
+    query = urlencode(sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not _TRACKING_PARAMS.match(key)
+    ))
+    path = parts.path.rstrip("/") or "/"
+    return urlunsplit(("https" if parts.scheme in ("http", "https") else parts.scheme, host, path, query, ""))
+
+
+def normalize_title(title):
+    """タイトルを正規化（全角半角・大文字小文字・記号・空白の揺れを吸収）"""
+    text = unicodedata.normalize("NFKC", title or "").lower()
+    return "".join(ch for ch in text if ch.isalnum())
+
+
+def title_hash(title):
+    normalized = normalize_title(title)
+    return hashlib.sha1(normalized.encode("utf-8")).hexdigest()[:16] if normalized else ""
+
+
+def shingles(text, size=SHINGLE_SIZE):
+    """文字n-gramの集合（日本語でも単語分割なしで使える）"""
+    if len(text) <= size:
+        return {text} if text else set()
+    return {text[i:i + size] for i in range(len(text) - size + 1)}
+
+
+def minhash(title):
+    """正規化タイトルのMinHashシグネチャ"""
+    grams = shingles(normalize_title(title))
+    if not grams:
+        return None
+    hashes = [int.from_bytes(hashlib.blake2b(g.encode("utf-8"), digest_size=8).digest(), "big") for g in grams]
+    return [min((a * h + b) % _MERSENNE_PRIME for h in hashes) for a, b in _PERMUTATIONS]
+
+
+def version_numbers(normalized_title):
+    """正規化タイトル中の数字の並び（"claudeopus46" → ("46",)）。バージョン違いの新しいリリースを見分ける"""
+    return tuple(re.findall(r"\d+", normalized_title))
+
+
+def jaccard(text_a, text_b):
+    """正規化タイトル同士の文字3-gramのJaccard係数"""
+    grams_a, grams_b = shingles(text_a), shingles(text_b)
+    if not grams_a or not grams_b:
+        return 0.0
+    return len(grams_a & grams_b) / len(grams_a | grams_b)
+
+
+def _band_keys(signature):
+    return [f"{band}:{hash(tuple(signature[band * ROWS:(band + 1) * ROWS]))}" for band in range(BANDS)]
+
+
+class DedupIndex:
+    """永続化された重複検出インデックス"""
+
+    def __init__(self, path=INDEX_PATH):
+        self.path = path
+        self.items = []
+        self.stats = {"skipped_entries": 0, "skipped_news": 0, "saved_calls": {"gemini": 0, "claude": 0}}
+        self.run_stats = {"skipped_entries": 0, "skipped_news": 0, "saved_calls": Counter()}
+        self._urls = {}
+        self._titles = {}
+        self._buckets = {}
+
+    # ------------------------------------------------------------
+    # 読み書き
+    # ------------------------------------------------------------
+    @classmethod
+    def load(cls, path=INDEX_PATH):
+        """インデックスを読み込む（なければ既存の戦術データから構築）"""
+        index = cls(path)
+        if not os.path.exists(path):
+            index.rebuild_from_tactics(tactics_store.load_tactics())
+            return index
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except Exception as e:
+            print(f"⚠️ 重複インデックスの読み込みに失敗したため再構築します: {e}")
+            index.rebuild_from_tactics(tactics_store.load_tactics())
+            return index
+        index.stats.update(data.get("stats", {}))
+        for item in data.get("items", []):
+            index._insert(item)
+        return index
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tactics_store.write_json_atomic(self.path, {"version": 1, "stats": self.stats, "items": self.items})
+
+    def rebuild_from_tactics(self, tactics):
+        """保存済みの戦術データから作り直す"""
+        self.items = []
+        self._urls, self._titles, self._buckets = {}, {}, {}
+        for tactic in sorted(tactics, key=lambda x: x.get("id", "")):
+            source = tactic.get("source_news") or {}
+            self.add(source.get("url", ""), source.get("title", ""), tactic_id=tactic.get("id"),
+                     seen_at=tactic.get("date"))
+
+    # ------------------------------------------------------------
+    # 照合・登録
+    # ------------------------------------------------------------
+    def _insert(self, item):
+        position = len(self.items)
+        self.items.append(item)
+        if item.get("url"):
+            self._urls.setdefault(item["url"], position)
+        for normalized in item.get("titles", []):
+            key = title_hash(normalized)
+            if key:
+                self._titles.setdefault(key, position)
+            # シグネチャは保存せず、読み込み時に正規化タイトルから再計算する
+            signature = minhash(normalized)
+            if signature is None:
+                continue
+            for band_key in _band_keys(signature):
+                self._buckets.setdefault(band_key, []).append((position, normalized))
+
+    def find_duplicate(self, url, *titles, today=None):
+        """重複していれば (理由, 既存アイテム) を返す。重複なしなら None
+
+        近似重複は、直近 NEAR_DUP_WINDOW_DAYS 日（today 基準。省略時は日本時間の今日）に登録した
+        ニュースのうち、数字の並びが同じで3-gramのJaccard係数が NEAR_DUP_THRESHOLD 以上のものだけ。
+        """
+        normalized_url = normalize_url(url)
+        if normalized_url and normalized_url in self._urls:
+            return "url", self.items[self._urls[normalized_url]]
+
+        for title in titles:
+            key = title_hash(title)
+            if key and key in self._titles:
+                return "title", self.items[self._titles[key]]
+
+        today = today or datetime.now(timezone(timedelta(hours=9))).date()
+        window_start = (today - timedelta(days=NEAR_DUP_WINDOW_DAYS)).isoformat()
+        for title in titles:
+            normalized = normalize_title(title)
+            signature = minhash(normalized)
+            if signature is None:
+                continue
+            numbers = version_numbers(normalized)
+            checked = set()
+            for band_key in _band_keys(signature):
+                for position, candidate in self._buckets.get(band_key, []):
+                    if (position, candidate) in checked:
+                        continue
+                    checked.add((position, candidate))
+                    item = self.items[position]
+                    if ((item.get("seen_at") or "") >= window_start
+                            and version_numbers(candidate) == numbers
+                            and jaccard(normalized, candidate) >= NEAR_DUP_THRESHOLD):
+                        return "near_duplicate", item
+        return None
+
+    def add(self, url, *titles, tactic_id=None, seen_at=None):
+        """ニュースを登録（URLが既に登録済みなら何もしない）"""
+        normalized_url = normalize_url(url)
+        if normalized_url and normalized_url in self._urls:
+            return False
+        if seen_at is None:
+            seen_at = datetime.now(timezone(timedelta(hours=9))).strftime("%Y-%m-%d")
+        self._insert({
+            "url": normalized_url,
+            "titles": list(dict.fromkeys(n for n in (normalize_title(t) for t in titles) if n)),
+            "tactic_id": tactic_id,
+            "seen_at": seen_at,
+        })
+        return True
+
+    # ------------------------------------------------------------
+    # 節約できた呼び出しの集計
+    # ------------------------------------------------------------
+    def record_skipped_entries(self, count, saved_calls=None):
+        """収集段階でLLMに渡さずに済んだエントリを記録"""
+        self._record("skipped_entries", count, saved_calls or {})
+
+    def record_skipped_news(self, count):
+        """戦術生成段階でスキップしたニュースを記録"""
+        self._record("skipped_news", count, {k: v * count for k, v in CALLS_PER_NEWS.items()})
+
+    def _record(self, key, count, saved_calls):
+        self.stats[key] = self.stats.get(key, 0) + count
+        self.run_stats[key] += count
+        for provider, calls in saved_calls.items():
+            self.stats["saved_calls"][provider] = self.stats["saved_calls"].get(provider, 0) + calls
+            self.run_stats["saved_calls"][provider] += calls
+
+    def print_report(self):
+        saved = self.run_stats["saved_calls"]
+        total = self.stats["saved_calls"]
+        print("🧹 重複検出レポート")
+        print(f"   今回スキップ: エントリ {self.run_stats['skipped_entries']}件 / ニュース {self.run_stats['skipped_news']}件")
+        print(f"   今回節約したAPI呼び出し: Gemini {saved['gemini']}回 / Claude {saved['claude']}回")
+        print(f"   累計節約したAPI呼び出し: Gemini {total.get('gemini', 0)}回 / Claude {total.get('claude', 0)}回")
+        print(f"   登録済みニュース: {len(self.items)}件")
+
+
+def report_existing_duplicates(tactics):
+    """保存済みデータ内で同じニュースから重複生成された件数を集計"""
+    urls = Counter(normalize_url((t.get("source_news") or {}).get("url", "")) for t in tactics)
+    urls.pop("", None)
+    duplicates = sum(count - 1 for count in urls.values() if count > 1)
+    print(f"📊 保存済み戦術: {len(tactics)}件 / ユニークなニュースURL: {len(urls)}件")
+    print(f"   重複して生成された戦術: {duplicates}件"
+          f"（インデックスがあれば Gemini {duplicates}回 / Claude {duplicates}回 の呼び出しを節約できた）")
+    return duplicates
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="重複検出インデックスの管理")
+    parser.add_argument("--rebuild", action="store_true", help="保存済みの戦術データから再構築する")
+    parser.add_argument("--report", action="store_true", help="節約できたAPI呼び出し数を表示する")
+    args = parser.parse_args()
+
+    if args.rebuild:
+        index = DedupIndex(INDEX_PATH)
+        if os.path.exists(INDEX_PATH):
+            index.stats = DedupIndex.load(INDEX_PATH).stats
+        index.rebuild_from_tactics(tactics_store.load_tactics())
+        index.save()
+        print(f"✅ 重複インデックスを再構築しました: {len(index.items)}件")
+
+    if args.report or not args.rebuild:
+        report_existing_duplicates(tactics_store.load_tactics())
+        DedupIndex.load(INDEX_PATH).print_report()
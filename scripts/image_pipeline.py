@@ -0,0 +1,179 @@
+"""
+ヘッダー画像の最適化パイプライン（Pillow使用）
+
+assets/images/ の元画像（<戦術ID>.png）から、配信用の軽量な派生画像を
+static/images/ に作成する（Streamlitの静的ファイル配信で /app/static/images/ から配信）。
+
+- <ID>.<内容ハッシュ>.webp       : 記事ページ用（最大幅 1200px）
+- <ID>.<内容ハッシュ>.w400.webp  : カード用サムネイル（幅 400px）
+- <ID>.<内容ハッシュ>.avif       : AVIF版（PillowがAVIFに対応している場合のみ）
+
+ファイル名に内容ハッシュを含めるため、ブラウザに長期間キャッシュさせても差し替えが反映される。
+元画像と派生画像の対応は static/images/manifest.json に保存し、内容が変わらない画像は再変換しない。
+
+使い方:
+    python scripts/image_pipeline.py           # 派生画像を作成し、未参照の画像を一覧表示
+    python scripts/image_pipeline.py --prune   # どの戦術からも参照されない画像を削除
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+
+# プロジェクトルートをパスに追加
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    from PIL import Image, features
+except ImportError:
+    print("エラー: Pillowライブラリがインストールされていません")
+    print("pip install Pillow を実行してください")
+    sys.exit(1)
+
+from scripts import tactics_store
+import rendering
+
+BASE_DIR = tactics_store.BASE_DIR
+SOURCE_DIR = os.path.join(BASE_DIR, "assets", "images")
+OUTPUT_DIR = os.path.join(BASE_DIR, "static", "images")
+MANIFEST_PATH = os.path.join(OUTPUT_DIR, "manifest.json")
+
+SOURCE_EXTENSIONS = (".png", ".jpg", ".jpeg")
+FULL_WIDTH = 1200
+THUMB_WIDTH = 400
+WEBP_QUALITY = 80
+AVIF_QUALITY = 60
+
+
+def referenced_images(tactics):
+    """戦術から参照されている元画像（BASE_DIRからの相対パス）→ 戦術ID"""
+    references = {}
+    for tactic in tactics:
+        tactic_id = tactic.get("id")
+        # 明示的な参照（旧データの image_path）
+        if tactic.get("image_path"):
+            references[tactic["image_path"].replace("\\", "/")] = tactic_id
+        # 命名規則による参照（assets/images/<戦術ID>.png）
+        if tactic_id:
+            for ext in SOURCE_EXTENSIONS:
+                relative = f"assets/images/{tactic_id}{ext}"
+                if os.path.exists(os.path.join(BASE_DIR, relative)):
+                    references[relative] = tactic_id
+    return references
+
+
+def load_manifest(manifest_path=MANIFEST_PATH):
+    if not os.path.exists(manifest_path):
+        return {}
+    with open(manifest_path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _resized(image, width):
+    if image.width <= width:
+        return image.copy()
+    height = round(image.height * width / image.width)
+    return image.resize((width, height), Image.LANCZOS)
+
+
+def build_variants(relative_path, tactic_id, output_dir=OUTPUT_DIR):
+    """1枚の元画像から派生画像を作成し、マニフェストのエントリを返す"""
+    source_path = os.path.join(BASE_DIR, relative_path)
+    with open(source_path, "rb") as f:
+        digest = hashlib.sha256(f.read()).hexdigest()[:12]
+
+    os.makedirs(output_dir, exist_ok=True)
+    stem = f"{tactic_id}.{digest}"
+    entry = {"tactic_id": tactic_id, "sha256": digest}
+
+    with Image.open(source_path) as image:
+        image = image.convert("RGB")
+        entry["width"], entry["height"] = image.size
+
+        full = _resized(image, FULL_WIDTH)
+        full.save(os.path.join(output_dir, f"{stem}.webp"), "WEBP", quality=WEBP_QUALITY, method=6)
+        entry["full"] = f"{stem}.webp"
+
+        thumb = _resized(image, THUMB_WIDTH)
+        thumb.save(os.path.join(output_dir, f"{stem}.w{THUMB_WIDTH}.webp"), "WEBP", quality=WEBP_QUALITY, method=6)
+        entry["thumb"] = f"{stem}.w{THUMB_WIDTH}.webp"
+        entry["thumb_size"] = list(thumb.size)
+
+        if features.check("avif"):
+            full.save(os.path.join(output_dir, f"{stem}.avif"), "AVIF", quality=AVIF_QUALITY)
+            entry["avif"] = f"{stem}.avif"
+
+    return entry
+
+
+def run_pipeline(prune=False):
+    """派生画像を最新化し、未参照の画像を一覧（prune=True なら削除）
+
+    アーカイブの月の戦術が参照する画像も残すため、参照はアーカイブを含む全期間から集める。
+    """
+    tactics = tactics_store.load_tactics()
+    references = referenced_images(tactics)
+    old_manifest = load_manifest()
+    manifest = {}
+
+    for relative_path, tactic_id in sorted(references.items()):
+        source_path = os.path.join(BASE_DIR, relative_path)
+        with open(source_path, "rb") as f:
+            digest = hashlib.sha256(f.read()).hexdigest()[:12]
+        previous = old_manifest.get(relative_path)
+        if (previous and previous.get("sha256") == digest
+                and os.path.exists(os.path.join(OUTPUT_DIR, previous["thumb"]))):
+            manifest[relative_path] = previous
+            continue
+        manifest[relative_path] = build_variants(relative_path, tactic_id)
+        print(f"🖼️ 変換: {relative_path} → {manifest[relative_path]['thumb']}")
+
+    # 参照されていない元画像・古い派生画像
+    unreferenced = []
+    if os.path.isdir(SOURCE_DIR):
+        for name in sorted(os.listdir(SOURCE_DIR)):
+            relative = f"assets/images/{name}"
+            if name.lower().endswith(SOURCE_EXTENSIONS) and relative not in references:
+                unreferenced.append(os.path.join(SOURCE_DIR, name))
+    current_outputs = {name for entry in manifest.values() for key in ("full", "thumb", "avif")
+                       for name in [entry.get(key)] if name}
+    stale_outputs = []
+    if os.path.isdir(OUTPUT_DIR):
+        stale_outputs = [os.path.join(OUTPUT_DIR, name) for name in sorted(os.listdir(OUTPUT_DIR))
+                         if name != "manifest.json" and name not in current_outputs]
+
+    # 派生画像は常に最新化し、元画像の削除は --prune 指定時のみ
+    for path in stale_outputs:
+        os.remove(path)
+    if prune:
+        for path in unreferenced:
+            os.remove(path)
+
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    tactics_store.write_json_atomic(MANIFEST_PATH, manifest, indent=2, sort_keys=True)
+
+    # サムネイルが変わったカードのHTMLを作り直す（merge_tactics と同じく直近の月だけ。アーカイブの月はアプリが生成）
+    rendering.build_and_save_card_fragments(tactics_store.load_tactics(include_archive=False))
+
+    source_bytes = sum(os.path.getsize(os.path.join(BASE_DIR, p)) for p in manifest)
+    thumb_bytes = sum(os.path.getsize(os.path.join(OUTPUT_DIR, e["thumb"])) for e in manifest.values())
+    print(f"✅ 参照中の画像: {len(manifest)}枚（元画像 {source_bytes / 1024:,.0f}KB → サムネイル {thumb_bytes / 1024:,.0f}KB）")
+    if stale_outputs:
+        print(f"🗑️ 古い派生画像を削除: {len(stale_outputs)}枚")
+    if unreferenced:
+        unreferenced_bytes = sum(os.path.getsize(p) for p in unreferenced) if not prune else 0
+        if prune:
+            print(f"🗑️ 未参照の元画像を削除: {len(unreferenced)}枚")
+        else:
+            print(f"⚠️ 未参照の元画像: {len(unreferenced)}枚（{unreferenced_bytes / 1024 / 1024:.1f}MB）"
+                  f" - 削除するには --prune を指定してください")
+    return manifest
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="ヘッダー画像の最適化")
+    parser.add_argument("--prune", action="store_true", help="どの戦術からも参照されない元画像を削除する")
+    args = parser.parse_args()
+
+    run_pipeline(prune=args.prune)
@@ -0,0 +1,137 @@
+"""
+LLM応答のJSONを逐次（ストリーミングのチャンクごとに）読み取るパーサー
+
+- 前置きの説明文・コードブロック（```json）は読み飛ばし、最初の { / [ からを読む
+- 文字列内の生の改行・タブはそのまま受け付ける（json.loads の strict=False）
+- 最上位のオブジェクトのメンバー・配列の要素は、書き終わった時点で取り出せる
+  （途中で切れた応答でも、書き終わった分は失わない）
+
+文字は1度ずつしか走査しないため、チャンクごとに全体を読み直す必要はない。
+"""
+import json
+
+_CLOSERS = {"{": "}", "[": "]"}
+
+
+class IncrementalJSONParser:
+    """チャンクを順に受け取り、最上位のメンバー/要素を書き終わった順に返す
+
+        parser = IncrementalJSONParser("[")
+        for chunk in stream:
+            for index, element in parser.feed(chunk):
+                ...
+        value = parser.value()
+    """
+
+    def __init__(self, opener=None):
+        # opener を指定した場合、その括弧で始まるJSONだけを読む（前置きの文中の括弧は無視）
+        self.opener = opener
+        self.root = None
+        self.done = False
+        self.members = []
+        self._text = ""
+        self._pos = 0
+        self._root_start = -1
+        self._stack = []
+        self._in_string = False
+        self._escaped = False
+        self._member_start = -1
+
+    @property
+    def text(self):
+        """受け取ったテキスト全体"""
+        return self._text
+
+    def feed(self, chunk):
+        """チャンクを追加し、新たに書き終わった (キー or 番号, 値) のリストを返す"""
+        self._text += chunk
+        completed = []
+        text = self._text
+        while self._pos < len(text) and not self.done:
+            char = text[self._pos]
+            if self._root_start == -1:
+                if char == self.opener or (self.opener is None and char in _CLOSERS):
+                    self.root = char
+                    self._root_start = self._pos
+                    self._stack.append(char)
+                    self._member_start = self._pos + 1
+            elif self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char in _CLOSERS:
+                self._stack.append(char)
+            elif char in "}]":
+                self._stack.pop()
+                if not self._stack:
+                    self._complete_member(self._pos, completed)
+                    self.done = True
+            elif char == "," and len(self._stack) == 1:
+                self._complete_member(self._pos, completed)
+                self._member_start = self._pos + 1
+            self._pos += 1
+        return completed
+
+    def _complete_member(self, end, completed):
+        member = self._text[self._member_start:end].strip()
+        if not member:
+            return
+        try:
+            if self.root == "{":
+                key, value = next(iter(json.loads("{" + member + "}", strict=False).items()))
+            else:
+                key, value = len(self.members), json.loads(member, strict=False)
+        except (ValueError, StopIteration):
+            # 壊れたメンバーは読み飛ばす（呼び出し側の検証で欠落として扱われる）
+            return
+        self.members.append((key, value))
+        completed.append((key, value))
+
+    def value(self):
+        """読み取った値（途中で切れていれば、書き終わったメンバー/要素だけで組み立てる）
+
+        JSONが見つからなければ None。
+        """
+        if self.root is None:
+            return None
+        if self.done:
+            try:
+                return json.loads(self._text[self._root_start:self._pos], strict=False)
+            except ValueError:
+                pass
+        if self.root == "{":
+            return dict(self.members)
+        return [value for _, value in self.members]
+
+
+def parse_json(text, opener=None):
+    """応答テキスト全体からJSONを読み取る（途中で切れていれば書き終わった分だけ）"""
+    parser = IncrementalJSONParser(opener)
+    parser.feed(text)
+    return parser.value()
+
+
+class MalformedJSON(ValueError):
+    """応答のJSONが壊れている・必須の値が欠けている"""
+
+
+def read_stream(chunks, opener=None, check_member=None):
+    """テキストのチャンク列を逐次パースし、読み終えたパーサーを返す
+
+    check_member(キー or 番号, 値) が問題の説明（文字列）を返したら、
+    残りを受信せずに MalformedJSON を送出する（壊れた応答を最後まで待たずに再生成できる）。
+    """
+    parser = IncrementalJSONParser(opener)
+    for chunk in chunks:
+        for key, value in parser.feed(chunk):
+            problem = check_member(key, value) if check_member else None
+            if problem:
+                raise MalformedJSON(problem)
+        if parser.done:
+            break
+    return parser
@@ -0,0 +1,172 @@
+"""
+LLMレスポンスのディスクキャッシュ
+モデル名・プロンプト・生成設定のハッシュをキーに応答テキストを保存し、
+入力が変わらない再実行（失敗後のリラン・ローカル開発）でAPIを呼ばないようにする
+
+- TTLを過ぎたエントリは使わない
+- 合計サイズが上限を超えたら最終アクセスが古い順に削除（LRU）
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CACHE_DIR = os.path.join(BASE_DIR, ".cache", "llm")
+
+DEFAULT_TTL_SECONDS = 7 * 24 * 3600
+DEFAULT_MAX_BYTES = 50 * 1024 * 1024
+
+# キャッシュの動作モード
+MODE_ON = "on"            # 読み書きする
+MODE_REFRESH = "refresh"  # 読まずにAPIを呼び、結果で上書きする
+MODE_OFF = "off"          # 使わない
+
+
+def make_key(model, prompt, config=None):
+    """モデル・プロンプト・設定から内容アドレスのキーを作る"""
+    payload = json.dumps({"model": model, "prompt": prompt, "config": config or {}},
+                         ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    """内容アドレス方式のレスポンスキャッシュ（スレッドセーフ）"""
+
+    def __init__(self, cache_dir=CACHE_DIR, mode=MODE_ON,
+                 ttl_seconds=DEFAULT_TTL_SECONDS, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.mode = mode
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key[:2], key + ".json")
+
+    def get(self, model, prompt, config=None):
+        """キャッシュ済みの応答テキストを返す（なければ None）"""
+        if self.mode != MODE_ON:
+            if self.mode == MODE_REFRESH:
+                self._count(hit=False)
+            return None
+
+        path = self._path(make_key(model, prompt, config))
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            self._count(hit=False)
+            return None
+
+        if time.time() - entry.get("created_at", 0) > self.ttl_seconds:
+            self._count(hit=False)
+            return None
+
+        # 最終アクセス時刻を更新（LRU用）
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        self._count(hit=True)
+        return entry.get("response")
+
+    def set(self, model, prompt, config, response):
+        """応答テキストを保存"""
+        if self.mode == MODE_OFF or response is None:
+            return
+        key = make_key(model, prompt, config)
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"model": model, "created_at": time.time(), "response": response}, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def cached_call(self, model, prompt, config, call, validate=None):
+        """キャッシュにあればそれを返し、なければ call() の結果を保存して返す
+
+        validate を指定した場合、validate(応答) が偽になる応答はキャッシュから使わず、保存もしない
+        （壊れた応答をキャッシュして、再試行でも同じ応答が返り続けることを防ぐ）。
+        """
+        response = self.get(model, prompt, config)
+        if response is not None and (validate is None or validate(response)):
+            return response
+        response = call()
+        if validate is None or validate(response):
+            self.set(model, prompt, config, response)
+        return response
+
+    def _count(self, hit):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def prune(self):
+        """期限切れエントリを削除し、サイズ上限を超えた分を古い順に削除する
+
+        戻り値: 削除したエントリ数
+        """
+        if not os.path.isdir(self.cache_dir):
+            return 0
+        now = time.time()
+        entries = []
+        removed = 0
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                # mtimeは最終アクセス時刻。TTLは作成時刻基準だが、
+                # 最終アクセスがTTLより古ければ作成時刻も必ずTTLより古い
+                if name.endswith(".tmp") or now - stat.st_mtime > self.ttl_seconds:
+                    os.remove(path)
+                    removed += 1
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            os.remove(path)
+            total -= size
+            removed += 1
+        return removed
+
+    def summary(self):
+        if self.mode == MODE_OFF:
+            return "💾 LLMキャッシュ: 無効"
+        label = "（リフレッシュ）" if self.mode == MODE_REFRESH else ""
+        return f"💾 LLMキャッシュ{label}: ヒット {self.hits}回 / ミス {self.misses}回"
+
+
+_cache = LLMCache()
+
+
+def configure(mode=MODE_ON, **kwargs):
+    """プロセス全体で使うキャッシュを設定"""
+    global _cache
+    _cache = LLMCache(mode=mode, **kwargs)
+    return _cache
+
+
+def get_cache():
+    return _cache
+
+
+def add_cache_arguments(parser):
+    """--no-cache / --refresh オプションを argparse に追加"""
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("--no-cache", dest="cache_mode", action="store_const", const=MODE_OFF, default=MODE_ON,
+                       help="LLMレスポンスキャッシュを使わない")
+    group.add_argument("--refresh", dest="cache_mode", action="store_const", const=MODE_REFRESH,
+                       help="キャッシュを読まずにAPIを呼び、結果でキャッシュを更新する")
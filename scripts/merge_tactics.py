@@ -1,15 +1,20 @@
 """
 新しい戦術データをai_tactics.jsonにマージする
 （situations.jsonはユーザーの経験則専用、ai_tactics.jsonはAI生成専用）
+新規分は data/segments/ に追記し、統合と古い月のアーカイブへの移動はコンパクションで行う
 """
+import argparse
 import json
 import os
+import sqlite3
 import sys
-from datetime import datetime
 
 # プロジェクトルートをパスに追加
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from scripts import tactics_store, tactics_db, search_index, telemetry
+import rendering
+
 
 def load_json_file(file_path):
     """JSONファイルを読み込む"""
@@ -24,13 +29,19 @@ def load_json_file(file_path):
         return []
 
 
-def merge_tactics():
-    """新しい戦術をAI戦術データにマージ"""
-    base_dir = os.path.dirname(os.path.dirname(__file__))
+def merge_tactics(compaction="auto", hot_months=tactics_store.HOT_MONTHS,
+                  retention_months=tactics_store.RETENTION_MONTHS):
+    """新しい戦術をAI戦術データにマージ
     
-    # AI生成戦術データを読み込む（situations.jsonではなくai_tactics.json）
-    existing_path = os.path.join(base_dir, "data", "ai_tactics.json")
-    existing_tactics = load_json_file(existing_path)
+    新規レコードは data/segments/ に追記するだけで、ai_tactics.json は書き換えない。
+    compaction:
+      "auto"   - セグメントが一定数たまったらスナップショットに統合
+      "always" - 毎回統合する
+      "never"  - 統合しない
+    統合時は直近 hot_months か月より古いレコードを月別パーティション（data/archive/）へ移し、
+    retention_months を指定した場合はそれより古いパーティションを削除する。
+    """
+    base_dir = os.path.dirname(os.path.dirname(__file__))
     
     # 新しい戦術を読み込む
     new_tactics_path = os.path.join(base_dir, "new_tactics.json")
@@ -38,37 +49,80 @@ def merge_tactics():
     
     if not new_tactics:
         print("警告: 新しい戦術データがありません")
-        return existing_tactics
     
-    # 既存のIDを取得（重複チェック用）
-    existing_ids = {tactic.get("id") for tactic in existing_tactics if tactic.get("id")}
+    return publish_tactics(new_tactics, compaction=compaction, hot_months=hot_months,
+                           retention_months=retention_months)
+
+
+def publish_tactics(new_tactics, compaction="auto", hot_months=tactics_store.HOT_MONTHS,
+                    retention_months=tactics_store.RETENTION_MONTHS):
+    """戦術をセグメントに追記し、検索インデックス・事前生成HTMLを更新して直近の月の全件を返す
+    
+    merge_tactics（new_tactics.json から）とパイプラインの常駐モード（1件ずつ）で共通。
+    """
+    if new_tactics:
+        # 新しい戦術をセグメントに追記（重複を避ける）
+        with telemetry.stage("publish.append"):
+            added_count, skipped = tactics_store.append_tactics(new_tactics)
+        for tactic_id in skipped:
+            print(f"⚠️ 重複をスキップ: {tactic_id}")
+        print(f"✅ マージ完了: {added_count}件の新しいAI戦術を追加しました")
+    
+    compacted = compaction == "always" or (compaction == "auto" and tactics_store.needs_compaction())
+    if compacted:
+        with telemetry.stage("publish.compact"):
+            tactics_store.compact(hot_months=hot_months, retention_months=retention_months)
     
-    # 新しい戦術を追加（重複を避ける）
-    added_count = 0
-    for tactic in new_tactics:
-        if tactic.get("id") and tactic["id"] not in existing_ids:
-            existing_tactics.append(tactic)
-            existing_ids.add(tactic["id"])
-            added_count += 1
-        else:
-            print(f"⚠️ 重複をスキップ: {tactic.get('id', 'N/A')}")
+    with telemetry.stage("publish.load"):
+        all_tactics = tactics_store.load_tactics(include_archive=False)
+        manifest = tactics_store.load_manifest()
+    archived = sum(partition["count"] for partition in manifest["partitions"])
+    print(f"   AI戦術総件数: {len(all_tactics) + archived}件（直近 {len(all_tactics)}件 + "
+          f"アーカイブ {archived}件/{len(manifest['partitions'])}か月）"
+          f"（未統合セグメント: {len(tactics_store.list_segments())}個）")
     
-    # 日付でソート（新しい順）
-    existing_tactics.sort(key=lambda x: x.get("date", ""), reverse=True)
+    # SQLiteバックエンド（DBファイルがある場合のみ）にも同じ内容を書き込む
+    if tactics_db.is_enabled():
+        with telemetry.stage("publish.sqlite"):
+            sync_database(new_tactics, all_tactics, manifest,
+                          prune=compacted and retention_months is not None)
     
-    # 最大500件に制限（AI生成は多くなりすぎる可能性があるため）
-    if len(existing_tactics) > 500:
-        existing_tactics = existing_tactics[:500]
-        print(f"⚠️ データが500件を超えたため、最新500件のみ保持します")
+    # 検索インデックス・事前生成HTMLには、まだ含まれていない（追記された）レコードだけを加える。
+    # コンパクションで直近の月とアーカイブの構成が変わったときは全件から作り直す
     
-    # 保存
-    with open(existing_path, "w", encoding="utf-8") as f:
-        json.dump(existing_tactics, f, ensure_ascii=False, indent=2)
+    # 検索インデックス（アーカイブを含む全期間。アプリは検索時にレコードを走査しない）
+    with telemetry.stage("publish.search_index"):
+        if compacted or search_index.update_and_save(all_tactics) is None:
+            search_index.build_and_save(tactics_store.load_tactics() if archived else all_tactics)
     
-    print(f"✅ マージ完了: {added_count}件の新しいAI戦術を追加しました")
-    print(f"   AI戦術総件数: {len(existing_tactics)}件")
+    # カードのHTMLを事前生成（トップページは保存済みのHTMLを並べるだけ。アーカイブの月はアプリが読み込み時に生成）
+    with telemetry.stage("publish.cards"):
+        rendering.build_and_save_card_fragments(all_tactics, incremental=not compacted)
     
-    return existing_tactics
+    # 記事本文の目次・アンカーを事前生成（記事ページは保存済みの結果を表示するだけ）
+    with telemetry.stage("publish.articles"):
+        rendering.build_and_save_article_renders(all_tactics, incremental=not compacted)
+    
+    return all_tactics
+
+
+def sync_database(new_tactics, hot_tactics, manifest, prune=False):
+    """追記したレコードをDBに反映し、prune=True なら保持期間外として削除された月をDBからも消す
+    
+    DBへの書き込みは1トランザクションずつで、失敗しても途中までの変更は残らない。
+    """
+    oldest_kept = None
+    if prune:
+        dates = [p["oldest"] for p in manifest["partitions"] if p.get("oldest")]
+        dates += [t["date"] for t in hot_tactics if tactics_store.record_month(t)]
+        oldest_kept = min(dates, default=None)
+    try:
+        added, removed = tactics_db.sync(new_tactics, oldest_kept)
+    except (sqlite3.Error, RuntimeError) as e:
+        print(f"⚠️ SQLiteへの書き込みに失敗しました（変更は取り消し済み）: {e}")
+        print("   python scripts/tactics_db.py import でJSONから作り直してください")
+        return
+    print(f"🗄️ SQLite: {added}件を追加" + (f" / 保持期間外の{removed}件を削除" if removed else ""))
 
 
 if __name__ == "__main__":
@@ -76,7 +130,20 @@ if __name__ == "__main__":
     print("戦術データのマージを開始します...")
     print("=" * 50)
     
-    result = merge_tactics()
+    parser = argparse.ArgumentParser(description="新しい戦術データをマージ")
+    parser.add_argument("--compact", dest="compaction", action="store_const", const="always", default="auto",
+                        help="セグメントをスナップショットに統合し、件数上限を適用する")
+    parser.add_argument("--no-compact", dest="compaction", action="store_const", const="never",
+                        help="セグメントへの追記のみ行う")
+    parser.add_argument("--hot-months", type=int, default=tactics_store.HOT_MONTHS,
+                        help="スナップショット（アプリが最初に読む範囲）に置く月数。古い月はアーカイブへ移す")
+    parser.add_argument("--retention-months", type=int, default=tactics_store.RETENTION_MONTHS,
+                        help="保持する月数（これより古いアーカイブを削除する。既定: 無期限）")
+    args = parser.parse_args()
+    
+    result = merge_tactics(compaction=args.compaction, hot_months=args.hot_months,
+                           retention_months=args.retention_months)
+    telemetry.write_report("merge_tactics")
     
     if result:
         print("=" * 50)
@@ -1,67 +1,60 @@
 """
-既存データにvisual_themeを追加し、image_pathを削除するマイグレーションスクリプト
+既存データのvisual_themeを付け直し、image_pathを削除するマイグレーションスクリプト
+テーマは analyst.py と同じルール表（scripts/visual_theme.py）で判定し、
+スナップショットとアーカイブの全パーティションを1回の走査でまとめて付け直す
+
+使い方:
+    python scripts/migrate_visual_theme.py            # 付け直して保存
+    python scripts/migrate_visual_theme.py --dry-run  # ルールごとの件数だけ表示
 """
-import json
+import argparse
 import os
+import sys
 
-# データファイルのパス
-data_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "ai_tactics.json")
+# プロジェクトルートをパスに追加
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-# テーマ設定
-GRADIENT_THEMES = [
-    {"gradient": "linear-gradient(135deg, #667eea 0%, #764ba2 100%)", "icon": "🤖"},
-    {"gradient": "linear-gradient(135deg, #f093fb 0%, #f5576c 100%)", "icon": "🧠"},
-    {"gradient": "linear-gradient(135deg, #4facfe 0%, #00f2fe 100%)", "icon": "💡"},
-    {"gradient": "linear-gradient(135deg, #43e97b 0%, #38f9d7 100%)", "icon": "⚡"},
-    {"gradient": "linear-gradient(135deg, #fa709a 0%, #fee140 100%)", "icon": "🔥"},
-    {"gradient": "linear-gradient(135deg, #a8edea 0%, #fed6e3 100%)", "icon": "✨"},
-    {"gradient": "linear-gradient(135deg, #5ee7df 0%, #b490ca 100%)", "icon": "🚀"},
-    {"gradient": "linear-gradient(135deg, #d299c2 0%, #fef9d7 100%)", "icon": "💎"},
-    {"gradient": "linear-gradient(135deg, #89f7fe 0%, #66a6ff 100%)", "icon": "🌐"},
-    {"gradient": "linear-gradient(135deg, #ffecd2 0%, #fcb69f 100%)", "icon": "🎯"},
-]
+from scripts import snapshot_codec, tactics_store
+from scripts.visual_theme import get_engine
 
-def get_visual_theme(item, index):
-    """タイトルに基づいてビジュアルテーマを決定"""
-    title = item.get("title", "").lower()
-    
-    if any(kw in title for kw in ["gpt", "openai", "chatgpt"]):
-        return {"gradient": "linear-gradient(135deg, #10a37f 0%, #1a7f5a 100%)", "icon": "🤖"}
-    elif any(kw in title for kw in ["gemini", "google", "bard"]):
-        return {"gradient": "linear-gradient(135deg, #4285f4 0%, #34a853 100%)", "icon": "✨"}
-    elif any(kw in title for kw in ["claude", "anthropic"]):
-        return {"gradient": "linear-gradient(135deg, #d4a27f 0%, #cc785c 100%)", "icon": "🧠"}
-    elif any(kw in title for kw in ["llama", "meta"]):
-        return {"gradient": "linear-gradient(135deg, #0668E1 0%, #1877f2 100%)", "icon": "🦙"}
-    elif any(kw in title for kw in ["code", "codex", "coding", "developer"]):
-        return {"gradient": "linear-gradient(135deg, #6366f1 0%, #8b5cf6 100%)", "icon": "💻"}
-    elif any(kw in title for kw in ["image", "vision"]):
-        return {"gradient": "linear-gradient(135deg, #ec4899 0%, #f43f5e 100%)", "icon": "🎨"}
-    elif any(kw in title for kw in ["agent", "lightning", "workflow"]):
-        return {"gradient": "linear-gradient(135deg, #f59e0b 0%, #ef4444 100%)", "icon": "🚀"}
-    elif any(kw in title for kw in ["promptions", "prompt", "ui"]):
-        return {"gradient": "linear-gradient(135deg, #0ea5e9 0%, #8b5cf6 100%)", "icon": "🎛️"}
-    elif any(kw in title for kw in ["nemotron", "nvidia"]):
-        return {"gradient": "linear-gradient(135deg, #76b900 0%, #1a1a1a 100%)", "icon": "⚡"}
-    elif any(kw in title for kw in ["apriel", "hugging"]):
-        return {"gradient": "linear-gradient(135deg, #FFD21E 0%, #FF9D00 100%)", "icon": "🤗"}
-    else:
-        return GRADIENT_THEMES[index % len(GRADIENT_THEMES)]
 
+def load_corpus(snapshot_path=tactics_store.SNAPSHOT_PATH):
+    """[(月, レコード)]: スナップショット（月は None）と全パーティション（新しい月から順）"""
+    files = [(None, tactics_store.read_snapshot(snapshot_path))]
+    for partition in tactics_store.load_manifest(snapshot_path)["partitions"]:
+        files.append((partition["month"], tactics_store.read_partition(partition["month"], snapshot_path)))
+    return files
 
-if __name__ == "__main__":
-    # データ読み込み
-    with open(data_path, "r", encoding="utf-8") as f:
-        data = json.load(f)
 
-    # visual_theme追加、image_path削除
-    for idx, item in enumerate(data):
-        item["visual_theme"] = get_visual_theme(item, idx)
-        if "image_path" in item:
-            del item["image_path"]
+def migrate(snapshot_path=tactics_store.SNAPSHOT_PATH, dry_run=False):
+    """全レコードのvisual_themeを付け直して保存し、(件数, ルール名ごとの件数) を返す"""
+    files = load_corpus(snapshot_path)
+    records = [record for _, file_records in files for record in file_records]
+    for record in records:
+        record.pop("image_path", None)
+    counts = get_engine().apply(records)
 
-    # 保存
-    with open(data_path, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    if not dry_run:
+        for month, file_records in files:
+            if month is not None:
+                tactics_store.write_partition(month, file_records, snapshot_path)
+            elif file_records or os.path.exists(snapshot_path):
+                tactics_store.write_json_atomic(snapshot_path, file_records, indent=2)
+                snapshot_codec.write_binary_snapshot(file_records, snapshot_path)
+    return len(records), counts
 
-    print(f"✅ {len(data)}件のデータにvisual_themeを追加しました")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="既存データのvisual_themeを付け直す")
+    parser.add_argument("--dry-run", action="store_true", help="保存せずにルールごとの件数だけ表示する")
+    args = parser.parse_args()
+
+    total, counts = migrate(dry_run=args.dry_run)
+    for name, count in counts.most_common():
+        print(f"   {name}: {count}件")
+    if tactics_store.list_segments():
+        print("⚠️ 未統合のセグメントは対象外です（python scripts/merge_tactics.py --compact の後に実行してください）")
+    if args.dry_run:
+        print(f"🔍 {total}件を判定しました（保存していません）")
+    else:
+        print(f"✅ {total}件のデータにvisual_themeを追加しました")
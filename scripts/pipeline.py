@@ -0,0 +1,307 @@
+"""
+収集 → 戦術生成 → 公開 を1つのプロセスで流すパイプライン
+
+collector.py / analyst.py / merge_tactics.py を別プロセスで順に実行し news_raw.json・new_tactics.json を
+受け渡す代わりに、3つの段階をスレッドでつなぎ、上限付きのキューで受け渡す。
+
+- 収集: フィードを取得（条件付きGET・接続を使い回す）し、処理済みを除いてLLMで選定する
+- 生成: 複数のワーカーが1件ずつ戦術・記事を生成する（Gemini/Claudeのクライアントは全ワーカーで共有）
+- 公開: 生成できた戦術から順にセグメントへ追記し、検索インデックス・事前生成HTMLを更新する
+
+キューがいっぱいになると前の段階が待つ（生成が追いつかない間に収集が先へ進みすぎない）。
+
+使い方:
+    python scripts/pipeline.py                     # 1回だけ実行（収集したニュースを全て公開したら終了）
+    python scripts/pipeline.py --daemon            # 常駐: 15分ごとにフィードを確認し、生成できた戦術をすぐ公開
+    python scripts/pipeline.py --daemon --interval 300 --workers 3 --article-mode stream
+"""
+import argparse
+import os
+import queue
+import signal
+import sys
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+# プロジェクトルートをパスに追加
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import requests
+
+from scripts import analyst, article_stream, collector, llm_cache, merge_tactics, telemetry
+from scripts.dedup_index import DedupIndex, normalize_url
+
+JST = timezone(timedelta(hours=9))
+
+# 常駐モードでフィードを確認する間隔（秒）
+POLL_INTERVAL = 15 * 60
+
+# 1回の確認で選定するニュースの最大件数
+MAX_NEWS_PER_POLL = 3
+
+# 段階間のキューの長さ（ワーカー数あたり）
+QUEUE_SIZE_PER_WORKER = 2
+
+# 公開をまとめる最大件数（同時に生成し終わった分は1回の更新で公開する）
+PUBLISH_BATCH_MAX = 10
+
+# キューの終わりを表す目印
+_DONE = object()
+
+
+class Pipeline:
+    """収集・生成・公開の3段階をスレッドとキューでつないだパイプライン"""
+
+    def __init__(self, gemini_client, claude_client=None, workers=2, article_mode="sync", tactic_batch=False,
+                 feeds=None, state_path=collector.FEED_STATE_PATH, dedup_index=None, publish=None,
+                 max_news=MAX_NEWS_PER_POLL, report_dir=None, history_path=telemetry.HISTORY_PATH):
+        self.gemini_client = gemini_client
+        self.claude_client = claude_client
+        self.workers = max(1, workers)
+        self.article_mode = article_mode
+        self.tactic_batch = tactic_batch
+        self.feeds = feeds
+        self.state_path = state_path
+        self.dedup_index = dedup_index if dedup_index is not None else DedupIndex.load()
+        self.publish = publish or merge_tactics.publish_tactics
+        self.max_news = max_news
+        # 常駐モードでは公開のたびに計測レポート（JSON・Prometheus textfile）を更新する（None なら既定の場所）
+        self.report_dir = report_dir
+        self.history_path = history_path
+
+        # フィードの取得は1つのセッション（接続プール）を使い回す
+        self.session = requests.Session()
+        self.news_queue = queue.Queue(maxsize=self.workers * QUEUE_SIZE_PER_WORKER)
+        self.publish_queue = queue.Queue(maxsize=self.workers * QUEUE_SIZE_PER_WORKER)
+        self.stop_event = threading.Event()
+
+        # 処理中（公開前）のニュースのURL。次の確認で同じニュースを取り込まないようにする
+        self._in_flight = set()
+        # 前回の確認でLLMに選定を依頼した候補（304のフィードは前回のエントリを返すため、同じ候補なら選定し直さない）
+        self._last_candidates = None
+        self._last_run_at = None
+        self._dedup_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.stats = {"polls": 0, "collected": 0, "generated": 0, "failed": 0, "published": 0}
+        self.publish_latencies = []
+        self._started = None
+        self.first_publish_s = None
+
+    def stop(self):
+        """新しい収集をやめ、処理中のニュースを公開してから終了する"""
+        if not self.stop_event.is_set():
+            print("\n🛑 停止要求を受け付けました（処理中のニュースを公開してから終了します）")
+        self.stop_event.set()
+
+    def _count(self, key, amount=1):
+        with self._stats_lock:
+            self.stats[key] += amount
+
+    # --- 収集 ---
+
+    def collect_once(self):
+        """フィードを1回確認し、新しいニュースを (ニュース, 番号, 件数, 実行ID, 日付, 戦術データ) で返す"""
+        if self.stats["polls"]:
+            # 常駐中は確認ごとに計測の区間を切り替える（前回の確認からの分をレポート・履歴に書き出して空にする）
+            telemetry.get_telemetry().rollover("pipeline", report_dir=self.report_dir,
+                                               history_path=self.history_path)
+        self._count("polls")
+        with telemetry.stage("rss_fetch"):
+            entries = collector.fetch_rss_entries(feeds=self.feeds, state_path=self.state_path, session=self.session)
+        if not entries:
+            return []
+
+        with self._dedup_lock:
+            fresh_entries = [entry for entry in entries
+                             if normalize_url(entry["url"]) not in self._in_flight
+                             and not self.dedup_index.find_duplicate(entry["url"], entry["title"])]
+        if not fresh_entries:
+            print("📭 新しいニュースはありませんでした")
+            return []
+        candidates = {normalize_url(entry["url"]) for entry in fresh_entries}
+        if candidates == self._last_candidates:
+            print("📭 前回から候補が変わっていないため選定を省略しました")
+            return []
+        self._last_candidates = candidates
+
+        with telemetry.stage("news_selection"):
+            selected = collector.filter_ai_news_with_llm(self.gemini_client, fresh_entries, max_news=self.max_news)
+        news_items = [collector.build_news_item(entry) for entry in selected]
+        with self._dedup_lock:
+            news_items = analyst.filter_new_news(news_items, self.dedup_index, self._in_flight)
+            self._in_flight.update(normalize_url(news["url"]) for news in news_items)
+        if not news_items:
+            return []
+
+        # IDと日付は確認ごとの開始時刻から決める（analyst.py と同じ形式）
+        # 同じ秒に2回目の確認が生成に進んだ場合は1秒ずらし、戦術IDが重ならないようにする
+        started = datetime.now(JST).replace(microsecond=0)
+        if self._last_run_at and started <= self._last_run_at:
+            started = self._last_run_at + timedelta(seconds=1)
+        self._last_run_at = started
+        run_id = started.strftime("%Y%m%d_%H%M%S")
+        run_date = started.strftime("%Y-%m-%d")
+        prefetched = {}
+        if self.tactic_batch:
+            with telemetry.stage("tactic_generation"):
+                prefetched = analyst.analyze_news_batch(self.gemini_client, news_items)
+        self._count("collected", len(news_items))
+        return [(news, idx, len(news_items), run_id, run_date, prefetched.get(idx))
+                for idx, news in enumerate(news_items, 1)]
+
+    def _collect_loop(self, once, interval):
+        try:
+            while not self.stop_event.is_set():
+                try:
+                    work = self.collect_once()
+                except Exception as e:
+                    print(f"⚠️ 収集エラー: {str(e)[:80]}")
+                    work = []
+                for item in work:
+                    # キューがいっぱいの間はここで待つ（生成が追いつくまで収集を進めない）
+                    self.news_queue.put((time.monotonic(), item))
+                if once:
+                    break
+                self.stop_event.wait(interval)
+        finally:
+            for _ in range(self.workers):
+                self.news_queue.put(_DONE)
+
+    # --- 生成 ---
+
+    def _analyze_loop(self):
+        while True:
+            message = self.news_queue.get()
+            if message is _DONE:
+                return
+            queued_at, (news, idx, total, run_id, run_date, tactic_data) = message
+            try:
+                tactic = analyst.build_tactic(self.gemini_client, self.claude_client, news, idx, total,
+                                              run_id, run_date, self.article_mode, tactic_data=tactic_data)
+            except Exception as e:
+                print(f"⚠️ 戦術生成エラー: {str(e)[:80]}")
+                tactic = None
+            if tactic is None:
+                self._count("failed")
+                with self._dedup_lock:
+                    self._in_flight.discard(normalize_url(news["url"]))
+                continue
+            self._count("generated")
+            self.publish_queue.put((queued_at, news, tactic))
+
+    # --- 公開 ---
+
+    def _publish_loop(self):
+        done = False
+        while not done:
+            batch = [self.publish_queue.get()]
+            # 同時に生成し終わった分はまとめて公開する（待たずに取れる分だけ）
+            while len(batch) < PUBLISH_BATCH_MAX:
+                try:
+                    batch.append(self.publish_queue.get_nowait())
+                except queue.Empty:
+                    break
+            done = any(message is _DONE for message in batch)
+            batch = [message for message in batch if message is not _DONE]
+            if batch:
+                self._publish_batch(batch)
+
+    def _publish_batch(self, batch):
+        tactics = [tactic for _, _, tactic in batch]
+        try:
+            self.publish(tactics)
+        except Exception as e:
+            print(f"❌ 公開エラー: {str(e)[:80]}")
+            with self._dedup_lock:
+                for _, news, _ in batch:
+                    self._in_flight.discard(normalize_url(news["url"]))
+            return
+
+        now = time.monotonic()
+        with self._dedup_lock:
+            for _, news, tactic in batch:
+                self.dedup_index.add(news.get("url", ""), news.get("title", ""), news.get("original_title", ""),
+                                     tactic_id=tactic["id"], seen_at=tactic["date"])
+                self._in_flight.discard(normalize_url(news["url"]))
+            self.dedup_index.save()
+        with self._stats_lock:
+            self.stats["published"] += len(batch)
+            self.publish_latencies.extend(now - queued_at for queued_at, _, _ in batch)
+            if self.first_publish_s is None:
+                self.first_publish_s = now - self._started
+        for _, _, tactic in batch:
+            print(f"📣 公開: {tactic['id']} {tactic.get('title', 'N/A')[:40]}")
+        # 履歴への追記は区間の切り替え時と終了時だけ（公開のたびにはレポートを上書きする）
+        telemetry.get_telemetry().write_report("pipeline", report_dir=self.report_dir, history=False)
+
+    # --- 実行 ---
+
+    def run(self, once=True, interval=POLL_INTERVAL):
+        """パイプラインを実行（once=False なら stop() が呼ばれるまで interval 秒ごとに収集する）"""
+        self._started = time.monotonic()
+        collector_thread = threading.Thread(target=self._collect_loop, args=(once, interval), name="collect")
+        analyze_threads = [threading.Thread(target=self._analyze_loop, name=f"analyze-{i}")
+                           for i in range(self.workers)]
+        publish_thread = threading.Thread(target=self._publish_loop, name="publish")
+        for thread in [collector_thread, *analyze_threads, publish_thread]:
+            thread.start()
+
+        # join はタイムアウト付きで待つ（メインスレッドでシグナルを受け取れるように）
+        for thread in [collector_thread, *analyze_threads]:
+            while thread.is_alive():
+                thread.join(0.5)
+        self.publish_queue.put(_DONE)
+        while publish_thread.is_alive():
+            publish_thread.join(0.5)
+        self.session.close()
+        return self.stats
+
+    def summary(self):
+        stats = self.stats
+        lines = [f"📊 パイプライン: 確認 {stats['polls']}回 / 収集 {stats['collected']}件 / "
+                 f"生成 {stats['generated']}件（失敗 {stats['failed']}件） / 公開 {stats['published']}件"]
+        if self.publish_latencies:
+            average = sum(self.publish_latencies) / len(self.publish_latencies)
+            lines.append(f"   収集から公開まで: 平均 {average:.1f}秒 / 最初の公開は開始から {self.first_publish_s:.1f}秒")
+        return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    print("=" * 50)
+    print("🔁 収集 → 戦術生成 → 公開 パイプライン")
+    print("=" * 50)
+
+    parser = argparse.ArgumentParser(description="収集・戦術生成・公開を1つのプロセスで実行")
+    parser.add_argument("--daemon", action="store_true",
+                        help="常駐して定期的にフィードを確認し、生成できた戦術をすぐ公開する")
+    parser.add_argument("--interval", type=int, default=POLL_INTERVAL,
+                        help="常駐モードでフィードを確認する間隔（秒）")
+    parser.add_argument("--workers", type=int, default=2, help="同時に戦術を生成する件数")
+    parser.add_argument("--article-mode", choices=("sync", "stream"), default="sync",
+                        help="記事生成の方式（パイプラインでは1件ずつ生成するため batch は使えない）")
+    parser.add_argument("--tactic-batch", action="store_true",
+                        help="確認ごとに戦術データをまとめて1回のGemini呼び出しで生成する")
+    llm_cache.add_cache_arguments(parser)
+    args = parser.parse_args()
+    cache = llm_cache.configure(mode=args.cache_mode)
+
+    gemini_client, claude_client = analyst.create_clients()
+    if gemini_client is None:
+        sys.exit(1)
+
+    pipeline = Pipeline(gemini_client, claude_client, workers=args.workers, article_mode=args.article_mode,
+                        tactic_batch=args.tactic_batch)
+    if args.daemon:
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(sig, lambda *_: pipeline.stop())
+        print(f"⏱️ {args.interval}秒ごとにフィードを確認します（Ctrl+C で停止）")
+
+    pipeline.run(once=not args.daemon, interval=args.interval)
+
+    print(pipeline.summary())
+    if args.article_mode == "stream":
+        print(article_stream.get_metrics().summary())
+    print(cache.summary())
+    cache.prune()
+    telemetry.write_report("pipeline")
@@ -0,0 +1,103 @@
+"""
+LLMプロバイダごとの同時実行数制限とトークンバケット方式のレート制限
+（固定sleepの代わりに使用）
+"""
+import threading
+import time
+
+
+class TokenBucket:
+    """トークンバケット方式のレートリミッタ（スレッドセーフ）"""
+
+    def __init__(self, rate_per_minute, capacity=None):
+        self.rate = rate_per_minute / 60.0  # 1秒あたりの補充量
+        self.capacity = capacity if capacity is not None else max(1, int(rate_per_minute // 6))
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, tokens=1):
+        """トークンが取得できるまで待機し、待機した秒数を返す"""
+        waited = 0.0
+        while True:
+            with self._lock:
+                self._refill()
+                paused = self._paused_until - time.monotonic()
+                if paused > 0:
+                    wait_time = paused
+                elif self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return waited
+                else:
+                    wait_time = (tokens - self._tokens) / self.rate
+            time.sleep(wait_time)
+            waited += wait_time
+
+    def pause(self, seconds):
+        """seconds 秒間はトークンを払い出さない（429の Retry-After に従うため）"""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+
+class ProviderLimiter:
+    """同時実行数（セマフォ）とレート（トークンバケット）をまとめて制御する
+
+    使い方:
+        with GEMINI_LIMITER:
+            client.models.generate_content(...)
+    """
+
+    def __init__(self, name, max_concurrency, rate_per_minute, burst=None):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self._semaphore = threading.BoundedSemaphore(max_concurrency)
+        self._bucket = TokenBucket(rate_per_minute, capacity=burst)
+
+    def __enter__(self):
+        self._semaphore.acquire()
+        try:
+            self._bucket.acquire()
+        except BaseException:
+            self._semaphore.release()
+            raise
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._semaphore.release()
+        return False
+
+    def pause(self, seconds):
+        """プロバイダへの新しい呼び出しを seconds 秒間止める"""
+        self._bucket.pause(seconds)
+
+
+# プロバイダごとの既定値（無料枠・Tier1相当の控えめな設定）
+PROVIDER_LIMITS = {
+    "gemini": {"max_concurrency": 4, "rate_per_minute": 10, "burst": 4},
+    "claude": {"max_concurrency": 3, "rate_per_minute": 40, "burst": 3},
+}
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(provider):
+    """プロバイダ名に対応する共有リミッタを取得（プロセス内で1つ）"""
+    with _limiters_lock:
+        if provider not in _limiters:
+            limits = PROVIDER_LIMITS[provider]
+            _limiters[provider] = ProviderLimiter(provider, **limits)
+        return _limiters[provider]
+
+
+def configure(provider, **limits):
+    """プロバイダの制限値を変更してリミッタを作り直す（検証・デモ用）"""
+    with _limiters_lock:
+        _limiters[provider] = ProviderLimiter(provider, **{**PROVIDER_LIMITS[provider], **limits})
+        return _limiters[provider]
@@ -0,0 +1,289 @@
+"""
+LLM呼び出しのリトライ・タイムアウト・サーキットブレーカー（Gemini / Claude 共通）
+
+- 一時的なエラー（5xx・過負荷・タイムアウト・接続断）は指数バックオフ + ジッターで再試行
+- 429 は Retry-After / retry-after-ms ヘッダーや Gemini の RetryInfo（retryDelay）に従って待ち、
+  同じプロバイダのレートリミッタも止めて他のスレッドが続けて429を受けないようにする
+- 1回の呼び出し（全試行の合計）に期限を設け、各試行のタイムアウトは残り時間以内にする
+- 一時的なエラーが続いたプロバイダはサーキットブレーカーを開き、一定時間はAPIを呼ばずに即座に失敗させる
+- 400・認証エラーなど再試行しても変わらないエラーはそのまま送出する
+
+使い方:
+    text = resilience.call("gemini", lambda timeout: client.models.generate_content(...))
+"""
+import email.utils
+import random
+import re
+import threading
+import time
+
+from scripts import telemetry
+from scripts.rate_limit import PROVIDER_LIMITS, get_limiter
+
+try:
+    import httpx
+    _HTTPX_ERRORS = (httpx.TransportError,)
+except ImportError:
+    _HTTPX_ERRORS = ()
+
+try:
+    import anthropic
+    _ANTHROPIC_ERRORS = (anthropic.APIConnectionError,)
+except ImportError:
+    _ANTHROPIC_ERRORS = ()
+
+try:
+    import requests
+    _REQUESTS_ERRORS = (requests.ConnectionError, requests.Timeout)
+except ImportError:
+    _REQUESTS_ERRORS = ()
+
+# タイムアウト・接続断など、再試行すれば成功しうる例外
+TRANSIENT_EXCEPTIONS = (TimeoutError, ConnectionError) + _HTTPX_ERRORS + _ANTHROPIC_ERRORS + _REQUESTS_ERRORS
+
+# 再試行するHTTPステータス（429は別扱い。529はAnthropicの過負荷）
+TRANSIENT_STATUS = {408, 409, 500, 502, 503, 504, 529}
+
+# エラーの分類
+RATE_LIMITED = "rate_limited"
+TRANSIENT = "transient"
+FATAL = "fatal"
+
+
+class RetryPolicy:
+    """再試行の回数・待ち時間・期限"""
+
+    def __init__(self, max_attempts=4, base_delay=2.0, max_delay=30.0, attempt_timeout=60.0, deadline=180.0,
+                 failure_threshold=5, reset_timeout=60.0):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.attempt_timeout = attempt_timeout
+        self.deadline = deadline
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+
+    def backoff(self, attempt):
+        """attempt 回目（0始まり）の失敗後の待ち時間（指数バックオフ・フルジッター）"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+
+# プロバイダごとの既定値（Claudeの記事生成は長いので1回あたりの時間を長めにする）
+PROVIDER_POLICIES = {
+    "gemini": {"max_attempts": 4, "base_delay": 2.0, "max_delay": 30.0, "attempt_timeout": 60.0, "deadline": 180.0},
+    "claude": {"max_attempts": 3, "base_delay": 5.0, "max_delay": 60.0, "attempt_timeout": 300.0, "deadline": 900.0},
+}
+
+
+class ResilienceError(Exception):
+    """再試行の仕組みが呼び出しを打ち切った"""
+
+
+class CircuitOpenError(ResilienceError):
+    """サーキットブレーカーが開いているため呼び出さなかった"""
+
+
+class DeadlineExceeded(ResilienceError):
+    """呼び出しの期限までに成功しなかった"""
+
+
+class CircuitBreaker:
+    """プロバイダごとのサーキットブレーカー（スレッドセーフ）
+
+    一時的なエラーが failure_threshold 回続くと開き、reset_timeout 秒間は即座に失敗させる。
+    その後は1回だけ試しに呼び出し（半開）、成功すれば閉じ、失敗すればまた開く。
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name, failure_threshold=5, reset_timeout=60.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.rejected = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def before_call(self):
+        """呼び出してよいか確認（開いていれば CircuitOpenError）"""
+        with self._lock:
+            if self.state == self.OPEN:
+                remaining = self._opened_at + self.reset_timeout - time.monotonic()
+                if remaining > 0:
+                    self.rejected += 1
+                    raise CircuitOpenError(f"{self.name} は停止中とみなして呼び出しません（あと{remaining:.1f}秒）")
+                self.state = self.HALF_OPEN
+                self._trial_in_flight = False
+            if self.state == self.HALF_OPEN:
+                if self._trial_in_flight:
+                    self.rejected += 1
+                    raise CircuitOpenError(f"{self.name} は復旧を確認中のため呼び出しません")
+                self._trial_in_flight = True
+
+    def record_success(self):
+        with self._lock:
+            if self.state != self.CLOSED:
+                print(f"  🟢 {self.name}: 復旧を確認しました（サーキットブレーカーを閉じます）")
+            self.state = self.CLOSED
+            self.failures = 0
+            self._trial_in_flight = False
+
+    def release_trial(self):
+        """状態は変えずに、半開での試しの呼び出しを終えたことにする（レート制限・要求側のエラーなど）"""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial_in_flight = False
+            if self.state == self.HALF_OPEN or (self.state == self.CLOSED and self.failures >= self.failure_threshold):
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+                print(f"  🔴 {self.name}: 一時的なエラーが{self.failures}回続いたため"
+                      f"{self.reset_timeout:g}秒間呼び出しを止めます")
+
+
+_policies = {}
+_breakers = {}
+_registry_lock = threading.Lock()
+
+
+def get_policy(provider):
+    """プロバイダ名に対応する再試行の設定"""
+    with _registry_lock:
+        if provider not in _policies:
+            _policies[provider] = RetryPolicy(**PROVIDER_POLICIES.get(provider, {}))
+        return _policies[provider]
+
+
+def get_breaker(provider):
+    """プロバイダ名に対応する共有のサーキットブレーカー（プロセス内で1つ）"""
+    policy = get_policy(provider)
+    with _registry_lock:
+        if provider not in _breakers:
+            _breakers[provider] = CircuitBreaker(provider, policy.failure_threshold, policy.reset_timeout)
+        return _breakers[provider]
+
+
+def configure(provider, **settings):
+    """プロバイダの再試行の設定を変更し、サーキットブレーカーを作り直す（検証・デモ用）"""
+    with _registry_lock:
+        _policies[provider] = RetryPolicy(**{**PROVIDER_POLICIES.get(provider, {}), **settings})
+        _breakers.pop(provider, None)
+    return _policies[provider]
+
+
+def _status_code(exc):
+    for attr in ("status_code", "code"):
+        value = getattr(exc, attr, None)
+        if isinstance(value, int):
+            return value
+    return None
+
+
+def _parse_seconds(value):
+    """Retry-After の値（秒数またはHTTP日付）を秒に変換"""
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        pass
+    try:
+        return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def retry_after_seconds(exc):
+    """例外に含まれるサーバー指定の待ち時間（秒）。なければ None"""
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    if headers.get("retry-after-ms"):
+        try:
+            return max(0.0, float(headers["retry-after-ms"]) / 1000)
+        except ValueError:
+            pass
+    if headers.get("retry-after"):
+        seconds = _parse_seconds(headers["retry-after"])
+        if seconds is not None:
+            return seconds
+    # Gemini は RetryInfo の retryDelay（"17s" など）で返す
+    details = getattr(exc, "details", None)
+    error = details.get("error", details) if isinstance(details, dict) else {}
+    for detail in error.get("details", []) if isinstance(error, dict) else []:
+        match = re.fullmatch(r"([\d.]+)s", str(detail.get("retryDelay", ""))) if isinstance(detail, dict) else None
+        if match:
+            return float(match.group(1))
+    return None
+
+
+def classify(exc):
+    """例外を (分類, サーバー指定の待ち時間) に分ける"""
+    status = _status_code(exc)
+    if status == 429:
+        return RATE_LIMITED, retry_after_seconds(exc)
+    if status in TRANSIENT_STATUS or (status is not None and status >= 500):
+        return TRANSIENT, retry_after_seconds(exc)
+    if status is None and isinstance(exc, TRANSIENT_EXCEPTIONS):
+        return TRANSIENT, None
+    return FATAL, None
+
+
+def call(provider, fn, policy=None, deadline=None):
+    """fn(timeout) を再試行・期限・サーキットブレーカー付きで呼び出す
+
+    timeout は今回の試行に使ってよい秒数（1回あたりの上限と期限までの残り時間の短い方）。
+    deadline を省略した場合はプロバイダの既定の期限を使う。
+    """
+    policy = policy or get_policy(provider)
+    breaker = get_breaker(provider)
+    expires = time.monotonic() + (deadline if deadline is not None else policy.deadline)
+
+    recorder = telemetry.get_telemetry()
+    for attempt in range(policy.max_attempts):
+        # 期限切れの確認はブレーカーより先に行う（試しの呼び出しの枠を取ったまま抜けないように）
+        remaining = expires - time.monotonic()
+        if remaining <= 0:
+            raise DeadlineExceeded(f"{provider} の呼び出しが期限内に終わりませんでした")
+        try:
+            breaker.before_call()
+        except CircuitOpenError:
+            recorder.note_rejection(provider)
+            raise
+        recorder.note_attempt(provider)
+        try:
+            result = fn(min(policy.attempt_timeout, remaining))
+        except Exception as e:
+            kind, retry_after = classify(e)
+            if kind == TRANSIENT:
+                breaker.record_failure()
+            else:
+                # 429・要求側のエラーはプロバイダの障害ではないので、ブレーカーの状態は変えずに
+                # 試しの呼び出しの枠だけ空ける（半開のまま次の呼び出しで復旧を確認する）
+                breaker.release_trial()
+            if kind == FATAL:
+                raise
+            if kind == RATE_LIMITED and retry_after is not None and provider in PROVIDER_LIMITS:
+                # 他のスレッドも同じプロバイダを呼ばないよう、リミッタごと止める
+                get_limiter(provider).pause(retry_after)
+            wait_time = retry_after if retry_after is not None else policy.backoff(attempt)
+            label = "レート制限" if kind == RATE_LIMITED else "一時的なエラー"
+            if attempt == policy.max_attempts - 1:
+                raise
+            if time.monotonic() + wait_time >= expires:
+                raise DeadlineExceeded(
+                    f"{provider} の{label}: 期限までに再試行できません（待ち時間 {wait_time:.1f}秒）"
+                ) from e
+            print(f"  ⏳ {provider} の{label} (試行 {attempt + 1}/{policy.max_attempts}): "
+                  f"{str(e)[:80]} → {wait_time:.1f}秒後に再試行")
+            recorder.note_retry(provider, kind)
+            time.sleep(wait_time)
+        else:
+            breaker.record_success()
+            return result
+
@@ -0,0 +1,249 @@
+"""
+AI戦術データの転置インデックス
+マージ時に構築して data/search_index.json に保存し、アプリからはクエリ時に
+全レコードを走査せずにインデックスだけで検索する
+
+トークナイズ:
+  - 英数字は単語単位（小文字化）。"gpt-5.6" のような記号つなぎの語は、連続する部分の組み合わせ
+    （"gpt-5" "5.6" "gpt" "5" "6"）も索引に入れ、"gpt-5" の検索で "GPT-5.6" も引けるようにする
+  - 日本語などそれ以外の文字は文字2-gram（1文字だけの連なりは1-gram）
+
+使い方:
+    python scripts/search_index.py             # 現在のデータからインデックスを再構築
+    python scripts/search_index.py "Claude レビュー"  # 検索を試す
+"""
+import json
+import os
+import re
+import sys
+import unicodedata
+from collections import defaultdict
+
+# プロジェクトルートをパスに追加
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts import tactics_store
+
+INDEX_PATH = os.path.join(tactics_store.BASE_DIR, "data", "search_index.json")
+
+# 検索対象フィールドと重み（スコア順の並び替えに使用）
+FIELD_WEIGHTS = {
+    "title": 5,
+    "tags": 4,
+    "news_highlight": 3,
+    "problem_context": 3,
+    "use_cases": 2,
+    "prompt": 1,
+}
+
+_WORD_RE = re.compile(r"[a-z0-9]+(?:[.\-+#][a-z0-9]+)*|[^\sa-z0-9]+")
+_PART_RE = re.compile(r"[a-z0-9]+")
+_SEPARATORS = set("、。・,.!?！？「」『』()（）[]【】:：;；/\"'“”‘’〜~-_=+*&%$#@^|<>{}`")
+
+
+def tokenize(text):
+    """テキストを検索トークンのリストに変換"""
+    text = unicodedata.normalize("NFKC", text or "").lower()
+    tokens = []
+    for chunk in _WORD_RE.findall(text):
+        if chunk[0].isascii() and chunk[0].isalnum():
+            tokens.append(chunk)
+            # "gpt-5.2" は "gpt-5" "5.2" "gpt" "5" "2" でも引けるようにする（連続する部分をつないだもの全て）
+            parts = [match.span() for match in _PART_RE.finditer(chunk)]
+            for first in range(len(parts)):
+                for last in range(first, len(parts)):
+                    if (first, last) != (0, len(parts) - 1):
+                        tokens.append(chunk[parts[first][0]:parts[last][1]])
+            continue
+        # 記号で区切ってから2-gram化
+        run = []
+        for ch in chunk + " ":
+            if ch in _SEPARATORS or ch.isspace():
+                if len(run) == 1:
+                    tokens.append(run[0])
+                else:
+                    tokens.extend(run[i] + run[i + 1] for i in range(len(run) - 1))
+                run = []
+            else:
+                run.append(ch)
+    return tokens
+
+
+def _field_text(record, field):
+    value = record.get(field)
+    if isinstance(value, list):
+        return " ".join(str(v) for v in value)
+    return str(value or "")
+
+
+def _record_scores(record):
+    """レコード1件のトークン → スコア（出現順。set の順序に頼らず、同じデータからは同じファイルを作る）"""
+    scores = defaultdict(int)
+    for field, weight in FIELD_WEIGHTS.items():
+        for token in dict.fromkeys(tokenize(_field_text(record, field))):
+            scores[token] += weight
+    return scores
+
+
+def build_index(tactics):
+    """転置インデックスを構築
+
+    postings: トークン → {文書番号: スコア}
+    dates: 文書番号順の日付（同じスコアのレコードを日付の新しい順に並べるのに使う）
+    """
+    ids = []
+    dates = []
+    postings = defaultdict(dict)
+    tags = defaultdict(list)
+    for position, record in enumerate(tactics):
+        ids.append(record.get("id", ""))
+        dates.append(record.get("date", ""))
+        for token, score in _record_scores(record).items():
+            postings[token][position] = score
+        for tag in record.get("tags") or []:
+            tags[tag].append(position)
+    return {
+        "version": 1,
+        "ids": ids,
+        "dates": dates,
+        # JSONサイズを抑えるため "文書番号:スコア" をカンマ区切りで保存
+        "postings": {
+            token: ",".join(f"{doc}:{score}" for doc, score in sorted(docs.items()))
+            for token, docs in postings.items()
+        },
+        "tags": dict(tags),
+    }
+
+
+def build_and_save(tactics, index_path=INDEX_PATH):
+    index = build_index(tactics)
+    tactics_store.write_json_atomic(index_path, index, separators=(",", ":"))
+    print(f"🔎 検索インデックスを更新しました: {len(index['ids'])}件 / {len(index['postings'])}トークン")
+    return index
+
+
+def add_to_index(index, tactics):
+    """インデックスにないIDのレコードだけを末尾の文書番号で追加する（既存の postings は書き換えない）
+
+    戻り値: 追加した件数
+    """
+    known = set(index["ids"])
+    added = 0
+    for record in tactics:
+        tactic_id = record.get("id")
+        if not tactic_id or tactic_id in known:
+            continue
+        known.add(tactic_id)
+        position = len(index["ids"])
+        index["ids"].append(tactic_id)
+        index["dates"].append(record.get("date", ""))
+        for token, score in _record_scores(record).items():
+            # 文書番号は既存のどれよりも大きいので、末尾に足しても番号順のまま
+            existing = index["postings"].get(token)
+            index["postings"][token] = f"{existing},{position}:{score}" if existing else f"{position}:{score}"
+        for tag in record.get("tags") or []:
+            index["tags"].setdefault(tag, []).append(position)
+        added += 1
+    return added
+
+
+def update_and_save(tactics, index_path=INDEX_PATH):
+    """保存済みのインデックスにないレコードだけを追加して保存
+
+    インデックスがない（日付を持たない古い形式を含む）場合は None を返す（呼び出し側で全件から作り直す）。
+    """
+    try:
+        with open(index_path, "r", encoding="utf-8") as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if "dates" not in index:
+        return None
+    added = add_to_index(index, tactics)
+    if added:
+        tactics_store.write_json_atomic(index_path, index, separators=(",", ":"))
+    print(f"🔎 検索インデックスに追加しました: {added}件（合計 {len(index['ids'])}件）")
+    return index
+
+
+class SearchIndex:
+    """保存済みインデックスに対する検索"""
+
+    def __init__(self, data):
+        self.ids = data.get("ids", [])
+        self._raw_postings = data.get("postings", {})
+        self._postings = {}
+        self.tags = data.get("tags", {})
+        # 日付の新しい順の文書番号（追記したレコードは末尾の番号になるため、番号順が日付順とは限らない）
+        dates = data.get("dates")
+        self._order = list(range(len(self.ids)))
+        if dates:
+            self._order.sort(key=lambda doc: dates[doc], reverse=True)
+        self._rank = [0] * len(self.ids)
+        for rank, doc in enumerate(self._order):
+            self._rank[doc] = rank
+
+    @classmethod
+    def load(cls, index_path=INDEX_PATH):
+        with open(index_path, "r", encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def _decode(self, token):
+        # 使われたトークンだけ遅延デコードする
+        if token not in self._postings:
+            raw = self._raw_postings.get(token)
+            docs = {}
+            if raw:
+                for pair in raw.split(","):
+                    doc, score = pair.split(":")
+                    docs[int(doc)] = int(score)
+            self._postings[token] = docs
+        return self._postings[token]
+
+    def _get_postings(self, token):
+        if token.isascii() or len(token) != 1:
+            return self._decode(token)
+        # 日本語1文字のクエリは、その文字だけの1-gramと、その文字を含む2-gramの和集合で引く
+        docs = {}
+        for key in self._raw_postings:
+            if len(key) <= 2 and token in key:
+                for doc, score in self._decode(key).items():
+                    docs[doc] = max(docs.get(doc, 0), score)
+        self._postings[token] = docs
+        return docs
+
+    def search(self, query="", tags=None):
+        """クエリの全トークンとタグを含むレコードのIDをスコア順に返す"""
+        candidates = None
+        scores = defaultdict(int)
+        for token in set(tokenize(query)):
+            docs = self._get_postings(token)
+            candidates = set(docs) if candidates is None else candidates & set(docs)
+            if not candidates:
+                return []
+            for doc, score in docs.items():
+                scores[doc] += score
+        for tag in tags or []:
+            docs = set(self.tags.get(tag, []))
+            candidates = docs if candidates is None else candidates & docs
+        if candidates is None:
+            return [self.ids[doc] for doc in self._order]
+        return [self.ids[doc] for doc in sorted(candidates, key=lambda d: (-scores[d], self._rank[d]))]
+
+    def all_tags(self):
+        """タグを出現数の多い順に返す"""
+        return sorted(self.tags, key=lambda tag: (-len(self.tags[tag]), tag))
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        import time
+        index = SearchIndex.load()
+        start = time.perf_counter()
+        hits = index.search(" ".join(sys.argv[1:]))
+        elapsed = (time.perf_counter() - start) * 1000
+        print(f"{len(hits)}件ヒット ({elapsed:.2f}ms)")
+        for tactic_id in hits[:10]:
+            print(f"  - {tactic_id}")
+    else:
+        build_and_save(tactics_store.load_tactics())
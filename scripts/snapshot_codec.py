@@ -0,0 +1,209 @@
+"""
+AI戦術スナップショットのコンパクトなバイナリ形式（msgpack・列指向）
+
+ai_tactics.json（indent=2・正本）と同じ内容を、起動時のパースが速く
+メモリ効率のよい形で data/ai_tactics.msgpack に保存する。
+
+- レコードをフィールドごとの列に分解して保存
+- 値の種類が少ない列（visual_theme, recommended_ai.badge_color, date など）は
+  辞書エンコード（ユニーク値の表 + 番号）にし、読み込み時は同じオブジェクトを共有する
+- dictの列（recommended_ai, visual_theme など）はさらに列に分解する
+- 文字列リストの列（tags など）は要素単位で文字列を共有する
+  （復元したレコード間で値オブジェクトを共有するため、読み込み後は書き換えずに扱う）
+- 元JSONのSHA-256を埋め込み、JSONと内容がずれていれば使わない
+  （書き出し時のJSONのサイズ・更新時刻も埋め込み、どちらも同じならハッシュの計算を省く）
+
+msgpackがインストールされていない環境ではJSONだけを使う。
+"""
+import hashlib
+import os
+
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    MSGPACK_AVAILABLE = False
+
+FORMAT_VERSION = 1
+
+# 辞書エンコードする条件（ユニーク値の割合がこれ以下）
+DICTIONARY_RATIO = 0.5
+
+
+def binary_path_for(json_path):
+    return os.path.splitext(json_path)[0] + ".msgpack"
+
+
+def file_digest(path):
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def file_stat(path):
+    """ファイルが書き換わっていないかの目安（サイズ, 更新時刻ns）"""
+    stat = os.stat(path)
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+# フィールドが存在しないことを表す目印（None とは区別する）
+_MISSING = object()
+
+
+def _value_key(value):
+    """辞書エンコード用のハッシュ可能なキー"""
+    return msgpack.packb(value)
+
+
+def _encode_records(records):
+    """dictのリストをフィールドごとの列に分解"""
+    fields = list(dict.fromkeys(key for record in records for key in record))
+    columns = {}
+    for field in fields:
+        values = [record.get(field, _MISSING) for record in records]
+        column = _encode_column(values)
+        missing = [i for i, v in enumerate(values) if v is _MISSING]
+        if missing:
+            column["missing"] = missing
+        columns[field] = column
+    return {"fields": fields, "columns": columns}
+
+
+def _encode_column(values):
+    """列を最も小さい表現にエンコード"""
+    present = [v for v in values if v is not _MISSING and v is not None]
+
+    # dictの列（recommended_ai, visual_theme など）はさらに列に分解する
+    if present and all(isinstance(v, dict) for v in present):
+        column = _encode_records([v if isinstance(v, dict) else {} for v in values])
+        column["kind"] = "struct"
+        column["nulls"] = [i for i, v in enumerate(values) if v is None]
+        return column
+
+    # 文字列リストの列（tags など）は要素の文字列を共有する
+    if present and all(isinstance(v, list) and all(isinstance(x, str) for x in v) for v in present):
+        elements = [x for v in present for x in v]
+        table = list(dict.fromkeys(elements))
+        if elements and len(table) <= len(elements) * DICTIONARY_RATIO:
+            codes = {s: i for i, s in enumerate(table)}
+            return {"kind": "str_lists", "table": table,
+                    "values": [[codes[x] for x in v] if isinstance(v, list) else None for v in values]}
+
+    # ユニーク値が少ない列は辞書エンコード
+    keys = [_value_key(v) for v in values if v is not _MISSING]
+    unique = list(dict.fromkeys(keys))
+    if keys and len(unique) <= len(keys) * DICTIONARY_RATIO:
+        order = {key: i for i, key in enumerate(unique)}
+        table = [msgpack.unpackb(key, raw=False) for key in unique]
+        return {"kind": "dict", "table": table,
+                "values": [order[_value_key(v)] if v is not _MISSING else None for v in values]}
+
+    return {"kind": "plain", "values": [v if v is not _MISSING else None for v in values]}
+
+
+def _decode_records(count, data):
+    """列からdictのリストを復元"""
+    records = [{} for _ in range(count)]
+    for field in data["fields"]:
+        column = data["columns"][field]
+        kind = column["kind"]
+        if kind == "struct":
+            values = _decode_records(count, column)
+            for i in column.get("nulls", ()):
+                values[i] = None
+        elif kind == "dict":
+            # 同じ値は同じ文字列オブジェクトを共有する（メモリ削減）
+            table = column["table"]
+            values = [table[code] if code is not None else None for code in column["values"]]
+        elif kind == "str_lists":
+            table = column["table"]
+            values = [[table[code] for code in codes] if codes is not None else None for codes in column["values"]]
+        else:
+            values = column["values"]
+        missing = set(column.get("missing", ()))
+        for i, value in enumerate(values):
+            if i not in missing:
+                records[i][field] = value
+    return records
+
+
+def encode_tactics(tactics, source_digest, source_stat=None):
+    """レコードのリストを列指向のmsgpackバイト列に変換
+
+    source_stat は元JSONの file_stat（読み込み時にハッシュの計算を省くために使う）。
+    """
+    payload = _encode_records(tactics)
+    payload.update({"version": FORMAT_VERSION, "source_sha256": source_digest, "count": len(tactics)})
+    if source_stat is not None:
+        payload["source_stat"] = list(source_stat)
+    return msgpack.packb(payload, use_bin_type=True)
+
+
+def _unpack(payload):
+    data = msgpack.unpackb(payload, raw=False)
+    if data.get("version") != FORMAT_VERSION:
+        raise ValueError(f"未対応のスナップショット形式: {data.get('version')}")
+    return data
+
+
+def decode_tactics(payload, expected_digest=None):
+    """列指向のmsgpackからレコードのリストを復元
+
+    expected_digest を指定した場合、元JSONのハッシュが一致しなければ None を返す。
+    """
+    data = _unpack(payload)
+    if expected_digest is not None and data.get("source_sha256") != expected_digest:
+        return None
+    return _decode_records(data["count"], data)
+
+
+def write_binary_snapshot(tactics, json_path):
+    """JSONスナップショットと同じ内容のバイナリスナップショットを書き出す"""
+    if not MSGPACK_AVAILABLE:
+        return None
+    path = binary_path_for(json_path)
+    tmp_path = path + ".tmp"
+    # 先にサイズ・更新時刻を取る（ハッシュ計算中にJSONが書き換わっても、次の読み込みで計算し直す）
+    source_stat = file_stat(json_path)
+    with open(tmp_path, "wb") as f:
+        f.write(encode_tactics(tactics, file_digest(json_path), source_stat))
+    os.replace(tmp_path, path)
+    return path
+
+
+def read_binary_snapshot(json_path):
+    """JSONと内容が一致するバイナリスナップショットがあれば読み込む（なければ None）
+
+    JSONのサイズ・更新時刻が書き出し時と同じならハッシュは計算しない。
+    """
+    path = binary_path_for(json_path)
+    if not MSGPACK_AVAILABLE or not os.path.exists(path) or not os.path.exists(json_path):
+        return None
+    try:
+        with open(path, "rb") as f:
+            data = _unpack(f.read())
+        if data.get("source_stat") != file_stat(json_path) and data.get("source_sha256") != file_digest(json_path):
+            return None
+        return _decode_records(data["count"], data)
+    except Exception as e:
+        print(f"⚠️ バイナリスナップショットを読み込めないためJSONを使います: {e}")
+        return None
+
+
+if __name__ == "__main__":
+    import json
+    import sys
+
+    # プロジェクトルートをパスに追加
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from scripts.tactics_store import SNAPSHOT_PATH
+
+    if not MSGPACK_AVAILABLE:
+        print("エラー: msgpackライブラリがインストールされていません")
+        print("pip install msgpack を実行してください")
+        sys.exit(1)
+
+    with open(SNAPSHOT_PATH, "r", encoding="utf-8") as f:
+        tactics = json.load(f)
+    path = write_binary_snapshot(tactics, SNAPSHOT_PATH)
+    print(f"✅ バイナリスナップショットを書き出しました: {path}")
+    print(f"   JSON: {os.path.getsize(SNAPSHOT_PATH):,} bytes → msgpack: {os.path.getsize(path):,} bytes")
@@ -0,0 +1,427 @@
+"""
+AI戦術データの SQLite バックエンド（任意）
+JSONストア（スナップショット + セグメント + アーカイブ）の内容を data/ai_tactics.db に写し、
+インデックス付きのクエリと全文検索（FTS5）で引けるようにする
+
+- 正本はこれまで通り JSON。DBファイルがある場合だけ、merge_tactics が同じ内容を1トランザクションで書き込む
+- アプリはプロセスごとに1本の読み取り専用接続で、直近の月・月別の一覧・IDでの取得・検索を行う
+- 全文検索は search_index.tokenize で分けたトークンを空白区切りで入れ、トークン単位で引く。
+  ヒットするレコードは JSON の検索インデックス（SearchIndex）と同じで、並び順だけが異なる（bm25）
+
+テーブル:
+  tactics      - 1レコード1行（id・date にインデックス。record は記事本文を除いた元のJSON）
+  tags         - タグ（タグでの絞り込み・タグ一覧）
+  sources      - 元記事のタイトル・URL
+  articles     - 記事本文
+  tactics_fts  - 検索対象フィールドのトークン（search_index.FIELD_WEIGHTS と同じフィールド・重み）
+
+使い方:
+    python scripts/tactics_db.py import                  # JSONストアの全件からDBを作る（有効化）
+    python scripts/tactics_db.py export --out dump.json  # DBの全件をJSONに書き出す
+    python scripts/tactics_db.py search "Claude レビュー" --tag 設計
+    python scripts/tactics_db.py stats
+"""
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from urllib.request import pathname2url
+
+# プロジェクトルートをパスに追加
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts import tactics_store
+from scripts.search_index import FIELD_WEIGHTS, tokenize
+
+DB_PATH = os.path.join(tactics_store.BASE_DIR, "data", "ai_tactics.db")
+
+# 2: 全文検索を trigram から search_index.tokenize のトークンに変更
+SCHEMA_VERSION = 2
+
+# 全文検索の対象フィールド（bm25 の重みも同じ順に並べる）
+FTS_FIELDS = tuple(FIELD_WEIGHTS)
+
+# 空白だけで区切るトークナイザ（tokenize のトークンに含まれうる記号を語の一部として扱う）
+FTS_SCHEMA = (f"CREATE VIRTUAL TABLE IF NOT EXISTS tactics_fts USING fts5({', '.join(FTS_FIELDS)}, "
+              f"tokenize=\"ascii tokenchars '.-+#\\'\");")
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS tactics (
+    pk INTEGER PRIMARY KEY,
+    id TEXT NOT NULL,
+    date TEXT NOT NULL DEFAULT '',
+    title TEXT NOT NULL DEFAULT '',
+    record TEXT NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS tactics_id ON tactics(id);
+CREATE INDEX IF NOT EXISTS tactics_date ON tactics(date DESC, id);
+CREATE TABLE IF NOT EXISTS tags (
+    tag TEXT NOT NULL,
+    tactic_pk INTEGER NOT NULL REFERENCES tactics(pk) ON DELETE CASCADE,
+    PRIMARY KEY (tag, tactic_pk)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS tags_tactic ON tags(tactic_pk);
+CREATE TABLE IF NOT EXISTS sources (
+    tactic_pk INTEGER PRIMARY KEY REFERENCES tactics(pk) ON DELETE CASCADE,
+    title TEXT NOT NULL DEFAULT '',
+    url TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS sources_url ON sources(url);
+CREATE TABLE IF NOT EXISTS articles (
+    tactic_pk INTEGER PRIMARY KEY REFERENCES tactics(pk) ON DELETE CASCADE,
+    body TEXT NOT NULL
+);
+{FTS_SCHEMA}
+"""
+
+
+def is_enabled(db_path=DB_PATH):
+    """SQLiteバックエンドを使うか（DBファイルがあれば有効）"""
+    return os.path.exists(db_path)
+
+
+def connect(db_path=DB_PATH, readonly=False):
+    """DBに接続する
+
+    readonly=True はアプリ用（書き込み不可・スレッド間で共有可）。
+    書き込み用の接続はスキーマを作り、トランザクションは transaction() で明示的に張る。
+    """
+    if readonly:
+        uri = f"file:{pathname2url(os.path.abspath(db_path))}?mode=ro"
+        conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+    else:
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        conn = sqlite3.connect(db_path, isolation_level=None)
+        conn.execute("PRAGMA foreign_keys = ON")
+        create_schema(conn)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+def create_schema(conn):
+    try:
+        conn.executescript(SCHEMA)
+    except sqlite3.OperationalError as e:
+        if "fts5" in str(e):
+            raise RuntimeError(f"SQLite {sqlite3.sqlite_version} は FTS5 に対応していません") from e
+        raise
+    conn.execute("INSERT OR IGNORE INTO meta(key, value) VALUES ('schema_version', ?)", (str(SCHEMA_VERSION),))
+    if schema_version(conn) < SCHEMA_VERSION:
+        rebuild_fts(conn)
+
+
+def schema_version(conn):
+    row = conn.execute("SELECT value FROM meta WHERE key = 'schema_version'").fetchone()
+    return int(row[0]) if row else 0
+
+
+def rebuild_fts(conn):
+    """全文検索のテーブルを作り直す（古い形式のDBを開いたとき。レコードは tactics から読み直す）"""
+    with transaction(conn):
+        conn.execute("DROP TABLE IF EXISTS tactics_fts")
+        conn.execute(FTS_SCHEMA)
+        for pk, record in conn.execute("SELECT pk, record FROM tactics").fetchall():
+            _insert_fts(conn, pk, json.loads(record))
+        conn.execute("UPDATE meta SET value = ? WHERE key = 'schema_version'", (str(SCHEMA_VERSION),))
+
+
+@contextmanager
+def transaction(conn):
+    """書き込みトランザクション（途中で失敗したら全て取り消す）"""
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        yield conn
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
+
+
+def _field_text(record, field):
+    value = record.get(field)
+    if isinstance(value, (list, tuple)):
+        return " ".join(str(v) for v in value)
+    return str(value or "")
+
+
+def _insert_fts(conn, pk, record):
+    conn.execute(f"INSERT INTO tactics_fts(rowid, {', '.join(FTS_FIELDS)}) VALUES (?{', ?' * len(FTS_FIELDS)})",
+                 (pk, *(" ".join(tokenize(_field_text(record, field))) for field in FTS_FIELDS)))
+
+
+def _is_single_char(token):
+    """SearchIndex と同じく、日本語などの1文字はその文字を含むトークン（1-gram・2-gram）の和集合で引く"""
+    return len(token) == 1 and not token.isascii()
+
+
+def _insert(conn, tactic):
+    """1件を追加（同じIDがあれば何もしない）。追加したら True"""
+    record = dict(tactic)
+    article = record.get("article")
+    # 記事本文は別テーブルに置き、一覧・検索で読む record を小さく保つ
+    if isinstance(article, str) and article:
+        del record["article"]
+    else:
+        article = None
+    cursor = conn.execute(
+        "INSERT OR IGNORE INTO tactics(id, date, title, record) VALUES (?, ?, ?, ?)",
+        (record["id"], record.get("date") or "", record.get("title") or "",
+         json.dumps(record, ensure_ascii=False, separators=(",", ":"))),
+    )
+    if not cursor.rowcount:
+        return False
+    pk = cursor.lastrowid
+    conn.executemany("INSERT OR IGNORE INTO tags(tag, tactic_pk) VALUES (?, ?)",
+                     [(tag, pk) for tag in record.get("tags") or [] if tag])
+    source = record.get("source_news")
+    if isinstance(source, dict):
+        conn.execute("INSERT INTO sources(tactic_pk, title, url) VALUES (?, ?, ?)",
+                     (pk, source.get("title") or "", source.get("url") or ""))
+    if article:
+        conn.execute("INSERT INTO articles(tactic_pk, body) VALUES (?, ?)", (pk, article))
+    _insert_fts(conn, pk, record)
+    return True
+
+
+def insert_tactics(conn, tactics):
+    """レコードを1トランザクションで追加し、追加件数を返す
+
+    JSONストアの append_tactics と同じく、既にあるIDは上書きしない（IDのないレコードは入れない）。
+    """
+    added = 0
+    with transaction(conn):
+        for tactic in tactics:
+            if tactic.get("id") and _insert(conn, tactic):
+                added += 1
+    return added
+
+
+def delete_before(conn, oldest_date):
+    """oldest_date（YYYY-MM-DD）より古いレコードを削除する（保持期間を過ぎたアーカイブに合わせる）"""
+    with transaction(conn):
+        conn.execute("DELETE FROM tactics_fts WHERE rowid IN "
+                     "(SELECT pk FROM tactics WHERE date != '' AND date < ?)", (oldest_date,))
+        return conn.execute("DELETE FROM tactics WHERE date != '' AND date < ?", (oldest_date,)).rowcount
+
+
+def replace_all(conn, tactics):
+    """全件を入れ替える（1トランザクション。読み取り側は入れ替え前か後のどちらかだけを見る）"""
+    with transaction(conn):
+        for table in ("tactics_fts", "articles", "sources", "tags", "tactics"):
+            conn.execute(f"DELETE FROM {table}")
+        added = sum(1 for tactic in tactics if tactic.get("id") and _insert(conn, tactic))
+    return added
+
+
+def sync(new_tactics, oldest_date=None, db_path=DB_PATH):
+    """merge_tactics から呼ぶ: 追記したレコードを書き込み、保持期間外のレコードを削除する"""
+    conn = connect(db_path)
+    try:
+        added = insert_tactics(conn, new_tactics) if new_tactics else 0
+        removed = delete_before(conn, oldest_date) if oldest_date else 0
+    finally:
+        conn.close()
+    return added, removed
+
+
+def import_json(db_path=DB_PATH, snapshot_path=tactics_store.SNAPSHOT_PATH, segments_dir=tactics_store.SEGMENTS_DIR):
+    """JSONストアの全件（アーカイブを含む）でDBを作り直す"""
+    tactics = tactics_store.load_tactics(snapshot_path, segments_dir)
+    conn = connect(db_path)
+    try:
+        added = replace_all(conn, tactics)
+    finally:
+        conn.close()
+    return added, len(tactics) - added
+
+
+def export_json(out_path, db_path=DB_PATH):
+    """DBの全件を日付降順でJSONに書き出す（import_json の逆）"""
+    db = TacticsDB.open(db_path)
+    try:
+        tactics = db.all_tactics()
+    finally:
+        db.close()
+    tactics_store.write_json_atomic(out_path, tactics, indent=2)
+    return len(tactics)
+
+
+def _like_pattern(term):
+    escaped = term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+class TacticsDB:
+    """読み取り専用接続でのクエリ（SearchIndex と同じ search / all_tags を持つ）
+
+    接続はスレッド間で共有するため、クエリはロックで1つずつ実行する。
+    """
+
+    def __init__(self, conn):
+        self.conn = conn
+        self._lock = threading.Lock()
+
+    @classmethod
+    def open(cls, db_path=DB_PATH):
+        return cls(connect(db_path, readonly=True))
+
+    def close(self):
+        self.conn.close()
+
+    def _query(self, sql, params=()):
+        with self._lock:
+            return self.conn.execute(sql, params).fetchall()
+
+    @staticmethod
+    def _decode(row):
+        record = json.loads(row["record"])
+        if row["body"] is not None:
+            record["article"] = row["body"]
+        return record
+
+    def _select(self, where="1", params=(), order="t.date DESC, t.id"):
+        rows = self._query(
+            "SELECT t.id, t.record, a.body FROM tactics AS t LEFT JOIN articles AS a ON a.tactic_pk = t.pk "
+            f"WHERE {where} ORDER BY {order}", params)
+        return [self._decode(row) for row in rows]
+
+    def count(self):
+        return self._query("SELECT count(*) FROM tactics")[0][0]
+
+    def all_tactics(self):
+        """全件（日付降順）"""
+        return self._select()
+
+    def get(self, tactic_id):
+        """IDで1件取得（なければ None）"""
+        records = self._select("t.id = ?", (tactic_id,))
+        return records[0] if records else None
+
+    def get_many(self, tactic_ids):
+        """IDの並び順のまま取得（存在しないIDは無視）"""
+        by_id = {}
+        ids = list(tactic_ids)
+        # SQLite の変数の上限を超えないよう分けて引く
+        for start in range(0, len(ids), 500):
+            chunk = ids[start:start + 500]
+            for record in self._select(f"t.id IN ({', '.join('?' * len(chunk))})", chunk):
+                by_id[record["id"]] = record
+        return [by_id[tactic_id] for tactic_id in ids if tactic_id in by_id]
+
+    def _hot_start(self, hot_months):
+        newest = self._query("SELECT max(date) FROM tactics WHERE date != ''")[0][0]
+        if not newest:
+            return None
+        return tactics_store.shift_month(newest[:7], -(max(1, hot_months) - 1)) + "-01"
+
+    def hot_tactics(self, hot_months=tactics_store.HOT_MONTHS):
+        """直近 hot_months か月のレコード（日付のないレコードを含む。スナップショットと同じ範囲）"""
+        start = self._hot_start(hot_months)
+        if start is None:
+            return self._select()
+        return self._select("t.date >= ? OR t.date = ''", (start,))
+
+    def manifest(self, hot_months=tactics_store.HOT_MONTHS):
+        """直近の月より古い分を月ごとにまとめたもの（tactics_store.load_manifest と同じ形）"""
+        start = self._hot_start(hot_months)
+        rows = [] if start is None else self._query(
+            "SELECT substr(date, 1, 7) AS month, count(*) AS count, min(date) AS oldest, max(date) AS newest "
+            "FROM tactics WHERE date != '' AND date < ? GROUP BY month ORDER BY month DESC", (start,))
+        return {"version": tactics_store.MANIFEST_VERSION, "partitions": [dict(row) for row in rows]}
+
+    def month_tactics(self, month):
+        """月（YYYY-MM）のレコード（日付降順。KnowledgeBase のパーティションの読み込みに使う）"""
+        return self._select("t.date BETWEEN ? AND ?", (f"{month}-00", f"{month}-99"))
+
+    def is_current(self):
+        """スキーマが最新か（古い形式のDBは merge_tactics の書き込みか import で更新されるまで検索に使わない）"""
+        with self._lock:
+            return schema_version(self.conn) >= SCHEMA_VERSION
+
+    def search(self, query="", tags=None):
+        """クエリの全トークンとタグを含むレコードのIDを関連度順に返す
+
+        トークンの分け方とヒットする条件は SearchIndex.search と同じ（並び順は bm25 で、同じとは限らない）。
+        """
+        terms = list(dict.fromkeys(tokenize(query)))
+        tokens = [term for term in terms if not _is_single_char(term)]
+        chars = [term for term in terms if _is_single_char(term)]
+
+        joins, where, params, order = [], [], [], []
+        if terms:
+            joins.append("JOIN tactics_fts AS f ON f.rowid = t.pk")
+        if tokens:
+            where.append("tactics_fts MATCH ?")
+            params.append(" AND ".join('"' + term.replace('"', '""') + '"' for term in tokens))
+            order.append(f"bm25(tactics_fts, {', '.join(str(FIELD_WEIGHTS[f]) for f in FTS_FIELDS)})")
+        short_scores = []
+        for term in chars:
+            matches = [f"(f.{field} LIKE ? ESCAPE '\\')" for field in FTS_FIELDS]
+            where.append("(" + " OR ".join(matches) + ")")
+            params.extend([_like_pattern(term)] * len(FTS_FIELDS))
+            short_scores.extend(f"{FIELD_WEIGHTS[field]} * {match}" for field, match in zip(FTS_FIELDS, matches))
+        for tag in tags or []:
+            where.append("t.pk IN (SELECT tactic_pk FROM tags WHERE tag = ?)")
+            params.append(tag)
+        if short_scores:
+            order.append("-(" + " + ".join(short_scores) + ")")
+            params.extend([_like_pattern(term) for term in chars for _ in FTS_FIELDS])
+        order.append("t.date DESC, t.id")
+
+        sql = (f"SELECT t.id FROM tactics AS t {' '.join(joins)} WHERE {' AND '.join(where) or '1'} "
+               f"ORDER BY {', '.join(order)}")
+        return [row[0] for row in self._query(sql, params)]
+
+    def all_tags(self):
+        """タグを出現数の多い順に返す"""
+        return [row[0] for row in self._query("SELECT tag FROM tags GROUP BY tag ORDER BY count(*) DESC, tag")]
+
+    def stats(self):
+        counts = {table: self._query(f"SELECT count(*) FROM {table}")[0][0]
+                  for table in ("tactics", "tags", "sources", "articles")}
+        dates = self._query("SELECT min(date), max(date) FROM tactics WHERE date != ''")[0]
+        return {**counts, "oldest": dates[0], "newest": dates[1]}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="AI戦術データの SQLite バックエンド")
+    parser.add_argument("--db", default=DB_PATH, help="DBファイルのパス")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("import", help="JSONストアの全件（アーカイブを含む）からDBを作り直す")
+    export_parser = commands.add_parser("export", help="DBの全件をJSONに書き出す")
+    export_parser.add_argument("--out", required=True, help="出力先のJSONファイル")
+    search_parser = commands.add_parser("search", help="全文検索を試す")
+    search_parser.add_argument("query", nargs="?", default="")
+    search_parser.add_argument("--tag", action="append", default=[], help="タグで絞り込む（複数指定でAND）")
+    commands.add_parser("stats", help="件数と期間を表示")
+    args = parser.parse_args()
+
+    if args.command == "import":
+        added, skipped = import_json(args.db)
+        print(f"✅ {added:,}件を取り込みました: {args.db}" + (f"（IDのないレコード {skipped}件は除外）" if skipped else ""))
+    elif args.command == "export":
+        count = export_json(args.out, args.db)
+        print(f"✅ {count:,}件を書き出しました: {args.out}")
+    elif not is_enabled(args.db):
+        print(f"❌ DBがありません: {args.db}（python scripts/tactics_db.py import で作成）")
+        sys.exit(1)
+    elif args.command == "search":
+        db = TacticsDB.open(args.db)
+        start = time.perf_counter()
+        hits = db.search(args.query, args.tag)
+        elapsed = (time.perf_counter() - start) * 1000
+        print(f"{len(hits)}件ヒット ({elapsed:.2f}ms)")
+        for tactic in db.get_many(hits[:10]):
+            print(f"  - {tactic['id']} {tactic.get('title', '')[:40]}")
+    else:
+        stats = TacticsDB.open(args.db).stats()
+        print(f"📊 戦術 {stats['tactics']:,}件（{stats['oldest']} 〜 {stats['newest']}） / "
+              f"タグ {stats['tags']:,} / 元記事 {stats['sources']:,} / 記事本文 {stats['articles']:,}")
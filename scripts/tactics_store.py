@@ -0,0 +1,317 @@
+"""
+AI戦術データの追記型ストア
+
+- data/ai_tactics.json         : 圧縮済みスナップショット（直近の月のレコード・日付降順）
+- data/ai_tactics.msgpack      : スナップショットと同内容のバイナリ版（あれば読み込みに使う）
+- data/segments/*.jsonl        : マージごとに追記される新規レコード（JSON Lines）
+- data/archive/YYYY-MM.json    : スナップショットから外れた古いレコードの月別パーティション（+ .msgpack）
+- data/archive/manifest.json   : パーティションごとの期間・件数（アプリはこれを見て必要な月だけ読む）
+
+マージ時は新規レコードだけをセグメントに追記し、スナップショットへの統合（コンパクション）は別ステップで行う。
+コンパクションでは直近 HOT_MONTHS か月より古いレコードを月別パーティションへ移す（削除しない）。
+パーティションの削除は保持ポリシー（RETENTION_MONTHS）を指定した場合だけ行う。
+"""
+import json
+import os
+import re
+from datetime import datetime, timedelta, timezone
+
+from scripts import snapshot_codec
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SNAPSHOT_PATH = os.path.join(BASE_DIR, "data", "ai_tactics.json")
+SEGMENTS_DIR = os.path.join(BASE_DIR, "data", "segments")
+
+# スナップショットに置く月数（最新のレコードの月から数える。古い月はアーカイブへ移す）
+HOT_MONTHS = 3
+
+# 保持する月数（最新のレコードの月から数える。これより古いパーティションは削除する。None は無期限）
+RETENTION_MONTHS = None
+
+MANIFEST_VERSION = 1
+
+_DATE_RE = re.compile(r"\d{4}-\d{2}-\d{2}")
+
+# セグメント数がこの値以上になったらコンパクションする
+COMPACT_THRESHOLD = 7
+
+
+def read_snapshot(snapshot_path=SNAPSHOT_PATH):
+    """スナップショットを読み込む（存在しなければ空リスト）
+
+    JSONと内容が一致するバイナリ版があればそちらを使う。
+    """
+    records = snapshot_codec.read_binary_snapshot(snapshot_path)
+    if records is not None:
+        return records
+    if not os.path.exists(snapshot_path):
+        return []
+    with open(snapshot_path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def archive_dir_for(snapshot_path):
+    """スナップショットに対応するアーカイブのディレクトリ（data/archive）"""
+    return os.path.join(os.path.dirname(snapshot_path), "archive")
+
+
+def manifest_path_for(snapshot_path):
+    return os.path.join(archive_dir_for(snapshot_path), "manifest.json")
+
+
+def partition_path(month, snapshot_path=SNAPSHOT_PATH):
+    """月（YYYY-MM）のパーティションファイルのパス"""
+    return os.path.join(archive_dir_for(snapshot_path), f"{month}.json")
+
+
+def record_month(record):
+    """レコードの月（YYYY-MM）。日付がなければ None（パーティションに分けずスナップショットに残す）"""
+    record_date = record.get("date") or ""
+    return record_date[:7] if _DATE_RE.fullmatch(record_date) else None
+
+
+def shift_month(month, months):
+    """YYYY-MM を months か月ずらす（負なら過去へ）"""
+    year, number = int(month[:4]), int(month[5:7])
+    index = year * 12 + number - 1 + months
+    return f"{index // 12:04d}-{index % 12 + 1:02d}"
+
+
+def load_manifest(snapshot_path=SNAPSHOT_PATH):
+    """アーカイブのマニフェスト（なければパーティションなしとして返す）
+
+    partitions は新しい月から順に {"month", "file", "count", "oldest", "newest"}。
+    """
+    try:
+        with open(manifest_path_for(snapshot_path), "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {"version": MANIFEST_VERSION, "partitions": []}
+    manifest.setdefault("partitions", [])
+    return manifest
+
+
+def read_partition(month, snapshot_path=SNAPSHOT_PATH):
+    """月別パーティションのレコード（日付降順。なければ空リスト）"""
+    return read_snapshot(partition_path(month, snapshot_path))
+
+
+def iter_archive_records(snapshot_path=SNAPSHOT_PATH):
+    """全パーティションのレコードを新しい月から順に返す"""
+    for partition in load_manifest(snapshot_path)["partitions"]:
+        yield from read_partition(partition["month"], snapshot_path)
+
+
+def list_segments(segments_dir=SEGMENTS_DIR):
+    """セグメントファイルのパスを古い順に返す"""
+    if not os.path.isdir(segments_dir):
+        return []
+    names = sorted(name for name in os.listdir(segments_dir) if name.endswith(".jsonl"))
+    return [os.path.join(segments_dir, name) for name in names]
+
+
+def iter_segment_records(segments_dir=SEGMENTS_DIR):
+    """全セグメントのレコードを書き込み順に返す"""
+    for path in list_segments(segments_dir):
+        with open(path, "r", encoding="utf-8") as f:
+            for line_no, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    # 書き込み途中で落ちた末尾行などは読み飛ばす
+                    print(f"⚠️ 壊れた行をスキップ: {os.path.basename(path)}:{line_no}")
+
+
+def load_tactics(snapshot_path=SNAPSHOT_PATH, segments_dir=SEGMENTS_DIR, include_archive=True):
+    """（アーカイブ +）スナップショット + セグメントの末尾を統合して日付降順で返す
+
+    同じIDのレコードは後から書かれた方（アーカイブ < スナップショット < セグメント）を優先する。
+    include_archive=False の場合は直近の月（スナップショット + セグメント）だけを読む。
+    """
+    records = {}
+    ordered_ids = []
+    for record in iter_archive_records(snapshot_path) if include_archive else ():
+        key = record.get("id") or f"__archive_{len(ordered_ids)}"
+        if key not in records:
+            ordered_ids.append(key)
+        records[key] = record
+    for record in read_snapshot(snapshot_path):
+        key = record.get("id") or f"__snapshot_{len(ordered_ids)}"
+        if key not in records:
+            ordered_ids.append(key)
+        records[key] = record
+    for record in iter_segment_records(segments_dir):
+        key = record.get("id")
+        if not key:
+            continue
+        if key not in records:
+            ordered_ids.append(key)
+        records[key] = record
+
+    tactics = [records[key] for key in ordered_ids]
+    tactics.sort(key=lambda x: x.get("date", ""), reverse=True)
+    return tactics
+
+
+def append_tactics(new_tactics, snapshot_path=SNAPSHOT_PATH, segments_dir=SEGMENTS_DIR):
+    """新規レコードだけをセグメントに追記する
+
+    戻り値: (追加件数, スキップしたIDのリスト)
+    """
+    # アーカイブは新規レコードと同じ月のパーティションだけを照合する（全期間は読まない）
+    archived_months = {p["month"] for p in load_manifest(snapshot_path)["partitions"]}
+    existing = load_tactics(snapshot_path, segments_dir, include_archive=False)
+    for month in {record_month(tactic) for tactic in new_tactics} & archived_months:
+        existing.extend(read_partition(month, snapshot_path))
+    existing_ids = {t.get("id") for t in existing if t.get("id")}
+
+    to_write = []
+    skipped = []
+    for tactic in new_tactics:
+        tactic_id = tactic.get("id")
+        if tactic_id and tactic_id not in existing_ids:
+            to_write.append(tactic)
+            existing_ids.add(tactic_id)
+        else:
+            skipped.append(tactic_id or "N/A")
+
+    if not to_write:
+        return 0, skipped
+
+    os.makedirs(segments_dir, exist_ok=True)
+    JST = timezone(timedelta(hours=9))
+    segment_path = os.path.join(segments_dir, datetime.now(JST).strftime("%Y%m%d_%H%M%S") + ".jsonl")
+    with open(segment_path, "a", encoding="utf-8") as f:
+        for tactic in to_write:
+            f.write(json.dumps(tactic, ensure_ascii=False) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+
+    return len(to_write), skipped
+
+
+def write_json_atomic(path, data, **dump_kwargs):
+    """一時ファイルに書いてから置き換える（読み込み側が途中状態を見ないように）"""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, **dump_kwargs)
+    os.replace(tmp_path, path)
+
+
+def needs_compaction(segments_dir=SEGMENTS_DIR, threshold=COMPACT_THRESHOLD):
+    return len(list_segments(segments_dir)) >= threshold
+
+
+def split_hot(tactics, hot_months=HOT_MONTHS):
+    """(スナップショットに残すレコード, 月 → アーカイブへ移すレコード) に分ける"""
+    months = [month for month in map(record_month, tactics) if month]
+    if not months:
+        return list(tactics), {}
+    oldest_hot = shift_month(max(months), -(max(1, hot_months) - 1))
+    hot, archived = [], {}
+    for tactic in tactics:
+        month = record_month(tactic)
+        if month is None or month >= oldest_hot:
+            hot.append(tactic)
+        else:
+            archived.setdefault(month, []).append(tactic)
+    return hot, archived
+
+
+def _summary(records):
+    dates = [record["date"] for record in records if record_month(record)]
+    return {"count": len(records), "oldest": min(dates, default=None), "newest": max(dates, default=None)}
+
+
+def write_partition(month, records, snapshot_path=SNAPSHOT_PATH):
+    """月別パーティションを書き出す（JSON + バイナリ版）"""
+    path = partition_path(month, snapshot_path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    write_json_atomic(path, records, indent=2)
+    snapshot_codec.write_binary_snapshot(records, path)
+
+
+def _remove_partition(month, snapshot_path):
+    path = partition_path(month, snapshot_path)
+    for target in (path, snapshot_codec.binary_path_for(path)):
+        if os.path.exists(target):
+            os.remove(target)
+
+
+def archive_records(archived, snapshot_path=SNAPSHOT_PATH):
+    """月 → レコード をパーティションに追加し（同じIDは新しい方を優先）、月 → 概要 を返す"""
+    summaries = {}
+    for month, records in archived.items():
+        merged = {}
+        for record in list(read_partition(month, snapshot_path)) + records:
+            merged[record.get("id") or f"__archive_{len(merged)}"] = record
+        partition = sorted(merged.values(), key=lambda x: x.get("date", ""), reverse=True)
+        write_partition(month, partition, snapshot_path)
+        summaries[month] = _summary(partition)
+    return summaries
+
+
+def write_manifest(partitions, hot, snapshot_path=SNAPSHOT_PATH, hot_months=HOT_MONTHS,
+                   retention_months=RETENTION_MONTHS):
+    """マニフェストを書き出す（partitions: 月 → 概要）"""
+    manifest = {
+        "version": MANIFEST_VERSION,
+        "policy": {"hot_months": hot_months, "retention_months": retention_months},
+        "hot": _summary(hot),
+        "partitions": [
+            {"month": month, "file": os.path.basename(partition_path(month, snapshot_path)), **partitions[month]}
+            for month in sorted(partitions, reverse=True)
+        ],
+    }
+    manifest["total"] = manifest["hot"]["count"] + sum(p["count"] for p in manifest["partitions"])
+    os.makedirs(archive_dir_for(snapshot_path), exist_ok=True)
+    write_json_atomic(manifest_path_for(snapshot_path), manifest, indent=2)
+    return manifest
+
+
+def compact(hot_months=HOT_MONTHS, retention_months=RETENTION_MONTHS, snapshot_path=SNAPSHOT_PATH,
+            segments_dir=SEGMENTS_DIR):
+    """セグメントをスナップショットに統合し、古い月のレコードを月別パーティションへ移す
+
+    retention_months を指定した場合は、最新の月から数えてその月数より古いパーティションを削除する。
+    戻り値: 統合後のスナップショットのレコードリスト（直近 hot_months か月分）
+    """
+    if retention_months is not None and retention_months < hot_months:
+        raise ValueError(f"保持する月数（{retention_months}）はスナップショットの月数（{hot_months}）以上にしてください")
+    segments = list_segments(segments_dir)
+    tactics = load_tactics(snapshot_path, segments_dir, include_archive=False)
+    hot, archived = split_hot(tactics, hot_months)
+
+    # パーティションへの追記 → スナップショットの置き換え の順に書く
+    # （途中で止まってもレコードは必ずどちらかに残る。両方にある場合はスナップショットが優先される）
+    partitions = {p["month"]: {key: p[key] for key in ("count", "oldest", "newest")}
+                  for p in load_manifest(snapshot_path)["partitions"]}
+    partitions.update(archive_records(archived, snapshot_path))
+    write_json_atomic(snapshot_path, hot, indent=2)
+    snapshot_codec.write_binary_snapshot(hot, snapshot_path)
+
+    removed = []
+    newest = max(filter(None, map(record_month, hot)), default=None)
+    if retention_months is not None and newest:
+        oldest_kept = shift_month(newest, -(retention_months - 1))
+        for month in sorted(partitions):
+            if month < oldest_kept:
+                _remove_partition(month, snapshot_path)
+                partitions.pop(month)
+                removed.append(month)
+    if partitions or archived or os.path.exists(manifest_path_for(snapshot_path)):
+        write_manifest(partitions, hot, snapshot_path, hot_months, retention_months)
+
+    # スナップショットの書き込みが完了してからセグメントを削除する
+    for path in segments:
+        os.remove(path)
+
+    archived_count = sum(len(records) for records in archived.values())
+    print(f"🗜️ コンパクション完了: {len(segments)}セグメントを統合 → {len(hot)}件"
+          + (f"（{archived_count}件を{len(archived)}か月分のアーカイブへ移動）" if archived_count else ""))
+    if removed:
+        print(f"🗑️ 保持期間（{retention_months}か月）を過ぎたパーティションを削除: {', '.join(removed)}")
+    return hot
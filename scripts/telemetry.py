@@ -0,0 +1,470 @@
+"""
+パイプラインの計測（段階ごとの時間・LLM呼び出しごとの時間・トークン数・再試行・推定コスト）
+
+各スクリプトの実行ごとに次を書き出す。
+- .cache/telemetry/<スクリプト名>.json : 実行レポート（段階・呼び出しの明細）
+- .cache/telemetry/<スクリプト名>.prom : Prometheus の textfile collector 形式
+- data/telemetry_history.jsonl         : 実行ごとの要約の履歴（リポジトリに残し、経時の劣化を比較する）
+
+使い方（計測する側）:
+    with telemetry.stage("rss_fetch"):
+        entries = fetch_rss_entries()
+    with telemetry.track_call("gemini", model, "selection"):
+        text = resilience.call("gemini", attempt)   # attempt 内で add_usage() を呼ぶ
+    telemetry.write_report("collector")
+
+使い方（履歴の確認）:
+    python scripts/telemetry.py                    # スクリプトごとの直近の実行と、以前の中央値との比較
+    python scripts/telemetry.py --script analyst --last 20
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REPORT_DIR = os.environ.get("TELEMETRY_DIR") or os.path.join(BASE_DIR, ".cache", "telemetry")
+# 履歴はリポジトリにコミットせず、ワークフローではキャッシュとして次の実行へ引き継ぐ
+HISTORY_PATH = os.path.join(REPORT_DIR, "history.jsonl")
+
+# 履歴に残す最大行数（古い順に削除）
+HISTORY_MAX_LINES = 2000
+
+# 直近の実行が以前の中央値のこの倍率を超えたら劣化として表示する
+REGRESSION_RATIO = 1.5
+
+# 100万トークンあたりの価格（USD・公開価格の目安。Geminiの思考トークンは出力として課金される）
+MODEL_PRICES = {
+    "gemini-2.5-flash": {"input": 0.30, "output": 2.50},
+    "claude-sonnet-4-5-20250929": {"input": 3.00, "output": 15.00},
+}
+
+# Message Batches API の割引率
+BATCH_DISCOUNT = 0.5
+
+JST = timezone(timedelta(hours=9))
+
+
+def estimate_cost(model, input_tokens, output_tokens, batch=False):
+    """トークン数から推定コスト（USD）を計算（価格表にないモデルは 0）"""
+    price = MODEL_PRICES.get(model)
+    if not price:
+        return 0.0
+    cost = (input_tokens * price["input"] + output_tokens * price["output"]) / 1_000_000
+    return cost * BATCH_DISCOUNT if batch else cost
+
+
+class CallRecord:
+    """1回のLLM呼び出し（再試行を含む）の計測値"""
+
+    def __init__(self, provider, model, operation, batch=False):
+        self.provider = provider
+        self.model = model
+        self.operation = operation
+        self.batch = batch
+        self.seconds = 0.0
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.tokens_estimated = False
+        self.attempts = 0
+        self.retries = 0
+        self.error = None
+
+    def as_dict(self):
+        return {
+            "provider": self.provider,
+            "model": self.model,
+            "operation": self.operation,
+            "seconds": round(self.seconds, 3),
+            "input_tokens": self.input_tokens,
+            "output_tokens": self.output_tokens,
+            "tokens_estimated": self.tokens_estimated,
+            "attempts": self.attempts,
+            "retries": self.retries,
+            # APIを1回も呼ばなかった（LLMキャッシュから返した）
+            "cached": self.attempts == 0 and self.error is None,
+            "batch": self.batch,
+            "cost_usd": round(estimate_cost(self.model, self.input_tokens, self.output_tokens, self.batch), 6),
+            "error": self.error,
+        }
+
+
+class Telemetry:
+    """1回の実行の計測値を集める（スレッドセーフ）"""
+
+    def __init__(self):
+        self.started_at = datetime.now(JST)
+        self._started = time.perf_counter()
+        self._stages = {}
+        self._calls = []
+        self._retries = {}
+        self._rejections = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    # --- 段階 ---
+
+    @contextmanager
+    def stage(self, name):
+        """段階の所要時間を記録（並列に実行された分は合計時間と、最初の開始〜最後の終了の両方を残す）"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            with self._lock:
+                entry = self._stages.setdefault(name, {"seconds": 0.0, "count": 0, "first": start, "last": end})
+                entry["seconds"] += end - start
+                entry["count"] += 1
+                entry["first"] = min(entry["first"], start)
+                entry["last"] = max(entry["last"], end)
+
+    # --- LLM呼び出し ---
+
+    @contextmanager
+    def track_call(self, provider, model, operation, batch=False):
+        """LLM呼び出し1回分（キャッシュ参照・再試行を含む）を記録する
+
+        ブロック内の add_usage() / note_attempt() / note_retry() はこの記録に加算される。
+        """
+        record = CallRecord(provider, model, operation, batch)
+        previous = getattr(self._local, "call", None)
+        self._local.call = record
+        start = time.perf_counter()
+        try:
+            yield record
+        except BaseException as e:
+            record.error = f"{type(e).__name__}: {str(e)[:120]}"
+            raise
+        finally:
+            record.seconds = time.perf_counter() - start
+            self._local.call = previous
+            with self._lock:
+                self._calls.append(record)
+
+    def _current(self):
+        return getattr(self._local, "call", None)
+
+    def add_usage(self, input_tokens=0, output_tokens=0, estimated=False):
+        """実行中の呼び出しにトークン数を加算（SDKの usage から）"""
+        record = self._current()
+        if record is None:
+            return
+        record.input_tokens += input_tokens or 0
+        record.output_tokens += output_tokens or 0
+        record.tokens_estimated = record.tokens_estimated or estimated
+
+    def note_attempt(self, provider):
+        record = self._current()
+        if record is not None:
+            record.attempts += 1
+
+    def note_retry(self, provider, kind):
+        """再試行を記録（kind: rate_limited / transient）"""
+        record = self._current()
+        if record is not None:
+            record.retries += 1
+        with self._lock:
+            counts = self._retries.setdefault(provider, {})
+            counts[kind] = counts.get(kind, 0) + 1
+
+    def note_rejection(self, provider):
+        """サーキットブレーカーが開いていて呼び出さなかった"""
+        with self._lock:
+            self._rejections[provider] = self._rejections.get(provider, 0) + 1
+
+    # --- レポート ---
+
+    def report(self, script, reset=False):
+        """実行レポート（dict）を作る（reset=True なら計測値を空にして次の区間を始める）"""
+        with self._lock:
+            calls = [record.as_dict() for record in self._calls]
+            stages = {
+                name: {"seconds": round(entry["seconds"], 3), "wall_seconds": round(entry["last"] - entry["first"], 3),
+                       "count": entry["count"]}
+                for name, entry in self._stages.items()
+            }
+            retries = {provider: dict(counts) for provider, counts in self._retries.items()}
+            rejections = dict(self._rejections)
+            started_at, started = self.started_at, self._started
+            if reset:
+                self._stages, self._calls, self._retries, self._rejections = {}, [], {}, {}
+                self.started_at, self._started = datetime.now(JST), time.perf_counter()
+
+        providers = {}
+        for call in calls:
+            summary = providers.setdefault(call["provider"], {
+                "calls": 0, "cached": 0, "errors": 0, "seconds": 0.0, "input_tokens": 0, "output_tokens": 0,
+                "retries": 0, "cost_usd": 0.0,
+            })
+            summary["calls"] += 1
+            summary["cached"] += call["cached"]
+            summary["errors"] += call["error"] is not None
+            summary["seconds"] = round(summary["seconds"] + call["seconds"], 3)
+            summary["input_tokens"] += call["input_tokens"]
+            summary["output_tokens"] += call["output_tokens"]
+            summary["retries"] += call["retries"]
+            summary["cost_usd"] = round(summary["cost_usd"] + call["cost_usd"], 6)
+
+        return {
+            "script": script,
+            "run_id": started_at.strftime("%Y%m%d_%H%M%S"),
+            "started_at": started_at.isoformat(),
+            "duration_s": round(time.perf_counter() - started, 3),
+            "stages": stages,
+            "providers": providers,
+            "retries": retries,
+            "circuit_rejections": rejections,
+            "total_cost_usd": round(sum(p["cost_usd"] for p in providers.values()), 6),
+            "calls": calls,
+        }
+
+    def write_report(self, script, report_dir=None, history_path=HISTORY_PATH, history=True):
+        """実行レポート（JSON）・Prometheus textfile を書き出し、履歴に要約を追記する"""
+        report = self.report(script)
+        _save_report(report, report_dir, history_path if history else None)
+        return report
+
+    def rollover(self, script, report_dir=None, history_path=HISTORY_PATH):
+        """ここまでの区間のレポートを書き出し、計測値を空にして次の区間を始める（常駐モード用）
+
+        呼び出しの記録が実行中ずっと増え続けないようにする。LLMを呼び出さなかった区間は履歴に残さない。
+        """
+        report = self.report(script, reset=True)
+        _save_report(report, report_dir, history_path if report["calls"] else None)
+        return report
+
+    def summary(self, script):
+        report = self.report(script)
+        lines = [f"⏱️ 計測（{script}）: 合計 {report['duration_s']:.1f}秒 / 推定コスト ${report['total_cost_usd']:.4f}"]
+        for name, entry in sorted(report["stages"].items(), key=lambda item: -item[1]["seconds"]):
+            parallel = f"（並列の合計 {entry['seconds']:.1f}秒）" if entry["seconds"] > entry["wall_seconds"] + 0.05 else ""
+            lines.append(f"   {name:<22} {entry['wall_seconds']:7.2f}秒 × {entry['count']}回{parallel}")
+        for provider, p in report["providers"].items():
+            lines.append(f"   {provider}: 呼び出し {p['calls']}回（キャッシュ {p['cached']}回・再試行 {p['retries']}回）"
+                         f" / 入力 {p['input_tokens']:,} / 出力 {p['output_tokens']:,}トークン / ${p['cost_usd']:.4f}")
+        return "\n".join(lines)
+
+
+def gemini_text_chunks(chunks):
+    """Geminiのストリーミング応答からテキストを順に返し、usage_metadata のトークン数を記録する
+
+    usage_metadata はそれまでの累計なので、前回からの増分だけを加算する
+    （JSONを読み終えた時点で受信をやめても、そこまでの使用量は記録される）。
+    """
+    recorded_input = recorded_output = 0
+    for chunk in chunks:
+        usage = getattr(chunk, "usage_metadata", None)
+        if usage:
+            input_tokens = usage.prompt_token_count or 0
+            # 思考トークンは出力として課金される
+            output_tokens = (usage.candidates_token_count or 0) + (usage.thoughts_token_count or 0)
+            get_telemetry().add_usage(input_tokens - recorded_input, output_tokens - recorded_output)
+            recorded_input, recorded_output = input_tokens, output_tokens
+        yield chunk.text or ""
+
+
+def _save_report(report, report_dir=None, history_path=None):
+    report_dir = report_dir or REPORT_DIR
+    os.makedirs(report_dir, exist_ok=True)
+    _write_atomic(os.path.join(report_dir, f"{report['script']}.json"),
+                  json.dumps(report, ensure_ascii=False, indent=2))
+    _write_atomic(os.path.join(report_dir, f"{report['script']}.prom"), to_prometheus(report))
+    if history_path:
+        append_history(report, history_path)
+
+
+def _write_atomic(path, text):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+def _labels(**labels):
+    return "{" + ",".join(f'{key}="{str(value).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"'
+                          for key, value in labels.items()) + "}"
+
+
+def to_prometheus(report):
+    """実行レポートを Prometheus の textfile collector 形式に変換"""
+    script = report["script"]
+    lines = []
+
+    def metric(name, kind, help_text, samples):
+        lines.append(f"# HELP ai_code_{name} {help_text}")
+        lines.append(f"# TYPE ai_code_{name} {kind}")
+        for labels, value in samples:
+            lines.append(f"ai_code_{name}{_labels(script=script, **labels)} {value}")
+
+    metric("run_timestamp_seconds", "gauge", "Start time of the last run.",
+           [({}, datetime.fromisoformat(report["started_at"]).timestamp())])
+    metric("run_duration_seconds", "gauge", "Wall time of the last run.", [({}, report["duration_s"])])
+    metric("stage_duration_seconds", "gauge", "Wall time per pipeline stage in the last run.",
+           [({"stage": name}, entry["wall_seconds"]) for name, entry in report["stages"].items()])
+    metric("stage_busy_seconds", "gauge", "Summed time per stage across parallel workers in the last run.",
+           [({"stage": name}, entry["seconds"]) for name, entry in report["stages"].items()])
+
+    calls = {}
+    for call in report["calls"]:
+        key = (call["provider"], call["model"], call["operation"])
+        entry = calls.setdefault(key, {"calls": 0, "cached": 0, "errors": 0, "seconds": 0.0,
+                                       "input": 0, "output": 0, "retries": 0, "cost": 0.0})
+        entry["calls"] += 1
+        entry["cached"] += call["cached"]
+        entry["errors"] += call["error"] is not None
+        entry["seconds"] += call["seconds"]
+        entry["input"] += call["input_tokens"]
+        entry["output"] += call["output_tokens"]
+        entry["retries"] += call["retries"]
+        entry["cost"] += call["cost_usd"]
+
+    def samples(field, **extra):
+        return [({"provider": p, "model": m, "operation": o, **extra}, round(entry[field], 6))
+                for (p, m, o), entry in calls.items()]
+
+    metric("llm_calls", "gauge", "LLM calls in the last run (including cache hits).", samples("calls"))
+    metric("llm_cache_hits", "gauge", "LLM calls served from the response cache.", samples("cached"))
+    metric("llm_errors", "gauge", "LLM calls that failed after retries.", samples("errors"))
+    metric("llm_call_seconds", "gauge", "Summed LLM call time (including retries).", samples("seconds"))
+    metric("llm_tokens", "gauge", "Tokens reported by the SDK usage metadata.",
+           samples("input", direction="input") + samples("output", direction="output"))
+    metric("llm_retries", "gauge", "Retries performed by the resilience layer.", samples("retries"))
+    metric("llm_cost_usd", "gauge", "Estimated cost from public list prices.", samples("cost"))
+    metric("circuit_rejections", "gauge", "Calls rejected by an open circuit breaker.",
+           [({"provider": provider}, count) for provider, count in report["circuit_rejections"].items()])
+    return "\n".join(lines) + "\n"
+
+
+def history_entry(report):
+    """履歴に残す要約（呼び出しの明細は含めない）"""
+    return {
+        "script": report["script"],
+        "run_id": report["run_id"],
+        "started_at": report["started_at"],
+        "duration_s": report["duration_s"],
+        "total_cost_usd": report["total_cost_usd"],
+        "stages": {name: entry["wall_seconds"] for name, entry in report["stages"].items()},
+        "providers": {provider: {key: p[key] for key in ("calls", "cached", "retries", "input_tokens",
+                                                         "output_tokens", "cost_usd")}
+                      for provider, p in report["providers"].items()},
+    }
+
+
+def append_history(report, history_path=HISTORY_PATH):
+    """実行の要約を履歴に追記（上限を超えたら古い行を削除）"""
+    os.makedirs(os.path.dirname(history_path), exist_ok=True)
+    line = json.dumps(history_entry(report), ensure_ascii=False, sort_keys=True)
+    lines = []
+    if os.path.exists(history_path):
+        with open(history_path, "r", encoding="utf-8") as f:
+            lines = [existing.rstrip("\n") for existing in f if existing.strip()]
+    lines = (lines + [line])[-HISTORY_MAX_LINES:]
+    _write_atomic(history_path, "\n".join(lines) + "\n")
+
+
+def load_history(history_path=HISTORY_PATH, script=None):
+    if not os.path.exists(history_path):
+        return []
+    entries = []
+    with open(history_path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if script is None or entry.get("script") == script:
+                entries.append(entry)
+    return entries
+
+
+def find_regressions(entries, window=7, ratio=REGRESSION_RATIO):
+    """最新の実行を、それ以前の最大 window 回の中央値と比べて劣化した指標を返す"""
+    if len(entries) < 2:
+        return []
+    latest, previous = entries[-1], entries[-1 - window:-1]
+    metrics = {"duration_s": lambda e: e.get("duration_s"), "total_cost_usd": lambda e: e.get("total_cost_usd")}
+    for name in latest.get("stages", {}):
+        metrics[f"stage:{name}"] = lambda e, name=name: e.get("stages", {}).get(name)
+    regressions = []
+    for label, getter in metrics.items():
+        values = [v for v in (getter(e) for e in previous) if v]
+        current = getter(latest)
+        if not values or not current:
+            continue
+        baseline = statistics.median(values)
+        if current > baseline * ratio:
+            regressions.append((label, baseline, current))
+    return regressions
+
+
+def _print_history(script=None, last=10, history_path=HISTORY_PATH):
+    entries = load_history(history_path, script)
+    if not entries:
+        print(f"履歴がありません: {history_path}")
+        return 0
+    scripts = [script] if script else list(dict.fromkeys(e["script"] for e in entries))
+    regressed = 0
+    for name in scripts:
+        runs = [e for e in entries if e["script"] == name]
+        print(f"\n📈 {name}（直近 {min(last, len(runs))}/{len(runs)}回）")
+        for entry in runs[-last:]:
+            tokens = sum(p["input_tokens"] + p["output_tokens"] for p in entry["providers"].values())
+            slowest = max(entry["stages"].items(), key=lambda item: item[1], default=("-", 0))
+            print(f"   {entry['run_id']}  {entry['duration_s']:8.1f}秒  ${entry['total_cost_usd']:.4f}"
+                  f"  {tokens:>8,}トークン  最長: {slowest[0]} {slowest[1]:.1f}秒")
+        for label, baseline, current in find_regressions(runs):
+            regressed += 1
+            print(f"   ⚠️ 劣化: {label} {baseline:.3g} → {current:.3g}（以前の中央値の{current / baseline:.1f}倍）")
+    return regressed
+
+
+_telemetry = Telemetry()
+
+
+def get_telemetry():
+    return _telemetry
+
+
+def reset():
+    """計測値を捨てて新しく計測を始める（検証・デモ用）"""
+    global _telemetry
+    _telemetry = Telemetry()
+    return _telemetry
+
+
+# モジュール関数として使えるようにする（telemetry.stage(...) など）
+def stage(name):
+    return get_telemetry().stage(name)
+
+
+def track_call(provider, model, operation, batch=False):
+    return get_telemetry().track_call(provider, model, operation, batch)
+
+
+def add_usage(input_tokens=0, output_tokens=0, estimated=False):
+    get_telemetry().add_usage(input_tokens, output_tokens, estimated)
+
+
+def write_report(script, **kwargs):
+    """実行レポートを書き出し、要約を表示する"""
+    report = get_telemetry().write_report(script, **kwargs)
+    print(get_telemetry().summary(script))
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="実行ごとの計測値の履歴を表示し、劣化を検出する")
+    parser.add_argument("--script", help="表示するスクリプト名（collector / analyst / merge_tactics / pipeline）")
+    parser.add_argument("--last", type=int, default=10, help="表示する実行の数")
+    parser.add_argument("--fail-on-regression", action="store_true", help="劣化があれば終了コード1で終わる")
+    args = parser.parse_args()
+
+    regressions = _print_history(args.script, args.last)
+    if regressions and args.fail_on_regression:
+        sys.exit(1)
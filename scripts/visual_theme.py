@@ -0,0 +1,172 @@
+"""
+記事カードのビジュアルテーマ（グラデーション・アイコン）の判定
+analyst.py（新しい戦術）と migrate_visual_theme.py（既存データの付け直し）で共通のルール表を使う
+
+- ルールは THEME_RULES に上から優先順に並べる（キーワードはタイトルの小文字に部分一致）
+- 全ルールのキーワードを1つの正規表現（共通の接頭辞をまとめた木の形）にコンパイルし、
+  タイトルを1回走査するだけで判定する（先読み (?=...) で重なった一致も拾い、最も優先度の高いルールを採用する）
+- どのルールにも当たらなければ、番号に応じて GRADIENT_THEMES を順に使う
+- 一括モード（ThemeEngine.apply）はコーパス全体のタイトルを連結して1回で走査する
+
+使い方:
+    theme = get_visual_theme(tactic, index)
+    counts = get_engine().apply(tactics)   # 全件の visual_theme を付け直す
+"""
+import bisect
+import re
+from collections import Counter
+
+# どのルールにも当たらない場合に順番に使うテーマ
+GRADIENT_THEMES = [
+    {"gradient": "linear-gradient(135deg, #667eea 0%, #764ba2 100%)", "icon": "🤖"},  # Purple AI
+    {"gradient": "linear-gradient(135deg, #f093fb 0%, #f5576c 100%)", "icon": "🧠"},  # Pink Brain
+    {"gradient": "linear-gradient(135deg, #4facfe 0%, #00f2fe 100%)", "icon": "💡"},  # Blue Cyan
+    {"gradient": "linear-gradient(135deg, #43e97b 0%, #38f9d7 100%)", "icon": "⚡"},  # Green Teal
+    {"gradient": "linear-gradient(135deg, #fa709a 0%, #fee140 100%)", "icon": "🔥"},  # Pink Yellow
+    {"gradient": "linear-gradient(135deg, #a8edea 0%, #fed6e3 100%)", "icon": "✨"},  # Soft Pastel
+    {"gradient": "linear-gradient(135deg, #5ee7df 0%, #b490ca 100%)", "icon": "🚀"},  # Teal Purple
+    {"gradient": "linear-gradient(135deg, #d299c2 0%, #fef9d7 100%)", "icon": "💎"},  # Rose Cream
+    {"gradient": "linear-gradient(135deg, #89f7fe 0%, #66a6ff 100%)", "icon": "🌐"},  # Sky Blue
+    {"gradient": "linear-gradient(135deg, #ffecd2 0%, #fcb69f 100%)", "icon": "🎯"},  # Peach
+]
+
+# タイトルのキーワード → テーマ（上にあるルールほど優先）
+THEME_RULES = [
+    {"name": "openai", "keywords": ["gpt", "openai", "chatgpt"],
+     "theme": {"gradient": "linear-gradient(135deg, #10a37f 0%, #1a7f5a 100%)", "icon": "🤖"}},
+    {"name": "google", "keywords": ["gemini", "google", "bard"],
+     "theme": {"gradient": "linear-gradient(135deg, #4285f4 0%, #34a853 100%)", "icon": "✨"}},
+    {"name": "anthropic", "keywords": ["claude", "anthropic"],
+     "theme": {"gradient": "linear-gradient(135deg, #d4a27f 0%, #cc785c 100%)", "icon": "🧠"}},
+    {"name": "meta", "keywords": ["llama", "meta"],
+     "theme": {"gradient": "linear-gradient(135deg, #0668E1 0%, #1877f2 100%)", "icon": "🦙"}},
+    {"name": "code", "keywords": ["code", "codex", "coding", "developer", "プログラミング"],
+     "theme": {"gradient": "linear-gradient(135deg, #6366f1 0%, #8b5cf6 100%)", "icon": "💻"}},
+    {"name": "image", "keywords": ["image", "画像", "vision", "イメージ"],
+     "theme": {"gradient": "linear-gradient(135deg, #ec4899 0%, #f43f5e 100%)", "icon": "🎨"}},
+    {"name": "agent", "keywords": ["agent", "エージェント", "lightning", "workflow"],
+     "theme": {"gradient": "linear-gradient(135deg, #f59e0b 0%, #ef4444 100%)", "icon": "🚀"}},
+    {"name": "prompt", "keywords": ["promptions", "prompt", "ui"],
+     "theme": {"gradient": "linear-gradient(135deg, #0ea5e9 0%, #8b5cf6 100%)", "icon": "🎛️"}},
+    {"name": "nvidia", "keywords": ["nemotron", "nvidia"],
+     "theme": {"gradient": "linear-gradient(135deg, #76b900 0%, #1a1a1a 100%)", "icon": "⚡"}},
+    {"name": "hugging_face", "keywords": ["apriel", "hugging"],
+     "theme": {"gradient": "linear-gradient(135deg, #FFD21E 0%, #FF9D00 100%)", "icon": "🤗"}},
+]
+
+# 連結したタイトルの区切り（キーワードに含まれない文字）
+_SEPARATOR = "\n"
+
+# 一括モードで未一致を表すルール名
+FALLBACK = "fallback"
+
+
+def _trie_pattern(keywords):
+    """キーワードを共通の接頭辞でまとめた正規表現（同じ位置では最も長いキーワードに一致する）"""
+    trie = {}
+    for keyword in keywords:
+        node = trie
+        for ch in keyword:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def build(node):
+        branches = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ""
+        if "" not in node:
+            return branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        # キーワードの終わりでも、より長いキーワードを先に試す
+        return "(?:" + "|".join(branches) + ")?"
+
+    return build(trie)
+
+
+class ThemeEngine:
+    """ルール表を1つの正規表現にコンパイルしたテーマ判定"""
+
+    def __init__(self, rules=THEME_RULES, fallback_themes=GRADIENT_THEMES):
+        self.rules = [dict(rule) for rule in rules]
+        self.fallback_themes = list(fallback_themes)
+        rule_of = {}
+        for index, rule in enumerate(self.rules):
+            for keyword in rule["keywords"]:
+                keyword = keyword.lower()
+                if _SEPARATOR in keyword or not keyword:
+                    raise ValueError(f"ルール {rule['name']} のキーワードが不正です: {keyword!r}")
+                # 同じキーワードが複数のルールにあれば上のルールが優先
+                rule_of.setdefault(keyword, index)
+        # 正規表現は各位置で最も長いキーワードに一致するので、その位置で同時に当たる
+        # 接頭辞のキーワード（"codex" に対する "code" など）のルールも含めて最優先のものを引けるようにしておく
+        self._rule_of = {
+            keyword: min(rule for prefix, rule in rule_of.items() if keyword.startswith(prefix))
+            for keyword in rule_of
+        }
+        # 先頭の文字の集合を前に置くと、当たりうる位置まで読み飛ばせる
+        first_chars = "".join(sorted({re.escape(keyword[0]) for keyword in rule_of}))
+        self.pattern = re.compile(f"(?=[{first_chars}])(?=({_trie_pattern(rule_of)}))")
+
+    def match_rule(self, title):
+        """タイトルに当たる最も優先度の高いルールの番号（なければ None）"""
+        best = None
+        for match in self.pattern.finditer(title.lower()):
+            rule = self._rule_of[match.group(1)]
+            if best is None or rule < best:
+                best = rule
+                if best == 0:
+                    break
+        return best
+
+    def theme_for(self, rule, index):
+        if rule is None:
+            return dict(self.fallback_themes[index % len(self.fallback_themes)])
+        return dict(self.rules[rule]["theme"])
+
+    def classify(self, item, index):
+        """1件のテーマ（dict）を返す"""
+        return self.theme_for(self.match_rule(item.get("title") or ""), index)
+
+    def match_rules(self, titles):
+        """タイトルのリストに対するルール番号のリスト（全タイトルを連結して1回だけ走査する）"""
+        # lower() は文字数が変わる場合があるため、位置の対応は小文字化した後の長さで取る
+        lowered = [title.replace(_SEPARATOR, " ").lower() for title in titles]
+        starts = []
+        position = 0
+        for title in lowered:
+            starts.append(position)
+            position += len(title) + 1
+        best = [None] * len(lowered)
+        for match in self.pattern.finditer(_SEPARATOR.join(lowered)):
+            owner = bisect.bisect_right(starts, match.start()) - 1
+            rule = self._rule_of[match.group(1)]
+            if best[owner] is None or rule < best[owner]:
+                best[owner] = rule
+        return best
+
+    def apply(self, items, start_index=0):
+        """全件の visual_theme をその場で付け直し、ルール名ごとの件数を返す（一括モード）
+
+        items の並び順の番号（start_index から）を、どのルールにも当たらない場合のテーマの選択に使う。
+        """
+        counts = Counter()
+        rules = self.match_rules([item.get("title") or "" for item in items])
+        for offset, (item, rule) in enumerate(zip(items, rules)):
+            item["visual_theme"] = self.theme_for(rule, start_index + offset)
+            counts[FALLBACK if rule is None else self.rules[rule]["name"]] += 1
+        return counts
+
+
+_engine = None
+
+
+def get_engine():
+    """既定のルール表のエンジン（プロセス内で1回だけコンパイルする）"""
+    global _engine
+    if _engine is None:
+        _engine = ThemeEngine()
+    return _engine
+
+
+def get_visual_theme(item, index):
+    """タイトルからビジュアルテーマ（グラデーション・アイコン）を決定"""
+    return get_engine().classify(item, index)
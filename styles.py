@@ -1,7 +1,21 @@
 """
 CSSスタイル定義
 Streamlitアプリのスタイリングを管理
+
+scripts/build_static.py でCSSとロゴを static/ に書き出しておくと、
+ページには小さな参照だけを埋め込み、本体はブラウザにキャッシュさせる
+（ビルドされていない・古い場合は従来どおりインラインで埋め込む）
 """
+import base64
+import functools
+import hashlib
+import json
+import os
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+STATIC_MANIFEST_PATH = os.path.join(BASE_DIR, "static", "manifest.json")
+STATIC_URL = "app/static/"
+LOGO_PATH = os.path.join(BASE_DIR, "assets", "logo_b.svg")
 
 def get_custom_css():
     """カスタムCSSを返す - モダンSaaS × 近未来SF/RPG UI"""
@@ -322,6 +336,73 @@ def get_custom_css():
         font-size: 1.3rem !important;
     }
     
+    /* ============================================
+       トップページの記事カード（rendering.render_card_html）
+       ============================================ */
+    .tactic-card {
+        border: 1px solid #e0e0e0;
+        border-radius: 12px;
+        margin-bottom: 0.5rem;
+        box-shadow: 0 2px 8px rgba(0,0,0,0.1);
+        overflow: hidden;
+        height: 380px;
+        display: flex;
+        flex-direction: column;
+    }
+    .tactic-card-visual {
+        height: 200px;
+        display: flex;
+        align-items: center;
+        justify-content: center;
+        color: white;
+        font-size: 4rem;
+        border-radius: 12px 12px 0 0;
+    }
+    .tactic-card-thumb {
+        width: 100%;
+        height: 200px;
+        object-fit: cover;
+        display: block;
+        border-radius: 12px 12px 0 0;
+    }
+    .tactic-card-body {
+        padding: 1rem 1.5rem;
+        flex: 1;
+        display: flex;
+        flex-direction: column;
+    }
+    .tactic-card-date {
+        font-size: 0.8rem;
+        color: #999;
+    }
+    .tactic-card-title {
+        font-size: 1.5rem;
+        color: #333;
+        margin: 0.3rem 0;
+        line-height: 1.3;
+        overflow: hidden;
+        display: -webkit-box;
+        -webkit-line-clamp: 2;
+        -webkit-box-orient: vertical;
+    }
+    .tactic-card-highlight {
+        font-size: 0.85rem;
+        color: #666;
+        margin: 0.2rem 0;
+        flex: 1;
+        overflow: hidden;
+        display: -webkit-box;
+        -webkit-line-clamp: 3;
+        -webkit-box-orient: vertical;
+    }
+    
+    /* 記事ページの見出しアンカー（固定ヘッダーに隠れないようオフセット） */
+    .article-anchor {
+        position: relative;
+        top: -100px;
+        visibility: hidden;
+    }
+    
     /* ============================================
        スクロールバーカスタマイズ（オプション）
        ============================================ */
@@ -343,6 +424,69 @@ def get_custom_css():
 """
 
 
+def source_digest(data):
+    """ビルド済みファイルと元データの対応確認に使うハッシュ"""
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    return hashlib.sha256(data).hexdigest()[:16]
+
+
+@functools.lru_cache(maxsize=1)
+def _load_static_manifest(version):
+    try:
+        with open(STATIC_MANIFEST_PATH, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def get_static_manifest():
+    """static/manifest.json（ビルド済みアセットの対応表）"""
+    try:
+        version = os.path.getmtime(STATIC_MANIFEST_PATH)
+    except OSError:
+        return {}
+    return _load_static_manifest(version)
+
+
+@functools.lru_cache(maxsize=1)
+def _custom_css_digest():
+    return source_digest(get_custom_css())
+
+
+def get_custom_css_tag():
+    """ページに埋め込むCSS（ビルド済みならファイル参照のみ）"""
+    css = get_static_manifest().get("css")
+    if css and css.get("source") == _custom_css_digest():
+        return f'<style>@import url("{STATIC_URL}{css["file"]}");</style>'
+    return get_custom_css()
+
+
+def inject_custom_css():
+    """カスタムCSSを適用"""
+    import streamlit as st
+    st.markdown(get_custom_css_tag(), unsafe_allow_html=True)
+
+
+@functools.lru_cache(maxsize=1)
+def _read_logo(version):
+    with open(LOGO_PATH, "rb") as f:
+        data = f.read()
+    return source_digest(data), "data:image/svg+xml;base64," + base64.b64encode(data).decode()
+
+
+def get_logo_src():
+    """ロゴ画像のURL（ビルド済みなら静的ファイル、なければdata URI）"""
+    try:
+        digest, data_uri = _read_logo(os.path.getmtime(LOGO_PATH))
+    except OSError:
+        return None
+    logo = get_static_manifest().get("logo")
+    if logo and logo.get("source") == digest:
+        return STATIC_URL + logo["file"]
+    return data_uri
+
+
 def render_sidebar():
     """共通サイドバーナビゲーションを描画"""
     import streamlit as st
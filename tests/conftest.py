@@ -0,0 +1,70 @@
+"""
+テスト共通のフィクスチャ
+外部APIの代わりに tests/fixture_server.py のローカルサーバー・スタブを使う
+"""
+import os
+import sys
+
+import pytest
+
+# プロジェクトルートをパスに追加
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts import llm_cache, rate_limit, resilience, telemetry
+from tests.fixture_server import ClaudeStub, FaultInjector, FixtureServer, GeminiStub
+
+# 検証用に短くした再試行の待ち時間・タイムアウト
+FAST_RETRY = {"base_delay": 0.05, "max_delay": 0.2, "attempt_timeout": 1.0, "deadline": 10.0}
+
+
+@pytest.fixture(autouse=True)
+def isolated_providers():
+    """LLMキャッシュを使わず、レート制限で待たせず、再試行・計測の状態をテストごとに作り直す"""
+    llm_cache.configure(mode=llm_cache.MODE_OFF)
+    for provider in rate_limit.PROVIDER_LIMITS:
+        rate_limit.configure(provider, rate_per_minute=6000, burst=100)
+        resilience.configure(provider)
+    yield telemetry.reset()
+    for provider in rate_limit.PROVIDER_LIMITS:
+        rate_limit.configure(provider)
+        resilience.configure(provider)
+
+
+@pytest.fixture
+def server():
+    """起動済みの FixtureServer（テストの終わりに停止する）"""
+    with FixtureServer() as fixture_server:
+        yield fixture_server
+
+
+@pytest.fixture
+def gemini_client(server):
+    """server に向けた Gemini クライアント"""
+    from google import genai
+    from google.genai import types
+
+    return genai.Client(api_key="fixture", http_options=types.HttpOptions(base_url=server.url()))
+
+
+@pytest.fixture
+def claude_client(server):
+    """server に向けた Claude クライアント（SDK側の再試行は無効）"""
+    import anthropic
+
+    return anthropic.Anthropic(api_key="fixture", base_url=server.url(), max_retries=0)
+
+
+@pytest.fixture
+def inject_faults(server):
+    """inject_faults(provider, faults, ...) でスタブの前に FaultInjector を挟み、注入器を返す"""
+
+    def install(provider, faults=(), retry_after=None, always=None, stub=None):
+        if provider == "gemini":
+            injector = FaultInjector((stub or GeminiStub()).handle, faults, retry_after, always)
+            server.route("POST", "/v1beta/models/", injector.handle)
+        else:
+            injector = FaultInjector((stub or ClaudeStub()).handle, faults, retry_after, always)
+            server.route("POST", "/v1/messages", injector.handle)
+        return injector
+
+    return install
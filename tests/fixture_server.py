@@ -0,0 +1,473 @@
+"""
+オフライン検証用のローカルHTTPフィクスチャサーバーとAPIスタブ
+外部サービスに接続せずに、フィードの条件付きGET（304）、Gemini・Claude の応答
+（ストリーミング・バッチ）、429・5xx・タイムアウトなどの障害を再現する
+
+テスト（tests/conftest.py のフィクスチャ）から使う。
+"""
+import json
+import re
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def build_rss(name, items=5):
+    """テスト用のRSS 2.0文書を生成"""
+    now = datetime.now(timezone.utc)
+    entries = "".join(
+        f"""<item>
+<title>{name} release note {i}</title>
+<link>https://example.com/{name.lower().replace(' ', '-')}/{i}</link>
+<description>{name} announced a new model with 2x faster inference.</description>
+<pubDate>{format_datetime(now - timedelta(hours=i))}</pubDate>
+</item>"""
+        for i in range(items)
+    )
+    return f"""<?xml version="1.0" encoding="UTF-8"?>
+<rss version="2.0"><channel><title>{name}</title><link>https://example.com/</link>
+<description>fixture</description>{entries}</channel></rss>""".encode("utf-8")
+
+
+class FeedFixture:
+    """条件付きGET（ETag / Last-Modified）に対応したフィード"""
+
+    def __init__(self, name, delay=0.0):
+        self.name = name
+        self.delay = delay
+        self.body = build_rss(name)
+        self.etag = f'"{abs(hash(self.body))}"'
+        self.last_modified = format_datetime(datetime.now(timezone.utc), usegmt=True)
+        self.hits = 0
+        self.not_modified = 0
+
+    def handle(self, request):
+        self.hits += 1
+        if self.delay:
+            time.sleep(self.delay)
+        if (request.headers.get("If-None-Match") == self.etag
+                or request.headers.get("If-Modified-Since") == self.last_modified):
+            self.not_modified += 1
+            return 304, {"ETag": self.etag, "Last-Modified": self.last_modified}, b""
+        headers = {
+            "Content-Type": "application/rss+xml; charset=utf-8",
+            "ETag": self.etag,
+            "Last-Modified": self.last_modified,
+        }
+        return 200, headers, self.body
+
+
+SAMPLE_ARTICLE = """### 概要
+新モデルの公開により、社内ドキュメント検索の構築期間とコストを大きく削減できるようになった。既存のRAG基盤を置き換える選択肢として注目されている。
+
+### 技術詳細
+- コンテキスト長 1Mトークン
+- 推論速度は従来比 2倍
+- 日本語の長文要約で精度が向上
+
+### 従来ソリューションとの比較
+| 項目 | 新技術 | 従来ソリューションA | 従来ソリューションB |
+|------|--------|---------------------|---------------------|
+| 構築期間 | 数日 | 1-3ヶ月 | 3-6ヶ月 |
+| 初期コスト | 低 | 中 | 高 |
+
+### ビジネス活用シーン
+社内FAQの自動応答、契約書レビューの一次チェック、議事録からのタスク抽出に使える。
+
+### 導入ステップ
+1. 対象ドキュメントを選定する
+2. 小規模なPoCで精度を確認する
+3. 権限設計を行い本番に展開する
+
+### まとめ
+構築期間とコストの両面で従来のRAG構成より有利であり、まずは社内FAQなど効果を測りやすい業務から試すのがよい。今後はエージェント機能との連携による業務自動化の拡大が期待される。
+
+---
+※ 以下は補足情報です。本記事の内容は公開情報に基づいています。関連リンクや参考資料は各社の公式発表をご確認ください。
+"""
+
+
+class ClaudeStub:
+    """Anthropic Messages API（POST /v1/messages）とMessage Batches APIのローカル代替
+
+    stream=true ならSSEで少しずつ返す。アシスタントの書き出し（途中経過からの再開）にも対応する。
+    fail_after_chars を指定すると、最初のストリーミング要求をその文字数で切断する。
+    バッチは作成から batch_delay 秒後に完了する。failing_ids の custom_id は errored になり、
+    slow_ids の custom_id はキャンセルされるまで終わらない（キャンセルすると canceled、他の要求は成功のまま）。
+    batches_available=False ならバッチAPIは404を返す。
+    """
+
+    def __init__(self, article=SAMPLE_ARTICLE, chunk_chars=16, chunk_delay=0.01,
+                 first_token_delay=0.05, fail_after_chars=None,
+                 batch_delay=0.3, failing_ids=(), slow_ids=(), batches_available=True):
+        self.article = article
+        self.chunk_chars = chunk_chars
+        self.chunk_delay = chunk_delay
+        self.first_token_delay = first_token_delay
+        self.fail_after_chars = fail_after_chars
+        self.batch_delay = batch_delay
+        self.failing_ids = set(failing_ids)
+        self.slow_ids = set(slow_ids)
+        self.batches_available = batches_available
+        self.requests = 0
+        self.batch_requests = 0
+        self.streamed_chars = 0
+        self.disconnected = 0
+        self._batches = {}
+        self._lock = threading.Lock()
+
+    def install(self, server):
+        """FixtureServer にエンドポイントを登録"""
+        server.route("POST", "/v1/messages", self.handle)
+        server.route("POST", "/v1/messages/batches", self.handle_batch_create)
+        server.route("GET", "/v1/messages/batches/", self.handle_batch_get)
+        server.route("POST", "/v1/messages/batches/", self.handle_batch_cancel)
+        return self
+
+    def _completion(self, messages):
+        """書き出しがあれば、その続きだけを返す"""
+        if messages and messages[-1].get("role") == "assistant":
+            prefix = messages[-1].get("content", "")
+            if self.article.startswith(prefix):
+                return self.article[len(prefix):]
+        return self.article
+
+    @staticmethod
+    def _message(model, text, stop_reason):
+        return {
+            "id": "msg_fixture", "type": "message", "role": "assistant", "model": model,
+            "content": [{"type": "text", "text": text}] if text is not None else [],
+            "stop_reason": stop_reason, "stop_sequence": None,
+            "usage": {"input_tokens": 100, "output_tokens": len(text or "") // 2 or 1},
+        }
+
+    def handle(self, request):
+        self.requests += 1
+        payload = json.loads(request.rfile.read(int(request.headers.get("Content-Length", 0))))
+        text = self._completion(payload.get("messages", []))
+        model = payload.get("model", "")
+        if not payload.get("stream"):
+            return 200, {"Content-Type": "application/json"}, json.dumps(
+                self._message(model, text, "end_turn"), ensure_ascii=False).encode("utf-8")
+
+        fail_after = self.fail_after_chars
+        self.fail_after_chars = None
+        return 200, {"Content-Type": "text/event-stream"}, self._events(model, text, fail_after)
+
+    @staticmethod
+    def _json(status, data):
+        return status, {"Content-Type": "application/json"}, json.dumps(data, ensure_ascii=False).encode("utf-8")
+
+    def _batch_object(self, batch_id, request):
+        batch = self._batches[batch_id]
+        slow = sum(1 for r in batch["requests"] if r["custom_id"] in self.slow_ids)
+        ended = batch["canceled"] or (not slow and time.time() - batch["created"] >= self.batch_delay)
+        total = len(batch["requests"])
+        failed = sum(1 for r in batch["requests"] if r["custom_id"] in self.failing_ids)
+        created = datetime.fromtimestamp(batch["created"], timezone.utc)
+        counts = {"processing": 0 if ended else total, "succeeded": 0, "errored": 0, "canceled": 0, "expired": 0}
+        if ended and batch["canceled"]:
+            counts.update(succeeded=total - failed - slow, errored=failed, canceled=slow)
+        elif ended:
+            counts.update(succeeded=total - failed, errored=failed)
+        return {
+            "id": batch_id, "type": "message_batch",
+            "processing_status": "ended" if ended else "in_progress",
+            "request_counts": counts,
+            "created_at": created.isoformat(), "expires_at": (created + timedelta(hours=24)).isoformat(),
+            "ended_at": datetime.now(timezone.utc).isoformat() if ended else None,
+            "archived_at": None, "cancel_initiated_at": None,
+            "results_url": f"http://{request.headers['Host']}/v1/messages/batches/{batch_id}/results" if ended else None,
+        }
+
+    def handle_batch_create(self, request):
+        self.batch_requests += 1
+        payload = json.loads(request.rfile.read(int(request.headers.get("Content-Length", 0))))
+        if not self.batches_available:
+            return self._json(404, {"type": "error", "error": {"type": "not_found_error", "message": "Not found"}})
+        with self._lock:
+            batch_id = f"msgbatch_fixture_{len(self._batches) + 1}"
+            self._batches[batch_id] = {"created": time.time(), "requests": payload["requests"], "canceled": False}
+        return self._json(200, self._batch_object(batch_id, request))
+
+    def handle_batch_get(self, request):
+        self.batch_requests += 1
+        parts = request.path.split("?", 1)[0].rstrip("/").split("/")
+        batch_id = parts[4]
+        if batch_id not in self._batches:
+            return self._json(404, {"type": "error", "error": {"type": "not_found_error", "message": batch_id}})
+        if parts[-1] != "results":
+            return self._json(200, self._batch_object(batch_id, request))
+
+        lines = []
+        for item in self._batches[batch_id]["requests"]:
+            custom_id = item["custom_id"]
+            if custom_id in self.slow_ids:
+                result = {"type": "canceled"}
+            elif custom_id in self.failing_ids:
+                result = {"type": "errored", "error": {"type": "error",
+                                                       "error": {"type": "api_error", "message": "fixture failure"}}}
+            else:
+                text = self._completion(item["params"]["messages"])
+                result = {"type": "succeeded", "message": self._message(item["params"]["model"], text, "end_turn")}
+            lines.append(json.dumps({"custom_id": custom_id, "result": result}, ensure_ascii=False))
+        return 200, {"Content-Type": "application/binary"}, ("\n".join(lines) + "\n").encode("utf-8")
+
+    def handle_batch_cancel(self, request):
+        self.batch_requests += 1
+        batch_id = request.path.split("?", 1)[0].rstrip("/").split("/")[4]
+        self._batches[batch_id]["canceled"] = True
+        return self._json(200, self._batch_object(batch_id, request))
+
+    def _events(self, model, text, fail_after):
+        def event(name, data):
+            return f"event: {name}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n".encode("utf-8")
+
+        yield event("message_start", {"type": "message_start", "message": self._message(model, None, None)})
+        yield event("content_block_start", {"type": "content_block_start", "index": 0,
+                                            "content_block": {"type": "text", "text": ""}})
+        time.sleep(self.first_token_delay)
+        try:
+            for start in range(0, len(text), self.chunk_chars):
+                if fail_after is not None and start >= fail_after:
+                    return  # 完了イベントを送らずに切断
+                chunk = text[start:start + self.chunk_chars]
+                self.streamed_chars += len(chunk)
+                yield event("content_block_delta", {"type": "content_block_delta", "index": 0,
+                                                    "delta": {"type": "text_delta", "text": chunk}})
+                time.sleep(self.chunk_delay)
+        except GeneratorExit:
+            # クライアントが途中で接続を閉じた（まとめでの打ち切りなど）
+            self.disconnected += 1
+            raise
+        yield event("content_block_stop", {"type": "content_block_stop", "index": 0})
+        yield event("message_delta", {"type": "message_delta",
+                                      "delta": {"stop_reason": "end_turn", "stop_sequence": None},
+                                      "usage": {"output_tokens": len(text) // 2}})
+        yield event("message_stop", {"type": "message_stop"})
+
+
+class GeminiStub:
+    """Gemini API（POST /v1beta/models/<model>:generateContent / :streamGenerateContent）のローカル代替
+
+    プロンプト中の「ニュース: ...」から戦術データのJSONを作って返す（ストリーミングはSSEで少しずつ返す）。
+    複数件のプロンプト（[1], [2], ...）にはJSON配列で答え、ニュース選定のプロンプトには選定結果を返す。
+    invalid_titles に含まれるニュースは、複数件の応答の中でだけ必須フィールド（prompt）を欠いた形で返す。
+    malformed_titles に含まれるニュースは、1件ずつの最初の応答だけを途中で切れたJSONにする。
+    """
+
+    def __init__(self, invalid_titles=(), malformed_titles=()):
+        self.invalid_titles = set(invalid_titles)
+        self.malformed_titles = set(malformed_titles)
+        self.requests = 0
+        self.prompt_chars = 0
+        self.schema_requests = 0
+
+    def install(self, server):
+        server.route("POST", "/v1beta/models/", self.handle)
+        return self
+
+    def _tactic(self, title, multi=False):
+        tactic = {
+            "title": f"{title}でコードレビュー", "news_highlight": f"{title}の処理速度が2倍に",
+            "problem_context": "レビュー待ちの解消", "recommended_ai": {"model": "Gemini", "reason": "高速", "badge_color": "orange"},
+            "use_cases": ["PR作成前の確認"], "steps": ["差分をコピー", "AIに依頼"],
+            "prompt": "次の差分をレビューしてください。", "tags": ["レビュー"],
+        }
+        if multi and title in self.invalid_titles:
+            del tactic["prompt"]
+        return tactic
+
+    def respond(self, prompt):
+        if "【ニュース一覧】" in prompt:
+            indexes = re.findall(r"^\[(\d+)\] [^:]+: (.*)$", prompt, flags=re.M)
+            return json.dumps([{"index": int(i), "summary_ja": f"{title[:30]}の要約"} for i, title in indexes[:3]],
+                              ensure_ascii=False)
+        titles = re.findall(r"^ニュース: (.*)$", prompt, flags=re.M)
+        if re.search(r"^\[1\]$", prompt, flags=re.M):
+            items = [{"news_index": i, **self._tactic(title, multi=True)} for i, title in enumerate(titles, 1)]
+            return "```json\n" + json.dumps(items, ensure_ascii=False) + "\n```"
+        title = titles[0] if titles else "AI"
+        text = json.dumps(self._tactic(title), ensure_ascii=False)
+        if title in self.malformed_titles:
+            # 出力の上限で切れた応答（steps の途中まで）
+            self.malformed_titles.discard(title)
+            return text[:text.index('"steps"') + 20]
+        return text
+
+    @staticmethod
+    def _response(text, finish_reason="STOP"):
+        candidate = {"content": {"parts": [{"text": text}], "role": "model"}}
+        if finish_reason:
+            candidate["finishReason"] = finish_reason
+        return {"candidates": [candidate]}
+
+    @staticmethod
+    def _usage(prompt, text):
+        return {"promptTokenCount": len(prompt) // 2, "candidatesTokenCount": len(text) // 2,
+                "thoughtsTokenCount": 10}
+
+    def _events(self, prompt, text, chunk_chars=40):
+        for offset in range(0, len(text), chunk_chars):
+            last = offset + chunk_chars >= len(text)
+            body = self._response(text[offset:offset + chunk_chars], "STOP" if last else None)
+            if last:
+                # 実際のAPIと同じく、最後のチャンクに使用量を付ける
+                body["usageMetadata"] = self._usage(prompt, text)
+            yield f"data: {json.dumps(body, ensure_ascii=False)}\r\n\r\n".encode("utf-8")
+
+    def handle(self, request):
+        self.requests += 1
+        payload = json.loads(request.rfile.read(int(request.headers.get("Content-Length", 0))))
+        prompt = "".join(part.get("text", "") for content in payload.get("contents", [])
+                         for part in content.get("parts", []))
+        self.prompt_chars += len(prompt)
+        if payload.get("generationConfig", {}).get("responseSchema"):
+            self.schema_requests += 1
+        text = self.respond(prompt)
+        if ":streamGenerateContent" in request.path:
+            return 200, {"Content-Type": "text/event-stream"}, self._events(prompt, text)
+        body = self._response(text)
+        body["usageMetadata"] = self._usage(prompt, text)
+        return 200, {"Content-Type": "application/json"}, json.dumps(body, ensure_ascii=False).encode("utf-8")
+
+
+class FaultInjector:
+    """ハンドラの前で障害を起こすラッパー（再試行・サーキットブレーカーの検証用）
+
+    faults の要素を要求ごとに1つずつ使い、使い切ったら本来のハンドラに渡す。
+    - 整数: そのステータスのエラー応答（429・503には Retry-After を付ける）
+    - ("delay", 秒): 指定の秒数待ってから本来の応答を返す（タイムアウトの検証）
+    always に整数を指定すると、faults を使い切った後もそのエラーを返し続ける（プロバイダの停止）。
+    """
+
+    STATUS_NAMES = {400: "INVALID_ARGUMENT", 429: "RESOURCE_EXHAUSTED", 500: "INTERNAL",
+                    503: "UNAVAILABLE", 529: "OVERLOADED"}
+
+    def __init__(self, handler, faults=(), retry_after=None, always=None):
+        self.handler = handler
+        self.faults = list(faults)
+        self.retry_after = retry_after
+        self.always = always
+        self.requests = 0
+        self.injected = 0
+        self._lock = threading.Lock()
+
+    def _error(self, status):
+        error = {"code": status, "message": f"injected {status}", "status": self.STATUS_NAMES.get(status, "UNKNOWN"),
+                 "type": "overloaded_error" if status == 529 else "api_error"}
+        headers = {"Content-Type": "application/json"}
+        if status in (429, 503) and self.retry_after is not None:
+            headers["Retry-After"] = str(self.retry_after)
+            # Gemini は待ち時間を RetryInfo でも返す
+            error["details"] = [{"@type": "type.googleapis.com/google.rpc.RetryInfo", "retryDelay": f"{self.retry_after}s"}]
+        return status, headers, json.dumps({"type": "error", "error": error}).encode("utf-8")
+
+    def handle(self, request):
+        with self._lock:
+            self.requests += 1
+            fault = self.faults.pop(0) if self.faults else self.always
+            if fault is not None:
+                self.injected += 1
+        if isinstance(fault, int):
+            # 本文を読み捨ててから応答する（接続を再利用できるように）
+            request.rfile.read(int(request.headers.get("Content-Length", 0)))
+            return self._error(fault)
+        if fault and fault[0] == "delay":
+            time.sleep(fault[1])
+        return self.handler(request)
+
+
+class FixtureServer:
+    """パスごとにハンドラを登録できるスレッド型HTTPサーバー
+
+    ハンドラは request（BaseHTTPRequestHandler）を受け取り
+    (status, headers, body) を返す。body に bytes 以外のイテラブルを返すと、
+    チャンクごとに送信して最後に接続を閉じる（ストリーミング応答）。
+
+        with FixtureServer() as server:
+            server.route("GET", "/feed.xml", FeedFixture("OpenAI").handle)
+            requests.get(server.url("/feed.xml"))
+    """
+
+    def __init__(self, host="127.0.0.1", port=0):
+        self._routes = {}
+        routes = self._routes
+
+        class Handler(BaseHTTPRequestHandler):
+            def _dispatch(self, method):
+                path = self.path.split("?", 1)[0]
+                handler = routes.get((method, path))
+                if handler is None:
+                    # 前方一致のルート（"/v1/items/" など）
+                    for (route_method, route_path), candidate in routes.items():
+                        if route_method == method and route_path.endswith("/") and path.startswith(route_path):
+                            handler = candidate
+                            break
+                if handler is None:
+                    status, headers, body = 404, {}, b"not found"
+                else:
+                    status, headers, body = handler(self)
+                self.send_response(status)
+                for key, value in headers.items():
+                    self.send_header(key, value)
+                if not isinstance(body, bytes):
+                    self._stream(body)
+                    return
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                if body:
+                    self.wfile.write(body)
+
+            def _stream(self, chunks):
+                self.send_header("Connection", "close")
+                self.end_headers()
+                self.close_connection = True
+                try:
+                    for chunk in chunks:
+                        self.wfile.write(chunk)
+                        self.wfile.flush()
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # クライアントが途中で切断した
+                finally:
+                    close = getattr(chunks, "close", None)
+                    if close:
+                        close()
+
+            def do_GET(self):
+                self._dispatch("GET")
+
+            def do_POST(self):
+                self._dispatch("POST")
+
+            def log_message(self, format, *args):
+                pass  # テスト出力を汚さない
+
+        self._httpd = ThreadingHTTPServer((host, port), Handler)
+        self._httpd.daemon_threads = True
+        self._thread = None
+
+    def route(self, method, path, handler):
+        self._routes[(method, path)] = handler
+
+    def url(self, path=""):
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}{path}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+        return False
@@ -0,0 +1,25 @@
+"""戦術データの生成（1件ずつ・まとめて）"""
+from scripts import analyst
+from tests.fixture_server import GeminiStub
+
+NEWS_ITEMS = [{"title": f"Fixture model {i}", "summary": "推論速度が2倍になった新モデル", "url": f"https://example.com/{i}"}
+              for i in range(1, 9)]
+
+
+def test_batched_tactics_match_single_calls(server, gemini_client):
+    # 1件ずつの側では1件の最初の応答を途中で切れたJSONにする（仮の戦術データで埋めずに生成し直すこと）
+    single_stub = GeminiStub(malformed_titles={"Fixture model 5"}).install(server)
+    single = [analyst.analyze_news_to_tactic(gemini_client, news) for news in NEWS_ITEMS]
+
+    batched_stub = GeminiStub(invalid_titles={"Fixture model 3"}).install(server)
+    prefetched = analyst.analyze_news_batch(gemini_client, NEWS_ITEMS)
+    # 不正だった要素は build_tactic と同じく1件ずつ生成し直す
+    batched = [prefetched.get(idx) or analyst.analyze_news_to_tactic(gemini_client, news)
+               for idx, news in enumerate(NEWS_ITEMS, 1)]
+
+    assert single == batched, "まとめて生成しても結果が同じであること"
+    assert all(not analyst.validate_tactic(tactic) for tactic in single), "欠けたフィールドのある戦術を返さないこと"
+    assert single_stub.requests == len(NEWS_ITEMS) + 1, "途中で切れた応答は1回だけ生成し直す"
+    assert batched_stub.requests == 2, "1回のまとめた呼び出し + 不正な1件の再生成"
+    assert batched_stub.prompt_chars < single_stub.prompt_chars / 3
+    assert single_stub.schema_requests == single_stub.requests, "構造化出力（response_schema）で要求すること"
@@ -0,0 +1,74 @@
+"""バッチ記事生成（失敗分の同期生成・バッチAPIがない場合の切り替え）"""
+from scripts import analyst, article_batch, resilience
+from tests.conftest import FAST_RETRY
+from tests.fixture_server import SAMPLE_ARTICLE, ClaudeStub, FaultInjector
+
+ITEMS = 8
+NEWS_ITEMS = [{"title": f"Fixture release {i}", "summary": "fixture", "url": f"https://example.com/{i}"}
+              for i in range(ITEMS)]
+
+
+def _generate(claude_client):
+    tactics = [{"id": f"20260101_060000_{i:02d}"} for i in range(1, ITEMS + 1)]
+    analyst.generate_articles_in_batch(claude_client, list(zip(tactics, NEWS_ITEMS)), poll_interval=0.1)
+    return tactics
+
+
+def test_batch_matches_sync_and_retries_only_failures(server, claude_client):
+    stub = ClaudeStub(failing_ids={"20260101_060000_03"}).install(server)
+    expected = analyst.clean_article_text(SAMPLE_ARTICLE)
+
+    assert analyst.generate_deep_article(claude_client, NEWS_ITEMS[0]) == expected
+    stub.requests = 0
+    tactics = _generate(claude_client)
+
+    assert all(tactic["article"] == expected for tactic in tactics), "全件の記事が戦術IDに対応づくこと"
+    assert stub.requests == 1, "バッチ内で失敗した記事だけを同期生成すること"
+
+
+def test_falls_back_to_sync_without_batch_api(server, claude_client):
+    stub = ClaudeStub(batches_available=False).install(server)
+
+    tactics = _generate(claude_client)
+
+    assert all(tactic["article"] == analyst.clean_article_text(SAMPLE_ARTICLE) for tactic in tactics)
+    assert stub.requests == ITEMS, "バッチAPIがなければ同期で生成すること"
+
+
+def test_timed_out_batch_is_cancelled_with_retries(server, claude_client):
+    resilience.configure("claude", **FAST_RETRY)
+    stub = ClaudeStub(slow_ids={"t1"}).install(server)
+    cancel = FaultInjector(stub.handle_batch_cancel, [529])
+    server.route("POST", "/v1/messages/batches/", cancel.handle)
+    batch_id = article_batch.submit_batch(claude_client, {"t1": "prompt"}, analyst.ARTICLE_MODEL, 1024)
+
+    batch = article_batch.wait_for_batch(claude_client, batch_id, poll_interval=0.05, timeout=0.1)
+
+    assert batch.processing_status == "ended", "キャンセル後はバッチが終わるまで待つこと"
+    assert cancel.requests == 2 and stub._batches[batch_id]["canceled"], "キャンセルも再試行すること"
+
+    # キャンセルに失敗しても例外にしない（呼び出し側は同期生成に切り替える）
+    cancel.always = 400
+    assert article_batch.cancel_batch(claude_client, batch_id) is False
+
+
+def test_timeout_keeps_articles_finished_before_cancel(server, claude_client):
+    slow = {"20260101_060000_07", "20260101_060000_08"}
+    stub = ClaudeStub(slow_ids=slow).install(server)
+
+    tactics = [{"id": f"20260101_060000_{i:02d}"} for i in range(1, ITEMS + 1)]
+    analyst.generate_articles_in_batch(claude_client, list(zip(tactics, NEWS_ITEMS)), timeout=0.2, poll_interval=0.05)
+
+    assert all(tactic["article"] for tactic in tactics)
+    assert stub.requests == len(slow), "キャンセル前に成功した記事は同期で作り直さないこと"
+
+
+def test_status_check_failure_falls_back_to_sync(server, claude_client):
+    resilience.configure("claude", **FAST_RETRY, max_attempts=2)
+    stub = ClaudeStub().install(server)
+    server.route("GET", "/v1/messages/batches/", FaultInjector(stub.handle_batch_get, always=500).handle)
+
+    tactics = _generate(claude_client)
+
+    assert all(tactic["article"] for tactic in tactics), "状態確認に失敗しても実行を止めず同期で生成すること"
+    assert stub.requests == ITEMS
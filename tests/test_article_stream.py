@@ -0,0 +1,37 @@
+"""ストリーミング記事生成（まとめでの打ち切り・途中経過からの再開）"""
+import time
+
+import pytest
+
+from scripts import analyst, article_stream
+from tests.fixture_server import SAMPLE_ARTICLE, ClaudeStub
+
+NEWS = {"title": "Fixture model release", "summary": "fixture", "url": "https://example.com/news"}
+
+
+def test_stream_stops_after_summary(server, claude_client):
+    stub = ClaudeStub().install(server)
+
+    sync_article = analyst.generate_deep_article(claude_client, NEWS, mode="sync")
+    stream_article = analyst.generate_deep_article(claude_client, NEWS, mode="stream", label="[stream]")
+    time.sleep(0.1)  # サーバー側で切断を検知するまで待つ
+    metrics = article_stream.get_metrics().items()[-1][1]
+
+    assert "補足情報" in sync_article and "補足情報" not in stream_article, "まとめ以降を生成しないこと"
+    assert stream_article.rstrip().endswith("期待される。"), "まとめは最後まで含むこと"
+    assert metrics["early_stop"] and stub.disconnected == 1, "打ち切り時に接続を閉じること"
+    assert metrics["ttft_s"] is not None
+
+
+def test_interrupted_stream_resumes_from_partial(server, claude_client, tmp_path):
+    ClaudeStub(fail_after_chars=200).install(server)
+    partial_path = str(tmp_path / "partial.md")
+
+    with pytest.raises(article_stream.StreamInterrupted):
+        article_stream.stream_article(claude_client, analyst.ARTICLE_MODEL, "prompt", 8192, partial_path)
+    saved = len(open(partial_path, encoding="utf-8").read())
+    resumed_text, resumed_metrics = article_stream.stream_article(
+        claude_client, analyst.ARTICLE_MODEL, "prompt", 8192, partial_path)
+
+    assert resumed_metrics["resumed_chars"] == saved > 0, "保存済みの途中経過から再開すること"
+    assert resumed_text == SAMPLE_ARTICLE[:len(resumed_text)], "再開後の本文が途切れずにつながること"
@@ -0,0 +1,57 @@
+"""フィード取得（並列取得・条件付きGET）"""
+import time
+
+from scripts.collector import fetch_rss_entries, load_feed_state, save_feed_state
+from tests.fixture_server import FeedFixture
+
+
+def _feeds(server, fixtures):
+    feeds = []
+    for i, fixture in enumerate(fixtures):
+        path = f"/feed{i}.xml"
+        server.route("GET", path, fixture.handle)
+        feeds.append({"name": fixture.name, "url": server.url(path), "priority": 1})
+    return feeds
+
+
+def test_parallel_fetch_is_faster_than_sequential(server):
+    fixtures = [FeedFixture(f"Feed {i}", delay=0.3) for i in range(6)]
+    feeds = _feeds(server, fixtures)
+
+    start = time.perf_counter()
+    sequential = fetch_rss_entries(feeds=feeds, state_path=None, max_workers=1)
+    sequential_s = time.perf_counter() - start
+    start = time.perf_counter()
+    parallel = fetch_rss_entries(feeds=feeds, state_path=None)
+    parallel_s = time.perf_counter() - start
+
+    assert len(sequential) == len(parallel) == 6 * 5
+    assert parallel_s < sequential_s
+
+
+def test_conditional_get_sends_validators(server, tmp_path):
+    fixtures = [FeedFixture(f"Feed {i}") for i in range(3)]
+    feeds = _feeds(server, fixtures)
+    state_path = str(tmp_path / "feed_state.json")
+
+    first = fetch_rss_entries(feeds=feeds, state_path=state_path)
+    second = fetch_rss_entries(feeds=feeds, state_path=state_path)
+
+    assert len(first) == 3 * 5
+    assert sum(fixture.not_modified for fixture in fixtures) == 3, "2回目は全フィードが304になること"
+    assert second == first, "304のフィードは前回のエントリを返すこと（未処理のニュースを失わない）"
+
+
+def test_legacy_state_without_entries_refetches(server, tmp_path):
+    fixtures = [FeedFixture("Feed 0")]
+    feeds = _feeds(server, fixtures)
+    state_path = str(tmp_path / "feed_state.json")
+    fetch_rss_entries(feeds=feeds, state_path=state_path)
+    # エントリを保存していない古い形式の状態
+    state = load_feed_state(state_path)
+    save_feed_state({url: {key: value for key, value in saved.items() if key != "entries"}
+                     for url, saved in state.items()}, state_path)
+
+    entries = fetch_rss_entries(feeds=feeds, state_path=state_path)
+
+    assert len(entries) == 5 and fixtures[0].not_modified == 0, "古い形式の状態では条件付きGETをしないこと"
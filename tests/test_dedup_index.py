@@ -0,0 +1,37 @@
+"""重複検出（URL・タイトル・近似重複）"""
+from datetime import date
+
+import pytest
+
+from scripts.dedup_index import DedupIndex
+
+TODAY = date(2026, 10, 18)
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = DedupIndex(str(tmp_path / "dedup_index.json"))
+    index.add("https://example.com/opus-4-5", "Introducing Claude Opus 4.5 for developers", seen_at="2026-10-16")
+    index.add("https://example.com/flash", "Gemini 2.5 Flash is now generally available", seen_at="2026-10-16")
+    index.add("https://example.com/old", "OpenAI launches GPT-5.6 with faster reasoning", seen_at="2026-09-01")
+    return index
+
+
+@pytest.mark.parametrize("title", [
+    "Introducing Claude Opus 4.6 for developers",
+    "Gemini 3.0 Flash is now generally available",
+    "Gemini 2.5 Pro is now generally available",
+])
+def test_new_releases_are_not_near_duplicates(index, title):
+    assert index.find_duplicate("https://example.com/new", title, today=TODAY) is None
+
+
+def test_reworded_title_is_near_duplicate_within_window(index):
+    duplicate = index.find_duplicate("https://example.com/other", "Introducing Claude Opus 4.5 for developers and teams",
+                                     today=TODAY)
+
+    assert duplicate and duplicate[0] == "near_duplicate"
+    # 期間外に登録したニュースは近似重複にしない（URL・タイトルの完全一致は期間に関係なく重複）
+    assert index.find_duplicate("https://example.com/x", "OpenAI launches GPT-5.6 with much faster reasoning",
+                                today=TODAY) is None
+    assert index.find_duplicate("https://example.com/old/?utm_source=rss", today=TODAY)[0] == "url"
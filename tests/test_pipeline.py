@@ -0,0 +1,47 @@
+"""収集 → 生成 → 公開のパイプライン（1回実行・常駐）"""
+import threading
+import time
+
+from scripts import pipeline
+from scripts.dedup_index import DedupIndex
+from tests.fixture_server import ClaudeStub, FeedFixture, GeminiStub
+
+
+def test_pipeline_publishes_as_tactics_complete(server, gemini_client, claude_client, tmp_path):
+    feeds = []
+    for i in range(3):
+        server.route("GET", f"/feed{i}.xml", FeedFixture(f"Feed {i}").handle)
+        feeds.append({"name": f"Feed {i}", "url": server.url(f"/feed{i}.xml"), "priority": 1})
+    GeminiStub().install(server)
+    ClaudeStub(chunk_delay=0.02).install(server)
+    published = []
+
+    def publish(tactics):
+        published.append((time.perf_counter(), [tactic["id"] for tactic in tactics]))
+
+    def make_pipeline(dedup_index):
+        return pipeline.Pipeline(gemini_client, claude_client, workers=2, article_mode="stream",
+                                 feeds=feeds, state_path=str(tmp_path / "feed_state.json"),
+                                 dedup_index=dedup_index, publish=publish, report_dir=str(tmp_path),
+                                 history_path=str(tmp_path / "history.jsonl"))
+
+    # 1回実行: 選定した3件を生成し、終わったものから公開する
+    once = make_pipeline(DedupIndex(str(tmp_path / "dedup_index.json")))
+    start = time.perf_counter()
+    once.run(once=True)
+    once_seconds = time.perf_counter() - start
+
+    assert once.stats["published"] == 3 and once.stats["failed"] == 0
+    assert published[0][0] - start < once_seconds * 0.8, "生成できた戦術から順に公開し、全件の完了を待たないこと"
+
+    # 常駐: 更新されたフィードと304のフィード（前回のエントリ）のうち、未処理のニュースだけを公開する
+    published.clear()
+    server.route("GET", "/feed0.xml", FeedFixture("Feed 0 update").handle)
+    daemon = make_pipeline(once.dedup_index)
+    threading.Timer(1.5, daemon.stop).start()
+    daemon.run(once=False, interval=0.3)
+
+    published_ids = [tactic_id for _, ids in published for tactic_id in ids]
+    assert daemon.stats["polls"] >= 3, "常駐モードでは間隔ごとにフィードを確認すること"
+    assert daemon.stats["published"] == daemon.stats["collected"] > 0
+    assert len(set(published_ids)) == len(published_ids), "同じニュースを二重に公開しないこと"
@@ -0,0 +1,119 @@
+"""再試行・タイムアウト・サーキットブレーカー（障害を注入したスタブに対して）"""
+import time
+
+from scripts import analyst, collector, resilience
+from tests.conftest import FAST_RETRY
+
+NEWS = {"title": "Fixture model", "summary": "推論速度が2倍になった新モデル", "url": "https://example.com/news"}
+
+
+class StatusError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"status {status_code}")
+        self.status_code = status_code
+
+
+def _raise(status_code):
+    def call(timeout):
+        raise StatusError(status_code)
+    return call
+
+
+def test_rate_limit_waits_for_retry_after(gemini_client, inject_faults):
+    resilience.configure("gemini", **FAST_RETRY)
+    injector = inject_faults("gemini", [429], retry_after=1)
+
+    start = time.perf_counter()
+    tactic = analyst.analyze_news_to_tactic(gemini_client, NEWS)
+
+    assert tactic and injector.requests == 2
+    assert time.perf_counter() - start >= 1.0, "Retry-After の1秒を待ってから成功すること"
+
+
+def test_server_errors_are_retried_for_selection(gemini_client, inject_faults):
+    resilience.configure("gemini", **FAST_RETRY)
+    injector = inject_faults("gemini", [503, 500])
+    entries = [{"source": "OpenAI", "title": f"Fixture news {i}", "summary": "fixture", "url": f"https://example.com/{i}"}
+               for i in range(1, 6)]
+
+    selected = collector.filter_ai_news_with_llm(gemini_client, entries)
+
+    # 優先度順のフォールバックではなく、LLMの選定結果を使うこと
+    assert all(entry.get("summary_ja") for entry in selected) and injector.requests == 3
+
+
+def test_hung_request_times_out_and_retries(gemini_client, inject_faults):
+    resilience.configure("gemini", **{**FAST_RETRY, "attempt_timeout": 0.5})
+    injector = inject_faults("gemini", [("delay", 3)])
+
+    start = time.perf_counter()
+    tactic = analyst.analyze_news_to_tactic(gemini_client, NEWS)
+
+    assert tactic and injector.requests == 2 and time.perf_counter() - start < 2.0
+
+
+def test_bad_request_is_not_retried(gemini_client, inject_faults):
+    resilience.configure("gemini", **FAST_RETRY)
+    injector = inject_faults("gemini", [400])
+
+    assert analyst.analyze_news_to_tactic(gemini_client, NEWS) is None
+    assert injector.requests == 1
+
+
+def test_claude_recovers_from_overload(claude_client, inject_faults):
+    resilience.configure("claude", **FAST_RETRY)
+    injector = inject_faults("claude", [529, 529])
+
+    assert analyst.generate_deep_article(claude_client, NEWS) and injector.requests == 3
+
+
+def test_breaker_opens_during_outage_and_closes_after_recovery(gemini_client, inject_faults):
+    resilience.configure("gemini", **FAST_RETRY, max_attempts=2, failure_threshold=3, reset_timeout=0.5)
+    injector = inject_faults("gemini", always=503)
+    breaker = resilience.get_breaker("gemini")
+
+    tactics = [analyst.analyze_news_to_tactic(gemini_client, dict(NEWS, title=f"Fixture model {i}")) for i in range(5)]
+
+    assert tactics == [None] * 5 and injector.requests == 3, "3回の失敗でブレーカーが開き、残りはAPIを呼ばないこと"
+    assert breaker.state == breaker.OPEN and breaker.rejected == 4
+
+    # 復旧後: 待ち時間が過ぎた後の1回目の試行が成功すればブレーカーを閉じる
+    injector.always = None
+    time.sleep(0.6)
+    assert analyst.analyze_news_to_tactic(gemini_client, NEWS)
+    assert breaker.state == breaker.CLOSED
+
+
+def _half_open(provider):
+    resilience.configure(provider, max_attempts=1, failure_threshold=1, reset_timeout=0.05)
+    breaker = resilience.get_breaker(provider)
+    try:
+        resilience.call(provider, _raise(503))
+    except StatusError:
+        pass
+    assert breaker.state == breaker.OPEN
+    time.sleep(0.06)
+    return breaker
+
+
+def test_rate_limited_trial_does_not_block_half_open_breaker():
+    breaker = _half_open("gemini")
+    try:
+        resilience.call("gemini", _raise(429))
+    except StatusError:
+        pass
+
+    assert resilience.call("gemini", lambda timeout: "ok") == "ok", "429の後も次の試行を受け付けること"
+    assert breaker.state == breaker.CLOSED
+
+
+def test_fatal_error_leaves_breaker_state_unchanged():
+    breaker = _half_open("gemini")
+    try:
+        resilience.call("gemini", _raise(400))
+    except StatusError:
+        pass
+
+    assert breaker.state == breaker.HALF_OPEN, "400でブレーカーを閉じないこと"
+    assert resilience.call("gemini", lambda timeout: "ok") == "ok"
+    assert breaker.state == breaker.CLOSED
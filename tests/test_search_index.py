@@ -0,0 +1,64 @@
+"""検索インデックス・事前生成HTMLの追記更新（全件から作り直した場合と同じ結果になること）"""
+import json
+import unicodedata
+
+import pytest
+
+import rendering
+from scripts import search_index, tactics_store
+
+QUERIES = ["", "Claude", "レビュー", "gpt-5", "AI エージェント", "量"]
+# 部分文字列として含むレコードを全て引けること（英数字は語単位なので、語の一部になりうる "ai" などは除く）
+RECALL_QUERIES = ["gpt-5", "GPT-5.6", "5.6", "claude code", "レビュー", "エージェント", "量子化", "量", "LLM"]
+
+
+def _split_by_date(records, count):
+    """日付の新しい count 件（同じ日付のレコードは分けない）と残り"""
+    while count < len(records) and records[count].get("date") == records[count - 1].get("date"):
+        count += 1
+    return records[:count], records[count:]
+
+
+def test_appended_records_match_full_rebuild(tmp_path):
+    records = tactics_store.load_tactics()
+    new, old = _split_by_date(records, 20)
+
+    full = search_index.SearchIndex(search_index.build_index(records))
+    index = search_index.build_index(old)
+    added = search_index.add_to_index(index, sorted(new, key=lambda record: record.get("date", "")))
+    incremental = search_index.SearchIndex(json.loads(json.dumps(index)))
+
+    assert added == len(new) and search_index.add_to_index(index, new) == 0, "既にあるIDは追加しないこと"
+    for tags in [None, *[[tag] for tag in full.all_tags()[:3]]]:
+        for query in QUERIES:
+            assert incremental.search(query, tags) == full.search(query, tags), (query, tags)
+    assert incremental.all_tags() == full.all_tags()
+
+
+def test_incremental_renders_add_only_missing_ids(tmp_path):
+    records = [dict(record, article=f"## 概要\n{record.get('title', '')}\n## まとめ\n本文")
+               for record in tactics_store.load_tactics(include_archive=False)]
+    new, old = _split_by_date(records, 10)
+    cards_path, articles_path = str(tmp_path / "cards.json"), str(tmp_path / "articles.json")
+    rendering.build_and_save_card_fragments(old, cards_path)
+    rendering.build_and_save_article_renders(old, articles_path)
+
+    cards = rendering.build_and_save_card_fragments(records, cards_path, incremental=True)
+    articles = rendering.build_and_save_article_renders(records, articles_path, incremental=True)
+
+    assert cards == rendering.build_card_fragments(records)[0]
+    assert articles == rendering.build_article_renders(records)[0] and len(articles) == len(records)
+    assert rendering.load_card_fragments(cards_path) == cards
+
+
+@pytest.mark.parametrize("query", RECALL_QUERIES)
+def test_recall_matches_substring_search(query):
+    records = tactics_store.load_tactics()
+    index = search_index.SearchIndex(search_index.build_index(records))
+
+    def text(record):
+        fields = " ".join(search_index._field_text(record, field) for field in search_index.FIELD_WEIGHTS)
+        return unicodedata.normalize("NFKC", fields).lower()
+
+    expected = {record["id"] for record in records if all(term in text(record) for term in query.lower().split())}
+    assert expected and expected <= set(index.search(query))
@@ -0,0 +1,53 @@
+"""バイナリスナップショット（JSONと内容がずれていないかの確認）"""
+import json
+import os
+
+import pytest
+
+from scripts import snapshot_codec
+
+pytest.importorskip("msgpack")
+
+TACTICS = [
+    {"id": "a", "title": "Claude Opus 4.5", "tags": ["claude", "coding"], "date": "2026-10-16"},
+    {"id": "b", "title": "Gemini 2.5 Flash", "tags": ["gemini"], "date": "2026-10-16"},
+]
+
+
+def write_json(path, tactics):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(tactics, f, ensure_ascii=False, indent=2)
+
+
+@pytest.fixture
+def json_path(tmp_path):
+    path = str(tmp_path / "ai_tactics.json")
+    write_json(path, TACTICS)
+    snapshot_codec.write_binary_snapshot(TACTICS, path)
+    return path
+
+
+def test_unchanged_json_is_not_rehashed(json_path, monkeypatch):
+    def fail(path):
+        raise AssertionError("サイズ・更新時刻が同じなのにハッシュを計算した")
+
+    monkeypatch.setattr(snapshot_codec, "file_digest", fail)
+
+    assert snapshot_codec.read_binary_snapshot(json_path) == TACTICS
+
+
+def test_touched_json_with_same_content_is_rehashed(json_path):
+    stat = os.stat(json_path)
+    os.utime(json_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    assert snapshot_codec.read_binary_snapshot(json_path) == TACTICS
+
+
+def test_edited_json_disables_binary_snapshot(json_path):
+    stat = os.stat(json_path)
+    # サイズの変わらない書き換えでも、更新時刻が変われば内容を確かめる
+    write_json(json_path, [dict(TACTICS[0], id="x"), TACTICS[1]])
+    os.utime(json_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    assert os.path.getsize(json_path) == stat.st_size
+    assert snapshot_codec.read_binary_snapshot(json_path) is None
@@ -0,0 +1,45 @@
+"""SQLiteバックエンド（JSONの検索インデックスと同じ結果になること）"""
+import pytest
+
+from scripts import search_index, tactics_db, tactics_store
+
+QUERIES = ["", "gpt-5", "GPT-5.6", "5.6", "AI エージェント", "Claude コードレビュー", "量", "量子化", "llm rag",
+           "存在しない語"]
+
+
+@pytest.fixture(scope="module")
+def backends(tmp_path_factory):
+    records = tactics_store.load_tactics()
+    db_path = str(tmp_path_factory.mktemp("db") / "ai_tactics.db")
+    conn = tactics_db.connect(db_path)
+    tactics_db.replace_all(conn, records)
+    conn.close()
+    db = tactics_db.TacticsDB.open(db_path)
+    yield search_index.SearchIndex(search_index.build_index(records)), db, db_path
+    db.close()
+
+
+@pytest.mark.parametrize("query", QUERIES)
+def test_db_search_matches_search_index(backends, query):
+    index, db, _ = backends
+    for tags in [None, [index.all_tags()[0]]]:
+        assert set(db.search(query, tags)) == set(index.search(query, tags)), (query, tags)
+    assert db.all_tags() == index.all_tags()
+
+
+def test_old_schema_is_migrated(backends, tmp_path):
+    index, _, db_path = backends
+    # 旧形式（trigram の全文検索）のDB
+    old_path = str(tmp_path / "old.db")
+    conn = tactics_db.connect(old_path)
+    tactics_db.replace_all(conn, tactics_store.load_tactics())
+    conn.execute("DROP TABLE tactics_fts")
+    conn.execute(f"CREATE VIRTUAL TABLE tactics_fts USING fts5({', '.join(tactics_db.FTS_FIELDS)}, tokenize='trigram')")
+    conn.execute("UPDATE meta SET value = '1' WHERE key = 'schema_version'")
+    conn.close()
+    assert not tactics_db.TacticsDB.open(old_path).is_current()
+
+    tactics_db.connect(old_path).close()
+    db = tactics_db.TacticsDB.open(old_path)
+
+    assert db.is_current() and set(db.search("gpt-5")) == set(index.search("gpt-5"))
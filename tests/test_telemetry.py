@@ -0,0 +1,56 @@
+"""段階・呼び出しごとの計測（時間・トークン数・再試行・推定コスト）とレポート"""
+import os
+
+from scripts import analyst, resilience, telemetry
+from tests.fixture_server import ClaudeStub, FaultInjector, GeminiStub
+
+NEWS_ITEMS = [{"title": f"Fixture model {i}", "summary": "推論速度が2倍になった新モデル",
+               "url": f"https://example.com/{i}"} for i in range(1, 4)]
+
+
+def test_report_records_calls_tokens_retries_and_cost(server, gemini_client, claude_client, tmp_path,
+                                                      isolated_providers):
+    recorder = isolated_providers
+    resilience.configure("gemini", base_delay=0.05, max_delay=0.2)
+    # Geminiは最初の1回だけ503を返す（再試行が計測されること）
+    server.route("POST", "/v1beta/models/", FaultInjector(GeminiStub().handle, [503]).handle)
+    claude_stub = ClaudeStub().install(server)
+
+    tactics = [analyst.build_tactic(gemini_client, claude_client, news, idx, len(NEWS_ITEMS),
+                                    "20260101_060000", "2026-01-01", mode)
+               for idx, (news, mode) in enumerate(zip(NEWS_ITEMS, ["sync", "stream", "batch"]), 1)]
+    analyst.generate_articles_in_batch(claude_client, [(tactics[2], NEWS_ITEMS[2])], poll_interval=0.1)
+
+    history_path = str(tmp_path / "telemetry_history.jsonl")
+    for _ in range(3):
+        report = recorder.write_report("fixture", report_dir=str(tmp_path), history_path=history_path)
+    with open(os.path.join(tmp_path, "fixture.prom"), encoding="utf-8") as f:
+        prom = f.read()
+    history = telemetry.load_history(history_path, "fixture")
+
+    calls = report["calls"]
+    assert sorted(call["operation"] for call in calls) == [
+        "article", "article_batch", "article_stream", "tactic", "tactic", "tactic"]
+    assert all(call["input_tokens"] > 0 and call["output_tokens"] > 0 for call in calls), "全呼び出しのトークン数を記録すること"
+    assert sum(call["retries"] for call in calls) == 1 and report["retries"]["gemini"] == {"transient": 1}
+    batch_call = next(call for call in calls if call["batch"])
+    assert batch_call["cost_usd"] == round(telemetry.estimate_cost(
+        batch_call["model"], batch_call["input_tokens"], batch_call["output_tokens"]) / 2, 6), "バッチは割引後の料金"
+    assert {"tactic_generation", "article_generation"} <= set(report["stages"])
+    assert report["total_cost_usd"] > 0 and claude_stub.batch_requests >= 1
+    assert ('ai_code_llm_tokens{script="fixture",provider="gemini",model="gemini-2.5-flash",'
+            'operation="tactic",direction="input"}') in prom
+    assert len(history) == 3 and not telemetry.find_regressions(history)
+
+
+def test_rollover_starts_a_new_interval(tmp_path, isolated_providers):
+    recorder = isolated_providers
+    history_path = str(tmp_path / "history.jsonl")
+    with recorder.track_call("gemini", "gemini-2.5-flash", "tactic"):
+        recorder.add_usage(100, 20)
+
+    first = recorder.rollover("daemon", report_dir=str(tmp_path), history_path=history_path)
+    idle = recorder.rollover("daemon", report_dir=str(tmp_path), history_path=history_path)
+
+    assert len(first["calls"]) == 1 and idle["calls"] == [], "区間を切り替えたら呼び出しの記録を空にすること"
+    assert len(telemetry.load_history(history_path, "daemon")) == 1, "呼び出しのない区間は履歴に残さないこと"